@@ -1,49 +1,55 @@
 #!/usr/bin/env python3
 
-import json
+import argparse
 import os
-import urllib.request
-import urllib.error
-import urllib.parse
+import sys
+import time
 from datetime import datetime
 
+from export_writer import FORMATS, ExportWriter
+from detail_enrichment import add_detail_arguments, enricher_from_args
+from history_store import add_history_arguments, record_history
+from http_cache import add_cache_arguments, cache_from_args
+from incremental_export import DeltaTracker, export_settings, load_snapshot, save_changelog
+from async_connector import BlockingConnector
+from request_scheduler import ExportError, get_scheduler
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
 class AmplitudeExporter:
-    def __init__(self, management_api_key):
+    def __init__(self, management_api_key, max_workers=3, cache=None, scheduler=None, base_url=None):
         self.api_key = management_api_key
-        self.base_url = "https://experiment.amplitude.com/api/1"
+        self.base_url = base_url or "https://experiment.amplitude.com/api/1"
+        self.max_workers = max_workers
+        self.cache = cache
+        self.scheduler = scheduler or get_scheduler()
         self.headers = {
             "Authorization": f"Bearer {management_api_key}",
             "Accept": "application/json",
+            "Accept-Encoding": "gzip",
             "Content-Type": "application/json"
         }
+        # Every request goes through the shared async connector core, over one keep-alive pool
+        self.connector = BlockingConnector('amplitude', self.headers, cache=cache, scheduler=self.scheduler,
+                                           per_host=max_workers)
 
     def _make_request(self, endpoint):
-        """Make a GET request to the Amplitude API"""
-        try:
-            url = f"{self.base_url}/{endpoint}"
-            req = urllib.request.Request(url, headers=self.headers)
-            
-            with urllib.request.urlopen(req) as response:
-                if response.status == 200:
-                    data = json.loads(response.read().decode())
-                    # Handle different response structures
-                    if isinstance(data, dict) and 'flags' in data:
-                        return data['flags']
-                    elif isinstance(data, dict) and 'experiments' in data:
-                        return data['experiments']
-                    elif isinstance(data, dict) and 'deployments' in data:
-                        return data['deployments']
-                    return data
-                else:
-                    print(f"✗ Failed to fetch {endpoint}. Status: {response.status}")
-                    print(f"Response: {response.read().decode()}")
-                    return []
-        except urllib.error.URLError as e:
-            print(f"✗ Error fetching {endpoint}: {e}")
-            return []
-        except Exception as e:
-            print(f"✗ Unexpected error fetching {endpoint}: {e}")
-            return []
+        """Make a GET request to the Amplitude API
+
+        Goes through the shared request scheduler; raises ExportError when the
+        request cannot be completed.
+        """
+        return self.unwrap(self.connector.get_json(f"{self.base_url}/{endpoint}", endpoint))
+
+    @staticmethod
+    def unwrap(data):
+        """Entity list of an Amplitude response, which may or may not be wrapped in an object"""
+        if isinstance(data, dict) and 'flags' in data:
+            return data['flags']
+        elif isinstance(data, dict) and 'experiments' in data:
+            return data['experiments']
+        elif isinstance(data, dict) and 'deployments' in data:
+            return data['deployments']
+        return data
 
     def export_flags(self):
         """Export all feature flags from Amplitude"""
@@ -69,19 +75,34 @@ class AmplitudeExporter:
             print(f"✓ Found {len(deployments)} deployments")
         return deployments
 
-def save_json(data, filename, directory=""):
-    """Save data as pretty-printed JSON"""
-    # Create directory if it doesn't exist
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-        print(f"📁 Created directory: {directory}")
-    
-    # Construct the full path
-    filepath = os.path.join(directory, filename) if directory else filename
-    
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
-    print(f"💾 Saved to {filepath}")
+    def export_all(self, concurrent=False):
+        """Fetch flags, experiments and deployments, optionally all at once on the connector's event loop"""
+        fetchers = {
+            'flags': self.export_flags,
+            'experiments': self.export_experiments,
+            'deployments': self.get_deployments
+        }
+        started = time.perf_counter()
+        if concurrent:
+            print(f"Fetching {', '.join(fetchers)}...")
+            responses = self.connector.get_many([(f"{self.base_url}/{name}", name) for name in fetchers])
+            results = {name: self.unwrap(data) for name, data in zip(fetchers, responses)}
+            for name, entities in results.items():
+                print(f"✓ Found {len(entities)} {name}")
+        else:
+            results = {name: fetch() for name, fetch in fetchers.items()}
+        elapsed = time.perf_counter() - started
+
+        stats = self.connector.stats()
+        mode = f"concurrently (up to {self.max_workers} connections)" if concurrent else "sequentially"
+        print(f"⏱️  Fetched {len(fetchers)} endpoints {mode} in {elapsed:.2f}s")
+        print(f"🔁 Connections: {stats['connections_opened']} opened, "
+              f"{stats['connections_reused']} reused for {stats['requests']} requests")
+        return results
+
+    def close(self):
+        """Close kept-alive connections"""
+        self.connector.close()
 
 def print_summary(flags, experiments):
     """Print a summary of the exported data"""
@@ -116,66 +137,142 @@ def print_summary(flags, experiments):
         if len(experiments) > 10:
             print(f"   ... and {len(experiments)-10} more")
 
-def main():
-    print("🔄 Amplitude Configuration Exporter (urllib version)")
-    print("="*40)
-    
-    # Get API key from environment variable
-    api_key = os.getenv('AMPLITUDE_MANAGEMENT_API_KEY')
-    if not api_key:
-        print("❌ Error: Please set AMPLITUDE_MANAGEMENT_API_KEY environment variable")
-        print("\nTo get your Management API key:")
-        print("1. Go to your Amplitude Experiment project")
-        print("2. Click on 'Management API' in the sidebar")
-        print("3. Create or copy an existing management API key")
-        print("\nThen run:")
-        print("export AMPLITUDE_MANAGEMENT_API_KEY='your-key-here'")
-        print("python3 amplitude_export_urllib.py")
-        return
-    
-    exporter = AmplitudeExporter(api_key)
+# Where every run writes its export: <project root>/build/amplitude
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build", "amplitude")
+
+def add_arguments(parser):
+    """Register the exporter's options on a parser"""
+    parser.add_argument('--concurrent', action='store_true',
+                        help="fetch flags, experiments and deployments in parallel")
+    parser.add_argument('--max-workers', type=int, default=3,
+                        help="size of the fetch thread pool and keep-alive pool (default: 3)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="diff against the previous snapshot, write a change log and skip rewriting unchanged exports")
+    parser.add_argument('--format', choices=FORMATS, default='pretty',
+                        help="entity file format: pretty or compact JSON, NDJSON, or compressed binary snapshots "
+                             "(default: pretty)")
+    add_cache_arguments(parser)
+    add_history_arguments(parser)
+    add_detail_arguments(parser)
+    add_telemetry_arguments(parser)
+
+def parse_args(argv=None):
+    """Parse command-line options for the exporter"""
+    parser = argparse.ArgumentParser(description="Export Amplitude Experiment configuration")
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+def print_missing_key(script='amplitude_export_urllib.py'):
+    print("❌ Error: Please set AMPLITUDE_MANAGEMENT_API_KEY environment variable")
+    print("\nTo get your Management API key:")
+    print("1. Go to your Amplitude Experiment project")
+    print("2. Click on 'Management API' in the sidebar")
+    print("3. Create or copy an existing management API key")
+    print("\nThen run:")
+    print("export AMPLITUDE_MANAGEMENT_API_KEY='your-key-here'")
+    print(f"python3 {script}")
+
+def run_export(args, api_key, cache=None, output_dir=OUTPUT_DIR, base_url=None):
+    """Fetch, optionally enrich and write the Amplitude export
+
+    Returns the export in memory, shaped like the combined export file
+    ({'exported_at', 'flags', 'experiments', 'deployments'}), so callers in
+    the same process need not read it back. A cache passed in is shared
+    with the caller, who reports its stats; otherwise one is made from args.
+    """
+    owns_cache = cache is None
+    if owns_cache:
+        cache = cache_from_args(args)
+    exporter = AmplitudeExporter(api_key, max_workers=args.max_workers, cache=cache, base_url=base_url)
     
-    # Export data
-    flags = exporter.export_flags()
-    experiments = exporter.export_experiments()
-    deployments = exporter.get_deployments()
+    # Taken before the fetch: the next --incremental run trusts lastModified up to this moment
+    exported_at = datetime.now().isoformat()
+    try:
+        with stage('fetch'):
+            results = exporter.export_all(concurrent=args.concurrent)
+        flags = results['flags']
+        experiments = results['experiments']
+        deployments = results['deployments']
+        enricher = enricher_from_args(args, exporter, 'amplitude')
+        if enricher:
+            with stage('details'):
+                flags = enricher.enrich('flags', flags)
+                experiments = enricher.enrich('experiments', experiments)
+            enricher.print_summary()
+    finally:
+        exporter.close()
+    if cache and owns_cache:
+        cache.print_stats()
     
-    # Define output directory
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build", "amplitude")
+    export = {'exported_at': exported_at, 'flags': flags, 'experiments': experiments, 'deployments': deployments}
     
-    # Save individual files
-    if flags:
-        save_json(flags, 'amplitude_flags.json', output_dir)
-    if experiments:
-        save_json(experiments, 'amplitude_experiments.json', output_dir)
-    if deployments:
-        save_json(deployments, 'amplitude_deployments.json', output_dir)
+    tracker = None
+    if args.incremental:
+        with stage('incremental'):
+            previous = load_snapshot(os.path.join(output_dir, 'amplitude_complete_export.json'))
+            tracker = DeltaTracker(previous, ('flags', 'experiments', 'deployments'), export_settings(args))
+            flags = list(tracker.track('flags', flags))
+            experiments = list(tracker.track('experiments', experiments))
+            deployments = list(tracker.track('deployments', deployments))
+        tracker.print_summary()
+        save_changelog(tracker.changelog(exported_at), 'amplitude_changelog.json', output_dir)
+        if previous and not tracker.has_changes():
+            print("\n✅ No changes since the last export; snapshot left untouched")
+            record_history(args, 'amplitude', os.path.join(output_dir, 'amplitude_complete_export.json'), exported_at)
+            return export
     
-    # Save combined export
-    combined_data = {
-        'exported_at': datetime.now().isoformat(),
-        'flags': flags,
-        'experiments': experiments,
-        'deployments': deployments,
-        'summary': {
-            'total_flags': len(flags),
-            'total_experiments': len(experiments),
-            'total_deployments': len(deployments),
-            'enabled_flags': len([f for f in flags if f.get('enabled', False)]),
-            'running_experiments': len([e for e in experiments if e.get('state') == 'running'])
+    # Stream each entity list to a temp file, then swap the whole export in at once
+    with stage('write'), ExportWriter(output_dir, args.format) as writer:
+        sections = {
+            'flags': writer.write_entities('amplitude_flags', flags),
+            'experiments': writer.write_entities('amplitude_experiments', experiments),
+            'deployments': writer.write_entities('amplitude_deployments', deployments)
         }
-    }
-    save_json(combined_data, 'amplitude_complete_export.json', output_dir)
+        # The combined export references the entity files instead of repeating them
+        trailer = {
+            'summary': {
+                'total_flags': len(flags),
+                'total_experiments': len(experiments),
+                'total_deployments': len(deployments),
+                'enabled_flags': len([f for f in flags if f.get('enabled', False)]),
+                'running_experiments': len([e for e in experiments if e.get('state') == 'running'])
+            }
+        }
+        if tracker:
+            trailer['entity_hashes'] = tracker.hashes
+        if enricher:
+            trailer['detail_latency'] = enricher.summary()
+        header = {'exported_at': exported_at, 'export_settings': export_settings(args)}
+        writer.write_combined('amplitude_complete_export.json', header, sections, trailer)
+    record_history(args, 'amplitude', os.path.join(output_dir, 'amplitude_complete_export.json'), exported_at)
     
     # Print summary
     print_summary(flags, experiments)
     
     print(f"\n✅ Export completed!")
     print(f"📁 Files created in {output_dir}:")
-    print(f"   - amplitude_flags.json")
-    print(f"   - amplitude_experiments.json") 
-    print(f"   - amplitude_deployments.json")
-    print(f"   - amplitude_complete_export.json")
+    for filepath in writer.written:
+        print(f"   - {os.path.basename(filepath)}")
+    return export
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'amplitude_export_urllib')
+    print("🔄 Amplitude Configuration Exporter (urllib version)")
+    print("="*40)
+    
+    # Get API key from environment variable
+    api_key = os.getenv('AMPLITUDE_MANAGEMENT_API_KEY')
+    if not api_key:
+        print_missing_key()
+        return
+    
+    run_export(args, api_key)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        with run_report():
+            main()
+    except ExportError as e:
+        print(f"\n❌ Export failed, the export would be incomplete: {e}")
+        sys.exit(1)
\ No newline at end of file
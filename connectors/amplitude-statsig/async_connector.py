@@ -0,0 +1,376 @@
+import asyncio
+import gzip
+import json
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections import defaultdict
+
+from request_scheduler import ExportError, get_scheduler
+from telemetry import get_telemetry
+
+# Coroutines allowed to wait on requests at once; connections are capped per host separately
+DEFAULT_MAX_CONCURRENCY = 256
+
+# Methods that may be sent again when a kept-alive connection drops before the response
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Same limit as urllib's HTTPRedirectHandler
+MAX_REDIRECTS = 10
+
+def decode_body(raw, content_encoding):
+    """Undo gzip/deflate transfer compression"""
+    encoding = (content_encoding or '').lower()
+    if encoding == 'gzip':
+        return gzip.decompress(raw)
+    if encoding == 'deflate':
+        return zlib.decompress(raw)
+    return raw
+
+class AsyncHTTPPool:
+    """Keep-alive HTTP/1.1 client on asyncio streams with a connection limit per host
+
+    Requests beyond the per-host limit wait for a connection instead of
+    opening another one. A connection whose request was cancelled or failed
+    midway is closed rather than returned, so the pool never hands out a
+    socket with an unread response on it. Redirects are followed like
+    urllib does, and hosts that HTTP(S)_PROXY / NO_PROXY route through a
+    proxy are requested with urllib on a worker thread instead.
+    """
+
+    def __init__(self, per_host=8, timeout=30):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._idle = defaultdict(list)
+        self._slots = {}
+        self._ssl = None
+        self._proxied = {}
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.requests_sent = 0
+
+    def _slot(self, origin):
+        if origin not in self._slots:
+            self._slots[origin] = asyncio.Semaphore(self.per_host)
+        return self._slots[origin]
+
+    async def _open(self, scheme, host, port):
+        self.connections_opened += 1
+        if scheme == 'https':
+            self._ssl = self._ssl or ssl.create_default_context()
+            return await asyncio.open_connection(host, port, ssl=self._ssl, server_hostname=host)
+        return await asyncio.open_connection(host, port)
+
+    async def request(self, method, url, headers=None, body=None):
+        """Send a request, following redirects, and return (status, headers, decoded body)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, raw = await self._send(method, url, headers, body)
+            location = next((v for k, v in response_headers.items() if k.lower() == 'location'), None)
+            if status not in REDIRECT_STATUSES or not location:
+                break
+            url = urllib.parse.urljoin(url, location)
+            # 307 and 308 repeat the request as is; the others turn a POST into a GET without its body
+            if status not in (307, 308) and method != 'HEAD':
+                method, body = 'GET', None
+        encoding = next((v for k, v in response_headers.items() if k.lower() == 'content-encoding'), None)
+        return status, response_headers, decode_body(raw, encoding)
+
+    def _uses_proxy(self, scheme, host):
+        """Whether the proxy environment routes this origin through a proxy"""
+        if (scheme, host) not in self._proxied:
+            proxies = urllib.request.getproxies()
+            self._proxied[(scheme, host)] = scheme in proxies and not urllib.request.proxy_bypass(host)
+        return self._proxied[(scheme, host)]
+
+    def _send_with_urllib(self, method, url, headers, body):
+        """One request through urllib's opener, which applies the proxy settings; runs on a worker thread"""
+        request = urllib.request.Request(url, data=body, headers={**(headers or {}), "Accept-Encoding": "gzip"},
+                                         method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as e:
+            with e:
+                return e.code, dict(e.headers), e.read()
+
+    async def _send(self, method, url, headers, body):
+        """(status, headers, raw body) of one request, over a pooled connection or through the proxy"""
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme or 'https'
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        origin = (scheme, parsed.hostname, port)
+        if self._uses_proxy(scheme, parsed.hostname):
+            async with self._slot(origin):
+                self.requests_sent += 1
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, self._send_with_urllib, method, url, headers, body)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        send_headers = {"Host": parsed.netloc, "Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        send_headers.update(headers or {})
+        if body is not None:
+            send_headers["Content-Length"] = str(len(body))
+        request = f"{method} {path} HTTP/1.1\r\n".encode() + b"".join(
+            f"{name}: {value}\r\n".encode('latin-1') for name, value in send_headers.items()) + b"\r\n" + (body or b"")
+
+        async with self._slot(origin):
+            idle = self._idle[origin]
+            connection = None
+            while idle and connection is None:
+                connection = idle.pop()
+                if connection[0].at_eof():
+                    # Closed by the server while idle
+                    connection[1].close()
+                    connection = None
+            reused = connection is not None
+            if reused:
+                self.connections_reused += 1
+            else:
+                connection = await asyncio.wait_for(self._open(*origin), self.timeout)
+            try:
+                response = await asyncio.wait_for(self._exchange(connection, request, method), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                connection[1].close()
+                # The server may have acted on a POST before the connection dropped, so only resend idempotent ones
+                if not reused or method not in IDEMPOTENT_METHODS:
+                    raise ConnectionError(f"connection to {parsed.hostname} failed: {e}") from e
+                # The idle connection went away under us; retry once on a fresh one
+                self.connections_reused -= 1
+                connection = await asyncio.wait_for(self._open(*origin), self.timeout)
+                try:
+                    response = await asyncio.wait_for(self._exchange(connection, request, method), self.timeout)
+                except BaseException:
+                    connection[1].close()
+                    raise
+            except BaseException:
+                connection[1].close()
+                raise
+            status, response_headers, raw, will_close = response
+            if will_close:
+                connection[1].close()
+            else:
+                idle.append(connection)
+        return status, response_headers, raw
+
+    async def _exchange(self, connection, request, method):
+        """Write one request and read its full response off a connection"""
+        reader, writer = connection
+        self.requests_sent += 1
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readuntil(b"\r\n")
+        parts = status_line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+            raise ConnectionError(f"malformed status line {status_line!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip()] = value.strip()
+        lowered = {k.lower(): v.lower() for k, v in headers.items()}
+
+        will_close = lowered.get('connection') == 'close' or parts[0] == 'HTTP/1.0'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            raw = b""
+        elif lowered.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    # Skip trailers up to the blank line
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            raw = b"".join(chunks)
+        elif 'content-length' in lowered:
+            raw = await reader.readexactly(int(lowered['content-length']))
+        else:
+            raw = await reader.read()
+            will_close = True
+        return status, headers, raw, will_close
+
+    def stats(self):
+        """Connection reuse counters for reporting"""
+        return {
+            'requests': self.requests_sent,
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused
+        }
+
+    async def close(self):
+        """Close every idle connection"""
+        idle = [connection for connections in self._idle.values() for connection in connections]
+        self._idle.clear()
+        for _, writer in idle:
+            writer.close()
+
+class AsyncConnector:
+    """Request core shared by the exporters: cache revalidation, rate limits, retries and JSON decoding
+
+    Each exporter only supplies its vendor name and auth headers. Every
+    request goes through the response cache and the process-wide
+    scheduler's token bucket and backoff, and any number of coroutines can
+    share one connector on a single thread.
+    """
+
+    def __init__(self, vendor, headers, cache=None, scheduler=None, per_host=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=30):
+        self.vendor = vendor
+        self.headers = headers
+        self.cache = cache
+        self.scheduler = scheduler or get_scheduler()
+        per_host = per_host or self.scheduler.limits.get(vendor, {}).get('max_in_flight', 4)
+        self.pool = AsyncHTTPPool(per_host=per_host, timeout=timeout)
+        self.max_concurrency = max_concurrency
+        self._concurrency = None
+
+    async def _execute(self, method, url, headers, body, description):
+        """(status, headers, body, seconds) of the first response the scheduler accepts, recorded in telemetry"""
+        if self._concurrency is None:
+            self._concurrency = asyncio.Semaphore(self.max_concurrency)
+        attempts = []
+
+        async def attempt():
+            started = time.perf_counter()
+            attempts.append(None)
+            status, response_headers, response_body = await self.pool.request(method, url, headers, body)
+            attempts[-1] = status
+            return status, response_headers, (status, response_headers, response_body, time.perf_counter() - started)
+
+        telemetry = get_telemetry()
+        started = time.perf_counter()
+        try:
+            async with self._concurrency:
+                response = await self.scheduler.execute_async(self.vendor, description, attempt)
+        except ExportError as e:
+            telemetry.record_request(self.vendor, description, attempts[-1] if attempts else None,
+                                     time.perf_counter() - started, 0, len(attempts), e)
+            raise
+        telemetry.record_request(self.vendor, description, response[0], time.perf_counter() - started,
+                                 len(response[2]), len(attempts))
+        return response
+
+    async def get(self, url, description=None, timings=None):
+        """GET a URL; returns the body of the 200 response (served from the cache on 304)
+
+        When a timings list is given, the round-trip seconds of the accepted
+        attempt are appended to it, leaving out rate-limit waits and retries.
+        """
+        description = description or url
+        headers = self.cache.conditional_headers(url, self.headers) if self.cache else self.headers
+        status, response_headers, body, elapsed = await self._execute('GET', url, headers, None, description)
+        if timings is not None:
+            timings.append(elapsed)
+        if self.cache:
+            status, body = self.cache.resolve(url, self.headers, status, response_headers, body, elapsed)
+        if status != 200:
+            raise ExportError(self.vendor, f"unexpected response for {description}", status)
+        return body
+
+    async def send_json(self, method, url, payload, description=None):
+        """Send a JSON body (POST, PATCH, ...) and decode the JSON response; never cached
+
+        Retried like a GET on 429 and 5xx, so the server may apply it more
+        than once: a non-idempotent write such as a create must treat a
+        duplicate error as a possibly lost success. Any other non-2xx status
+        raises ExportError.
+        """
+        description = description or f"{method} {url}"
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+        _, _, response, _ = await self._execute(method, url, self.headers, body, description)
+        try:
+            return json.loads(response.decode()) if response else {}
+        except ValueError as e:
+            raise ExportError(self.vendor, f"invalid JSON from {description}: {e}")
+
+    async def get_json(self, url, description=None, timings=None):
+        """GET a URL and decode its JSON body"""
+        description = description or url
+        body = await self.get(url, description, timings)
+        try:
+            return json.loads(body.decode())
+        except ValueError as e:
+            raise ExportError(self.vendor, f"invalid JSON from {description}: {e}")
+
+    async def get_many(self, requests, return_exceptions=False):
+        """Fetch (url, description) pairs concurrently; results come back in request order
+
+        When a request fails the rest are cancelled and the error is raised,
+        unless return_exceptions is set, in which case failures are returned
+        in place of their results.
+        """
+        tasks = [asyncio.ensure_future(self.get_json(url, description)) for url, description in requests]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        return self.pool.stats()
+
+    async def close(self):
+        await self.pool.close()
+
+class BlockingConnector:
+    """Synchronous front for an AsyncConnector, for the exporters' existing blocking entry points
+
+    The connector lives on an event loop in a daemon thread, so blocking
+    callers, including several threads at once, share one set of kept-alive
+    connections. Pass a coroutine to run() to fan out many requests at once.
+    """
+
+    def __init__(self, vendor, headers, cache=None, scheduler=None, per_host=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=30):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=f"{vendor}-connector", daemon=True)
+        self._thread.start()
+        self.connector = AsyncConnector(vendor, headers, cache, scheduler, per_host, max_concurrency, timeout)
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the connector's loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine):
+        """Run a coroutine on the connector's loop and wait for its result
+
+        If the waiting thread is interrupted, the coroutine is cancelled.
+        """
+        future = self.submit(coroutine)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def get_json(self, url, description=None):
+        return self.run(self.connector.get_json(url, description))
+
+    def get_many(self, requests, return_exceptions=False):
+        return self.run(self.connector.get_many(requests, return_exceptions))
+
+    def send_json(self, method, url, payload, description=None):
+        return self.run(self.connector.send_json(method, url, payload, description))
+
+    def stats(self):
+        return self.connector.stats()
+
+    def close(self):
+        """Close idle connections and stop the loop thread"""
+        if not self.loop.is_running():
+            return
+        self.run(self.connector.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
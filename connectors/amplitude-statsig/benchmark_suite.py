@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from amplitude_export_urllib import AmplitudeExporter
+from bulk_diff import build_report
+from config_table import ConfigTable
+from detail_enrichment import DetailEnricher
+from export_reader import open_export
+from export_writer import ExportWriter
+from http_cache import ResponseCache
+from mock_vendors import MockVendorProcess
+from request_scheduler import RequestScheduler
+from statsig_export import StatsigExporter
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             "build", "benchmarks")
+
+# Limits for the local servers, which do not throttle; the vendor defaults would measure the token bucket
+UNTHROTTLED = {'rate': 100000.0, 'burst': 100000, 'max_in_flight': 32}
+
+# A stage regresses when it is this much slower or larger than the baseline
+DEFAULT_TOLERANCE = 0.2
+
+class Pipeline:
+    """The exporter and comparator stages, run in-process against the mock vendors
+
+    Exports are written to a temporary directory, never to build/amplitude
+    or build/statsig.
+    """
+
+    def __init__(self, server, workdir, details=False, workers=None):
+        self.server = server
+        self.workdir = workdir
+        self.details = details
+        self.workers = workers
+        self.scheduler = RequestScheduler({'amplitude': UNTHROTTLED, 'statsig': UNTHROTTLED})
+        self.amplitude_export = os.path.join(workdir, 'amplitude', 'amplitude_complete_export.json')
+        self.statsig_export = os.path.join(workdir, 'statsig', 'statsig_complete_export.json')
+        self.cache = ResponseCache(os.path.join(workdir, 'http_cache'))
+
+    def stages(self):
+        stages = [('amplitude_export', self.export_amplitude)]
+        if self.details:
+            stages.append(('amplitude_details', self.enrich_amplitude))
+        stages += [
+            ('statsig_export', self.export_statsig),
+            ('statsig_revalidate', self.export_statsig),
+            ('inventory_diff', self.diff_inventories),
+            ('config_query', self.query_configs),
+        ]
+        return stages
+
+    def _amplitude_exporter(self):
+        return AmplitudeExporter('benchmark', max_workers=UNTHROTTLED['max_in_flight'], scheduler=self.scheduler,
+                                 base_url=self.server.amplitude_url)
+
+    def export_amplitude(self):
+        exporter = self._amplitude_exporter()
+        try:
+            results = exporter.export_all(concurrent=True)
+        finally:
+            exporter.close()
+        self._write_amplitude(results)
+        return sum(len(entities) for entities in results.values())
+
+    def enrich_amplitude(self):
+        exporter = self._amplitude_exporter()
+        export = open_export(self.amplitude_export)
+        try:
+            enricher = DetailEnricher(exporter, 'amplitude', versions=True, concurrency=64)
+            results = {section: enricher.enrich(section, export[section]) for section in ('flags', 'experiments')}
+        finally:
+            exporter.close()
+        results['deployments'] = list(export['deployments'])
+        self._write_amplitude(results)
+        return len(results['flags']) + len(results['experiments'])
+
+    def _write_amplitude(self, results):
+        with ExportWriter(os.path.dirname(self.amplitude_export), 'compact') as writer:
+            sections = {section: writer.write_entities(f"amplitude_{section}", results[section])
+                        for section in ('flags', 'experiments', 'deployments')}
+            writer.write_combined('amplitude_complete_export.json', {'exported_at': datetime.now().isoformat()},
+                                  sections, {})
+
+    def export_statsig(self):
+        exporter = StatsigExporter('benchmark', cache=self.cache, scheduler=self.scheduler,
+                                   base_url=self.server.statsig_url)
+        try:
+            with ExportWriter(os.path.dirname(self.statsig_export), 'compact') as writer:
+                sections = {
+                    'experiments': writer.write_entities('statsig_experiments', exporter.get_experiments(paginate=True)),
+                    'feature_gates': writer.write_entities('statsig_feature_gates', exporter.get_feature_gates(paginate=True)),
+                    'dynamic_configs': writer.write_entities('statsig_dynamic_configs',
+                                                             exporter.get_dynamic_configs(paginate=True)),
+                }
+                writer.write_combined('statsig_complete_export.json', {'exported_at': datetime.now().isoformat()},
+                                      sections, {})
+        finally:
+            exporter.close()
+        return sum(count for _, count in sections.values())
+
+    def diff_inventories(self):
+        report = build_report(self.amplitude_export, self.statsig_export, workers=self.workers)
+        return report['summary']['amplitude_entities'] + report['summary']['statsig_entities']
+
+    def query_configs(self):
+        table = ConfigTable.from_export(open_export(self.amplitude_export))
+        for expression in ("type=flag and enabled", "type=experiment and state in running,draft", "rollout>=50"):
+            table.count(expression)
+        table.group_by('evaluationMode', "variants>1")
+        return table.size
+
+def measure(name, stage, server, verbose=False):
+    """Run one stage and record wall and CPU time, peak traced memory, throughput and request counts"""
+    before = server.snapshot_counts()
+    tracemalloc.reset_peak()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    wall, cpu = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        entities = stage()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    peak = tracemalloc.get_traced_memory()[1]
+    after = server.snapshot_counts()
+    requests = {key: after[key] - before.get(key, 0) for key in after if after[key] != before.get(key, 0)}
+    return {
+        'stage': name,
+        'wall_seconds': round(wall, 4),
+        'cpu_seconds': round(cpu, 4),
+        'peak_memory_mb': round((peak - baseline_memory) / 1e6, 2),
+        'entities': entities,
+        'entities_per_second': round(entities / wall, 1) if wall else 0.0,
+        'requests': requests,
+    }
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Per-stage ratios against a baseline run; returns the list of regressions"""
+    if baseline['parameters'] != results['parameters']:
+        print(f"⚠️  Baseline parameters differ: {baseline['parameters']} vs {results['parameters']}")
+    previous = {stage['stage']: stage for stage in baseline['stages']}
+    regressions = []
+    print(f"\n📏 Against baseline from {baseline['generated_at']} (tolerance {tolerance:.0%}):")
+    for stage in results['stages']:
+        old = previous.get(stage['stage'])
+        if old is None:
+            print(f"   - {stage['stage']}: no baseline")
+            continue
+        checks = []
+        for metric in ('wall_seconds', 'peak_memory_mb'):
+            ratio = stage[metric] / old[metric] if old[metric] else 1.0
+            checks.append((metric, ratio, ratio > 1 + tolerance))
+        old_total, total = old['requests'].get('total', 0), stage['requests'].get('total', 0)
+        checks.append(('requests', total / old_total if old_total else 1.0, total > old_total * (1 + tolerance)))
+        failed = [metric for metric, _, regressed in checks if regressed]
+        regressions += [f"{stage['stage']}.{metric}" for metric in failed]
+        marker = "❌" if failed else "✅"
+        print(f"   {marker} {stage['stage']}: " + ", ".join(f"{metric} {ratio:.2f}x" for metric, ratio, _ in checks))
+    return regressions
+
+def print_results(results):
+    params = results['parameters']
+    print(f"\n📊 Benchmark: {params['size']} entities, {params['latency'] * 1000:.0f}ms latency, "
+          f"{params['error_rate']:.0%} errors")
+    print(f"   {'stage':<20} {'wall':>8} {'cpu':>8} {'peak MB':>8} {'entities/s':>11} requests")
+    for stage in results['stages']:
+        requests = ", ".join(f"{key} {count}" for key, count in sorted(stage['requests'].items()) if key != 'total')
+        print(f"   {stage['stage']:<20} {stage['wall_seconds']:>7.2f}s {stage['cpu_seconds']:>7.2f}s "
+              f"{stage['peak_memory_mb']:>8.1f} {stage['entities_per_second']:>11,.0f} {requests or '-'}")
+    print(f"   {'total':<20} {results['wall_seconds']:>7.2f}s")
+
+def parse_args(argv=None):
+    """Parse command-line options for the benchmark suite"""
+    parser = argparse.ArgumentParser(description="Benchmark the exporters and comparators against local mock vendors")
+    parser.add_argument('--size', type=int, default=5000, help="synthetic Amplitude entities (default: 5000)")
+    parser.add_argument('--latency', type=float, default=0.01, help="mean server latency in seconds (default: 0.01)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 503 (default: 0)")
+    parser.add_argument('--payload-kb', type=int, default=0, help="payload size per variant in KB (default: 0)")
+    parser.add_argument('--details', action='store_true', help="include the per-entity detail and versions stage")
+    parser.add_argument('--workers', type=int, default=None, help="inventory diff processes (default: one per CPU)")
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARK_DIR, 'baseline.json'),
+                        help="baseline results to compare against (default: build/benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed slowdown or growth before a stage counts as regressed (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument('--verbose', action='store_true', help="show the exporters' own output")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    parameters = {'size': args.size, 'latency': args.latency, 'error_rate': args.error_rate,
+                  'payload_kb': args.payload_kb, 'details': args.details}
+    print(f"🏁 Starting mock vendors with {args.size} synthetic entities...")
+    server = MockVendorProcess(args.size, args.latency, args.error_rate, payload_kb=args.payload_kb)
+    workdir = tempfile.mkdtemp(prefix='connector-benchmark-')
+    tracemalloc.start()
+    stages = []
+    started = time.perf_counter()
+    try:
+        with server:
+            pipeline = Pipeline(server, workdir, details=args.details, workers=args.workers)
+            for name, stage in pipeline.stages():
+                print(f"⏱️  {name}...")
+                stages.append(measure(name, stage, server, args.verbose))
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'generated_at': datetime.now().isoformat(),
+        'parameters': parameters,
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'stages': stages,
+    }
+    print_results(results)
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    run_path = os.path.join(BENCHMARK_DIR, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(run_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {run_path}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"\n❌ Regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
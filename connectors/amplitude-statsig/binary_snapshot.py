@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from incremental_export import entity_key
+
+# File layout: header, zlib blocks of length-prefixed compact JSON records, zlib JSON index, trailer
+MAGIC = b'CSNP'
+VERSION = 1
+CODEC_ZLIB = 1
+EXTENSION = '.snap'
+
+_HEADER = struct.Struct('<4sBB2x')
+_TRAILER = struct.Struct('<QI4s')
+_LENGTH = struct.Struct('<I')
+
+# Records are packed until a block holds this many uncompressed bytes
+BLOCK_SIZE = 1 << 16
+# Decompressed blocks kept for random access by index or key
+CACHED_BLOCKS = 8
+
+class SnapshotWriter:
+    """Streams entities into a compressed, key-indexed snapshot file opened in binary mode
+
+    Records are compact JSON, each prefixed with its length and packed into
+    zlib blocks of about BLOCK_SIZE bytes. close() appends the index: the
+    offset, length and record count of every block, plus every entity's key
+    in file order.
+    """
+
+    def __init__(self, f, block_size=BLOCK_SIZE, level=6):
+        self.f = f
+        self.block_size = block_size
+        self.level = level
+        self.blocks = []
+        self.keys = []
+        self._block = bytearray()
+        self._block_count = 0
+        self._offset = _HEADER.size
+        f.write(_HEADER.pack(MAGIC, VERSION, CODEC_ZLIB))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, entity):
+        record = json.dumps(entity, separators=(',', ':'), default=str).encode('utf-8')
+        self._block += _LENGTH.pack(len(record))
+        self._block += record
+        self._block_count += 1
+        self.keys.append(entity_key(entity))
+        if len(self._block) >= self.block_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._block_count:
+            return
+        data = zlib.compress(bytes(self._block), self.level)
+        self.f.write(data)
+        self.blocks.append([self._offset, len(data), self._block_count])
+        self._offset += len(data)
+        self._block = bytearray()
+        self._block_count = 0
+
+    def close(self):
+        """Write the last block, the index and the trailer; the file itself is left open"""
+        self._flush()
+        index = json.dumps({'count': len(self.keys), 'blocks': self.blocks, 'keys': self.keys},
+                           separators=(',', ':'), default=str).encode('utf-8')
+        index = zlib.compress(index, self.level)
+        self.f.write(index)
+        self.f.write(_TRAILER.pack(self._offset, len(index), MAGIC))
+
+def is_snapshot(filepath):
+    return filepath.endswith(EXTENSION)
+
+class SnapshotSection(Sequence):
+    """Entities of a snapshot file, decompressed a block at a time from a memory map
+
+    Behaves like export_reader.EntitySection: iterating walks the blocks in
+    order, while indexing and get(key) locate the record's block through the
+    index footer and decompress only that block. Recently used blocks are
+    cached, so nearby lookups do not decompress them again.
+    """
+
+    def __init__(self, buffer, index):
+        self._buffer = buffer
+        self._blocks = index['blocks']
+        self._index_keys = index['keys']
+        self._count = index['count']
+        self._keys = None
+        self._firsts = []
+        first = 0
+        for _, _, count in self._blocks:
+            self._firsts.append(first)
+            first += count
+        self._cache = OrderedDict()
+
+    def _records(self, block):
+        """(decompressed block, start offsets of its records), cached by block number"""
+        cached = self._cache.get(block)
+        if cached is not None:
+            self._cache.move_to_end(block)
+            return cached
+        offset, length, count = self._blocks[block]
+        data = zlib.decompress(self._buffer[offset:offset + length])
+        starts = []
+        position = 0
+        for _ in range(count):
+            starts.append(position)
+            position += _LENGTH.size + _LENGTH.unpack_from(data, position)[0]
+        self._cache[block] = cached = (data, starts)
+        if len(self._cache) > CACHED_BLOCKS:
+            self._cache.popitem(last=False)
+        return cached
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('snapshot index out of range')
+        block = bisect.bisect_right(self._firsts, index) - 1
+        data, starts = self._records(block)
+        start = starts[index - self._firsts[block]]
+        length = _LENGTH.unpack_from(data, start)[0]
+        return json.loads(data[start + _LENGTH.size:start + _LENGTH.size + length])
+
+    def __iter__(self):
+        loads, unpack_from, prefix = json.loads, _LENGTH.unpack_from, _LENGTH.size
+        for offset, length, count in self._blocks:
+            data = zlib.decompress(self._buffer[offset:offset + length])
+            position = 0
+            for _ in range(count):
+                size = unpack_from(data, position)[0]
+                position += prefix
+                yield loads(data[position:position + size])
+                position += size
+
+    def _key_index(self):
+        if self._keys is None:
+            self._keys = {}
+            for position, key in enumerate(self._index_keys):
+                self._keys.setdefault(key, position)
+        return self._keys
+
+    def keys(self):
+        return self._key_index().keys()
+
+    def get(self, key, default=None):
+        """The entity with this key, id or name, decompressing only its block"""
+        index = self._key_index().get(key)
+        return default if index is None else self[index]
+
+def _read_index(buffer, filepath):
+    if len(buffer) < _HEADER.size + _TRAILER.size:
+        raise ValueError(f"{filepath} is too short to be a snapshot")
+    magic, version, codec = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{filepath} is not a snapshot file")
+    if version != VERSION or codec != CODEC_ZLIB:
+        raise ValueError(f"{filepath} uses unsupported snapshot version {version} / codec {codec}")
+    offset, length, magic = _TRAILER.unpack_from(buffer, len(buffer) - _TRAILER.size)
+    if magic != MAGIC:
+        raise ValueError(f"{filepath} is truncated: the index trailer is missing")
+    return json.loads(zlib.decompress(buffer[offset:offset + length]))
+
+def open_snapshot(filepath):
+    """SnapshotSection over a snapshot file; only the header and index footer are read up front"""
+    with open(filepath, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return SnapshotSection(buffer, _read_index(buffer, filepath))
+
+def iter_snapshot(filepath):
+    """Yield the entities of a snapshot file in order"""
+    yield from open_snapshot(filepath)
+
+def run_benchmark(total, seed=42, payload_kb=0, lookups=1000):
+    """Write `total` synthetic entities in each format and time full loads and lookups by key"""
+    import contextlib
+    import io
+    import random
+    import tempfile
+
+    from export_reader import open_entities
+    from export_writer import ExportWriter, iter_entities
+    from synthetic_data import generate_inventories
+
+    amplitude, _ = generate_inventories(total, seed=seed, payload_kb=payload_kb)
+    entities = amplitude['flags'] + amplitude['experiments']
+    keys = random.Random(seed).sample([entity_key(e) for e in entities], min(lookups, len(entities)))
+    print(f"🗜️  Snapshot benchmark: {len(entities)} entities, {len(keys)} lookups by key")
+    print(f"   {'format':<8} {'size':>10} {'write':>8} {'load':>8} {'open':>8} {'lookups':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for fmt in ('pretty', 'compact', 'ndjson', 'binary'):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), ExportWriter(workdir, fmt) as writer:
+                filename, _ = writer.write_entities(f'entities_{fmt}', entities)
+            written = time.perf_counter() - started
+            filepath = os.path.join(workdir, filename)
+
+            started = time.perf_counter()
+            loaded = sum(1 for _ in iter_entities(filepath))
+            load = time.perf_counter() - started
+            assert loaded == len(entities)
+
+            started = time.perf_counter()
+            section = open_entities(filepath)
+            opened = time.perf_counter() - started
+            started = time.perf_counter()
+            for key in keys:
+                section.get(key)
+            lookup = time.perf_counter() - started
+            size = os.path.getsize(filepath) / (1 << 20)
+            print(f"   {fmt:<8} {size:>8.2f}MB {written:>7.2f}s {load:>7.2f}s {opened:>7.2f}s {lookup:>8.3f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Size and load-time benchmark for the binary snapshot format")
+    parser.add_argument('--benchmark', type=int, metavar='N', default=20000,
+                        help="number of synthetic Amplitude entities (default: 20000)")
+    parser.add_argument('--payload-kb', type=int, default=0, help="payload size per variant in KB (default: 0)")
+    args = parser.parse_args(argv)
+    run_benchmark(args.benchmark, payload_kb=args.payload_kb)
+
+if __name__ == "__main__":
+    main()
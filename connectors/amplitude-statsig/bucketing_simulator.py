@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from bulk_diff import AMPLITUDE_SECTIONS, STATSIG_SECTIONS, load_inventory, pair_inventories
+from export_writer import save_json
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          "build", "statsig")
+
+DEFAULT_USERS = 1000000
+BATCH_SIZE = 1 << 20
+# Ids per sha256 task when Statsig hashing is spread over a process pool
+HASH_CHUNK = 1 << 17
+# Sample-ratio mismatch is flagged below this chi-square p-value
+SRM_THRESHOLD = 0.001
+UNALLOCATED = 'unallocated'
+
+# Amplitude: murmur3_x86_32 of "<bucketingSalt>/<id>"; hash % 100 allocates, hash // 100 picks the variant
+AMPLITUDE_DISTRIBUTION_RANGE = 42949672
+# Statsig: first 8 bytes of sha256("<salt>.<id>") as a big-endian integer; % 10000 allocates, % 1000 picks the group
+STATSIG_ALLOCATION_BUCKETS = 10000
+STATSIG_GROUP_BUCKETS = 1000
+
+_C1 = np.uint32(0xcc9e2d51)
+_C2 = np.uint32(0x1b873593)
+
+def _rotl(x, r):
+    return (x << np.uint32(r)) | (x >> np.uint32(32 - r))
+
+def _fmix(h):
+    h ^= h >> np.uint32(16)
+    h *= np.uint32(0x85ebca6b)
+    h ^= h >> np.uint32(13)
+    h *= np.uint32(0xc2b2ae35)
+    h ^= h >> np.uint32(16)
+    return h
+
+def murmur3_32(keys, seed=0):
+    """murmur3_x86_32 of every byte string in a numpy 'S' array, computed column-wise over 4-byte blocks"""
+    count = len(keys)
+    if not count:
+        return np.zeros(0, np.uint32)
+    lengths = np.char.str_len(keys).astype(np.uint32)
+    width = -(-keys.itemsize // 4) * 4
+    data = np.zeros((count, width), np.uint8)
+    data[:, :keys.itemsize] = np.frombuffer(keys.tobytes(), np.uint8).reshape(count, keys.itemsize)
+    words = data.view('<u4')
+    blocks = lengths // 4
+    h = np.full(count, seed, np.uint32)
+    for i in range(words.shape[1]):
+        k = _rotl(words[:, i] * _C1, 15) * _C2
+        mixed = _rotl(h ^ k, 13) * np.uint32(5) + np.uint32(0xe6546b64)
+        h = np.where(blocks > i, mixed, h)
+    # Tail bytes: padding past each key's end is zero, so reading a whole word and masking is exact
+    tail = words[np.arange(count), np.minimum(blocks, words.shape[1] - 1)]
+    remainder = lengths % 4
+    tail &= ((np.uint64(1) << (remainder.astype(np.uint64) * np.uint64(8))) - np.uint64(1)).astype(np.uint32)
+    h ^= _rotl(tail * _C1, 15) * _C2
+    h ^= lengths
+    return _fmix(h)
+
+def _sha256_prefix(prefix, ids):
+    sha256 = hashlib.sha256
+    return b''.join([sha256(prefix + uid).digest()[:8] for uid in ids])
+
+def statsig_hash(prefix, ids, pool=None):
+    """uint64 Statsig unit hashes of prefix + id for every id in a numpy 'S' array"""
+    ids = ids.tolist()
+    if pool is None or len(ids) <= HASH_CHUNK:
+        digests = _sha256_prefix(prefix, ids)
+    else:
+        chunks = [ids[i:i + HASH_CHUNK] for i in range(0, len(ids), HASH_CHUNK)]
+        digests = b''.join(pool.map(_sha256_prefix, [prefix] * len(chunks), chunks))
+    return np.frombuffer(digests, '>u8').astype(np.uint64)
+
+def _weights(names, weights):
+    """Cumulative shares of each name; names without a weight get none, all missing means equal split"""
+    values = [max(float(weights.get(name) or 0), 0.0) for name in names] if weights else []
+    total = sum(values)
+    if not total:
+        values, total = [1.0] * len(names), float(len(names) or 1)
+    return np.cumsum(values) / total
+
+def amplitude_allocation(entity):
+    """(variant names, allocation %, cumulative variant shares, salt) of an Amplitude flag or experiment"""
+    names = [v.get('key') for v in entity.get('variants', []) if v.get('key')]
+    weights = entity.get('rolloutWeights')
+    rollout = entity.get('rolloutPercentage')
+    salt = entity.get('bucketingSalt') or entity.get('key') or ''
+    return names, 100.0 if rollout is None else float(rollout), \
+        _weights(names, weights if isinstance(weights, dict) else {}), salt
+
+def statsig_allocation(entity):
+    """(group names, allocation %, cumulative group shares, group salt, allocation salt) of a Statsig experiment"""
+    groups = [g for g in entity.get('groups', []) if g.get('name')]
+    names = [g['name'] for g in groups]
+    allocation = entity.get('allocation')
+    salt = entity.get('salt') or entity.get('id') or entity.get('name') or ''
+    # The allocation rule is hashed with its own salt, independent of group assignment
+    allocation_salt = entity.get('allocationSalt') or f"{salt}:allocation"
+    return names, float(allocation) if isinstance(allocation, (int, float)) else 100.0, \
+        _weights(names, {g['name']: g.get('size') for g in groups}), salt, allocation_salt
+
+def assign_amplitude(ids, allocation):
+    """Variant index per user (-1 when not allocated)"""
+    names, percentage, cumulative, salt = allocation
+    hashes = murmur3_32(np.char.add(f"{salt}/".encode(), ids))
+    bounds = np.floor(cumulative * AMPLITUDE_DISTRIBUTION_RANGE).astype(np.uint32)
+    variant = np.searchsorted(bounds, hashes // np.uint32(100), side='right')
+    variant = np.minimum(variant, max(len(names) - 1, 0)).astype(np.int64)
+    allocated = (hashes % np.uint32(100)) < percentage
+    return np.where(allocated & (len(names) > 0), variant, -1)
+
+def assign_statsig(ids, allocation, pool=None):
+    """Group index per user (-1 when not allocated); group hashes are only computed for allocated users"""
+    names, percentage, cumulative, salt, allocation_salt = allocation
+    hashes = statsig_hash(f"{allocation_salt}.".encode(), ids, pool)
+    allocated = (hashes % np.uint64(STATSIG_ALLOCATION_BUCKETS)) < percentage * STATSIG_ALLOCATION_BUCKETS / 100
+    group = np.full(len(ids), -1, np.int64)
+    if names and allocated.any():
+        buckets = statsig_hash(f"{salt}.".encode(), ids[allocated], pool) % np.uint64(STATSIG_GROUP_BUCKETS)
+        bounds = np.round(cumulative * STATSIG_GROUP_BUCKETS)
+        group[allocated] = np.minimum(np.searchsorted(bounds, buckets, side='right'), len(names) - 1)
+    return group
+
+def synthetic_users(count, batch_size=BATCH_SIZE, prefix='user-'):
+    """Batches of synthetic user ids user-0 ... user-<count-1> as numpy 'S' arrays"""
+    for start in range(0, count, batch_size):
+        numbers = np.arange(start, min(start + batch_size, count)).astype('S')
+        yield np.char.add(prefix.encode(), numbers)
+
+def file_users(filepath, batch_size=BATCH_SIZE, limit=None):
+    """Batches of user ids read from a file with one id per line"""
+    with open(filepath, 'rb') as f:
+        lines = (line.strip() for line in f)
+        ids = (line for line in lines if line)
+        if limit:
+            ids = islice(ids, limit)
+        while True:
+            batch = list(islice(ids, batch_size))
+            if not batch:
+                return
+            yield np.array(batch, dtype='S')
+
+def srm_test(observed, expected_shares):
+    """Chi-square goodness of fit of observed counts against expected shares
+
+    The p-value uses the Wilson-Hilferty normal approximation of the
+    chi-square distribution, which is accurate well past the SRM threshold.
+    """
+    total = sum(observed)
+    cells = [(o, total * e) for o, e in zip(observed, expected_shares) if e > 0]
+    chi2 = sum((o - e) ** 2 / e for o, e in cells)
+    unexpected = sum(o for o, e in zip(observed, expected_shares) if e <= 0)
+    dof = len(cells) - 1
+    if unexpected or dof < 1 or not total:
+        return {'chi2': round(chi2, 3), 'p_value': 0.0 if unexpected else 1.0, 'mismatch': bool(unexpected)}
+    z = ((chi2 / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    p_value = 0.5 * math.erfc(z / math.sqrt(2))
+    return {'chi2': round(chi2, 3), 'p_value': p_value, 'mismatch': p_value < SRM_THRESHOLD}
+
+def _distribution(names, percentage, cumulative, counts):
+    """Per-variant users, observed and expected shares, and the SRM test of one platform"""
+    shares = np.diff(np.concatenate([[0.0], cumulative])) * percentage / 100 if names else np.zeros(0)
+    expected = list(shares) + [1 - percentage / 100 if names else 1.0]
+    observed = [int(c) for c in counts]
+    total = sum(observed) or 1
+    variants = {}
+    for name, users, share in zip(list(names) + [UNALLOCATED], observed, expected):
+        variants[name] = {'users': users, 'share': round(users / total, 5), 'expected': round(float(share), 5)}
+    return {'allocation': percentage, 'variants': variants, 'srm': srm_test(observed, expected)}
+
+def simulate_pair(amplitude_entity, statsig_entity, batches, pool=None):
+    """Bucket every batch of users on both platforms and compare the assignments
+
+    Variants are matched to groups by name (case-insensitively); users that
+    neither platform allocates count as agreeing.
+    """
+    amplitude = amplitude_allocation(amplitude_entity)
+    statsig = statsig_allocation(statsig_entity)
+    labels = list(dict.fromkeys([n.lower() for n in amplitude[0]] + [n.lower() for n in statsig[0]] + [UNALLOCATED]))
+    amplitude_labels = np.array([labels.index(n.lower()) for n in amplitude[0]] + [labels.index(UNALLOCATED)])
+    statsig_labels = np.array([labels.index(n.lower()) for n in statsig[0]] + [labels.index(UNALLOCATED)])
+
+    started = time.perf_counter()
+    matrix = np.zeros(len(labels) * len(labels), np.int64)
+    users = 0
+    for ids in batches:
+        amp = amplitude_labels[assign_amplitude(ids, amplitude)]
+        st = statsig_labels[assign_statsig(ids, statsig, pool)]
+        matrix += np.bincount(amp * len(labels) + st, minlength=len(matrix))
+        users += len(ids)
+    elapsed = time.perf_counter() - started
+    matrix = matrix.reshape(len(labels), len(labels))
+
+    amplitude_counts = matrix.sum(axis=1)[amplitude_labels]
+    statsig_counts = matrix.sum(axis=0)[statsig_labels]
+    total = users or 1
+    independent = float(np.dot(matrix.sum(axis=1), matrix.sum(axis=0))) / total / total
+    return {
+        'amplitude_key': amplitude_entity.get('key'),
+        'statsig_name': statsig_entity.get('name') or statsig_entity.get('id'),
+        'users': users,
+        'seconds': round(elapsed, 3),
+        'amplitude': _distribution(*amplitude[:3], amplitude_counts),
+        'statsig': _distribution(*statsig[:3], statsig_counts),
+        'agreement': {
+            'same_variant': round(float(np.trace(matrix)) / total, 5),
+            'expected_if_independent': round(independent, 5),
+            'matrix': {labels[i]: {labels[j]: int(matrix[i, j]) for j in range(len(labels)) if matrix[i, j]}
+                       for i in range(len(labels)) if matrix[i].any()},
+        },
+    }
+
+def experiment_pairs(amplitude_export, statsig_export, targets=None):
+    """(amplitude entity, statsig experiment) pairs from bulk_diff's pairing, optionally only the target keys"""
+    amplitude = load_inventory(amplitude_export, AMPLITUDE_SECTIONS)
+    if targets:
+        amplitude = [(kind, entity) for kind, entity in amplitude if entity.get('key') in targets]
+    statsig = load_inventory(statsig_export, STATSIG_SECTIONS)
+    pairs, _, _ = pair_inventories(amplitude, statsig)
+    return [(amp, st) for _, amp, st_kind, st, _ in pairs if st_kind == 'experiment']
+
+def print_simulation(result):
+    """Print one pair's distributions, SRM verdicts and agreement"""
+    print(f"\n🎲 {result['amplitude_key']} → {result['statsig_name']} ({result['users']:,} users, {result['seconds']:.2f}s)")
+    for platform in ('amplitude', 'statsig'):
+        distribution = result[platform]
+        srm = distribution['srm']
+        shares = ', '.join(f"{name} {v['share']:.1%}/{v['expected']:.1%}" for name, v in distribution['variants'].items())
+        verdict = f"❌ SRM p={srm['p_value']:.2g}" if srm['mismatch'] else "✅ no SRM"
+        print(f"   {platform.title():<9} {verdict}  (observed/expected: {shares})")
+    agreement = result['agreement']
+    print(f"   🔀 Same variant on both platforms: {agreement['same_variant']:.1%} "
+          f"(independent hashing would give {agreement['expected_if_independent']:.1%})")
+
+def simulate(pairs, batches, workers=None):
+    """Simulate every pair; `batches` is a callable returning a fresh iterator of user id batches"""
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = []
+        for amp, st in pairs:
+            with stage(amp.get('key') or 'pair'):
+                results.append(simulate_pair(amp, st, batches(), pool))
+            print_simulation(results[-1])
+        return results
+    finally:
+        if pool:
+            pool.shutdown()
+
+def run_benchmark(users, workers=None, seed=42):
+    """Bucket `users` synthetic users through one synthetic experiment pair"""
+    from synthetic_data import generate_inventories
+
+    amplitude, statsig = generate_inventories(200, seed=seed, drift=0.0)
+    pairs = experiment_pairs(amplitude, statsig)
+    amp, st = next((amp, st) for amp, st in pairs if len(amp.get('variants', [])) > 2)
+    amp, st = dict(amp, rolloutPercentage=50), dict(st, allocation=50)
+    allocation = amplitude_allocation(amp)
+    ids = next(synthetic_users(min(users, BATCH_SIZE)))
+    started = time.perf_counter()
+    assign_amplitude(ids, allocation)
+    elapsed = time.perf_counter() - started
+    print(f"🧮 Amplitude murmur3 bucketing: {len(ids) / elapsed / 1e6:.1f}M users/s")
+    [result] = simulate([(amp, st)], lambda: synthetic_users(users), workers)
+    print(f"⏱️  {users:,} users on both platforms in {result['seconds']:.2f}s "
+          f"({users / result['seconds'] / 1e6:.2f}M users/s)")
+
+def parse_args(argv=None):
+    """Parse command-line options for the simulator"""
+    build_dir = os.path.dirname(OUTPUT_DIR)
+    parser = argparse.ArgumentParser(description="Simulate Amplitude and Statsig bucketing of the exported experiments "
+                                                 "and compare where users land")
+    parser.add_argument('--amplitude', default=os.path.join(build_dir, "amplitude", "amplitude_complete_export.json"),
+                        help="Amplitude combined export")
+    parser.add_argument('--statsig', default=os.path.join(build_dir, "statsig", "statsig_complete_export.json"),
+                        help="Statsig combined export")
+    parser.add_argument('--targets', nargs='+', metavar='KEY',
+                        help="Amplitude keys to simulate (default: every pair whose Statsig side is an experiment)")
+    parser.add_argument('--users', type=int, default=None,
+                        help=f"synthetic users to bucket (default: {DEFAULT_USERS}); caps the ids read from --user-ids")
+    parser.add_argument('--user-ids', metavar='FILE',
+                        help="bucket the user ids in this file (one per line) instead of synthetic ones")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"users hashed per vectorized batch (default: {BATCH_SIZE})")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes for the Statsig sha256 hashing (default: one per CPU)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="directory for bucketing_simulation.json")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="instead of reading exports, time --users users through a synthetic experiment")
+    add_telemetry_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'bucketing_simulator')
+    if args.benchmark:
+        run_benchmark(args.users or DEFAULT_USERS, args.workers)
+        return
+
+    print("🎲 Amplitude ↔ Statsig Bucketing Simulation")
+    print("="*50)
+    for filepath, script in ((args.amplitude, 'amplitude_export.py'), (args.statsig, 'statsig_export.py')):
+        if not os.path.exists(filepath):
+            print(f"❌ Export file not found: {filepath}")
+            print(f"\nFirst run: python3 {script}")
+            return
+
+    with stage('pair'):
+        pairs = experiment_pairs(args.amplitude, args.statsig, args.targets)
+    if not pairs:
+        print("⚠️  No Amplitude entity is paired with a Statsig experiment")
+        return
+    if args.user_ids:
+        batches = lambda: file_users(args.user_ids, args.batch_size, args.users)
+    else:
+        batches = lambda: synthetic_users(args.users or DEFAULT_USERS, args.batch_size)
+    results = simulate(pairs, batches, args.workers)
+
+    mismatched = [r['amplitude_key'] for r in results if r['amplitude']['srm']['mismatch'] or r['statsig']['srm']['mismatch']]
+    print(f"\n✅ Simulated {len(results)} pairs; {len(mismatched)} with a sample-ratio mismatch")
+    save_json({'pairs': results, 'sample_ratio_mismatch': mismatched}, 'bucketing_simulation.json', args.output_dir)
+
+if __name__ == "__main__":
+    with run_report():
+        main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+import argparse
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from export_writer import load_export, save_json
+from fuzzy_match import best_matches, normalize, rank_pairs
+from structural_diff import load_mapping, structural_diff
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
+# (section in the combined export, entity type) per platform
+AMPLITUDE_SECTIONS = (('flags', 'flag'), ('experiments', 'experiment'))
+STATSIG_SECTIONS = (('feature_gates', 'gate'), ('experiments', 'experiment'), ('dynamic_configs', 'dynamic_config'))
+
+# Statsig entity types an Amplitude entity most likely migrated to, best first
+PREFERRED_TYPES = {
+    'flag': ('gate', 'dynamic_config', 'experiment'),
+    'experiment': ('experiment', 'dynamic_config', 'gate'),
+}
+
+# Both platforms' lifecycle states mapped onto one vocabulary
+AMPLITUDE_STATES = {'running': 'running', 'draft': 'draft', 'decision-made': 'decided', 'archived': 'archived'}
+STATSIG_STATES = {'active': 'running', 'setup': 'draft', 'decision_made': 'decided',
+                  'abandoned': 'stopped', 'archived': 'archived'}
+LIVE_STATES = {'enabled', 'running'}
+
+GATE_VARIANTS = {'on', 'off', 'true', 'false'}
+FUZZY_PAIR_THRESHOLD = 0.5
+ROLLOUT_TOLERANCE = 0.5
+# Below this many pairs the process pool costs more than it saves
+PARALLEL_THRESHOLD = 5000
+CHUNK_SIZE = 2000
+
+def load_inventory(export, sections):
+    """(type, entity) tuples of every section of a combined export (path or loaded dict)"""
+    if isinstance(export, str):
+        export = load_export(export)
+    return [(kind, entity) for section, kind in sections for entity in export.get(section) or []]
+
+def amplitude_state(entity, kind):
+    if kind == 'flag':
+        return 'enabled' if entity.get('enabled') else 'disabled'
+    state = entity.get('state', 'unknown')
+    return AMPLITUDE_STATES.get(state, state)
+
+def statsig_state(entity, kind):
+    if kind == 'experiment':
+        status = entity.get('status', 'unknown')
+        return STATSIG_STATES.get(status, status)
+    return 'enabled' if entity.get('isEnabled') else 'disabled'
+
+def amplitude_variants(entity):
+    return sorted(v.get('key') for v in entity.get('variants', []) if v.get('key'))
+
+def statsig_variants(entity, kind):
+    """Group names of an experiment; gates and dynamic configs have no named variants"""
+    if kind == 'experiment':
+        return sorted(g.get('name') for g in entity.get('groups', []) if g.get('name'))
+    return None
+
+def _percentages(weights):
+    total = sum(weights.values())
+    if not total:
+        return {}
+    return {key: round(100.0 * value / total, 2) for key, value in weights.items()}
+
+def amplitude_rollout(entity):
+    """(rollout percentage, {variant: weight %}) of an Amplitude flag or experiment"""
+    weights = entity.get('rolloutWeights') or {}
+    return entity.get('rolloutPercentage'), _percentages(weights) if isinstance(weights, dict) else {}
+
+def statsig_rollout(entity, kind):
+    """(rollout percentage, {group: size %}); gates and configs use their catch-all rule"""
+    if kind == 'experiment':
+        allocation = entity.get('allocation')
+        sizes = {g.get('name'): g.get('size', 0) for g in entity.get('groups', []) if g.get('name')}
+        return (allocation if isinstance(allocation, (int, float)) else None), _percentages(sizes)
+    for rule in reversed(entity.get('rules') or []):
+        conditions = rule.get('conditions') or []
+        if not conditions or any(c.get('type') == 'public' for c in conditions):
+            return rule.get('passPercentage'), {}
+    return None, {}
+
+def diff_pair(pair, mapping=None):
+    """Compare state, variants, rollout and structure of one paired entity; returns a report record"""
+    amp_kind, amp, st_kind, st, score = pair
+    differences = {}
+
+    amp_state, st_state = amplitude_state(amp, amp_kind), statsig_state(st, st_kind)
+    # A flag paired with an experiment (or vice versa) can only agree on whether it is live
+    same_lifecycle = (amp_kind == 'experiment') == (st_kind == 'experiment')
+    if (amp_state != st_state) if same_lifecycle else ((amp_state in LIVE_STATES) != (st_state in LIVE_STATES)):
+        differences['state'] = {'amplitude': amp_state, 'statsig': st_state}
+
+    amp_variants = amplitude_variants(amp)
+    st_variants = statsig_variants(st, st_kind)
+    if st_variants is not None:
+        if amp_variants != st_variants:
+            differences['variants'] = {
+                'only_in_amplitude': sorted(set(amp_variants) - set(st_variants)),
+                'only_in_statsig': sorted(set(st_variants) - set(amp_variants)),
+            }
+    elif st_kind == 'gate' and not set(amp_variants) <= GATE_VARIANTS and len(amp_variants) > 1:
+        differences['variants'] = {'only_in_amplitude': amp_variants, 'only_in_statsig': []}
+
+    amp_rollout, amp_weights = amplitude_rollout(amp)
+    st_rollout, st_weights = statsig_rollout(st, st_kind)
+    if amp_rollout is not None and st_rollout is not None and abs(amp_rollout - st_rollout) > ROLLOUT_TOLERANCE:
+        differences['rollout'] = {'amplitude': amp_rollout, 'statsig': st_rollout}
+    if amp_weights and st_weights and set(amp_weights) == set(st_weights):
+        if any(abs(amp_weights[k] - st_weights[k]) > ROLLOUT_TOLERANCE for k in amp_weights):
+            differences['weights'] = {'amplitude': amp_weights, 'statsig': st_weights}
+
+    structure = structural_diff(amp, st, st_kind, mapping)
+    if structure:
+        differences['structure'] = structure
+
+    return {
+        'amplitude_key': amp.get('key'),
+        'amplitude_type': amp_kind,
+        'statsig_name': st.get('name') or st.get('id'),
+        'statsig_type': st_kind,
+        'match_score': round(score, 3),
+        'status': 'drift' if differences else 'match',
+        'differences': differences,
+    }
+
+def _diff_chunk(pairs, mapping=None):
+    return [diff_pair(pair, mapping) for pair in pairs]
+
+# Pairs inherited by forked workers, so only (start, end) bounds are pickled
+_shared_pairs = None
+
+def _diff_range(bounds, mapping=None):
+    start, end = bounds
+    return _diff_chunk(_shared_pairs[start:end], mapping)
+
+def diff_pairs(pairs, workers=None, mapping=None):
+    """Diff every pair, sharded across a process pool for large inventories"""
+    global _shared_pairs
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pairs) < PARALLEL_THRESHOLD:
+        return _diff_chunk(pairs, mapping)
+    bounds = [(i, min(i + CHUNK_SIZE, len(pairs))) for i in range(0, len(pairs), CHUNK_SIZE)]
+    records = []
+    if 'fork' in multiprocessing.get_all_start_methods():
+        _shared_pairs = pairs
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                for chunk_records in pool.map(functools.partial(_diff_range, mapping=mapping), bounds):
+                    records.extend(chunk_records)
+        finally:
+            _shared_pairs = None
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_records in pool.map(functools.partial(_diff_chunk, mapping=mapping), (pairs[start:end] for start, end in bounds)):
+                records.extend(chunk_records)
+    return records
+
+def pair_inventories(amplitude, statsig, threshold=FUZZY_PAIR_THRESHOLD):
+    """Pair every Amplitude entity with at most one Statsig entity
+
+    Exact (normalized) key/name matches are taken first, preferring the
+    Statsig type the Amplitude type usually migrates to; the leftovers on
+    both sides are paired by n-gram similarity. Returns (pairs,
+    amplitude_only, statsig_only) with pairs as (amplitude_type,
+    amplitude_entity, statsig_type, statsig_entity, score) tuples.
+    """
+    by_name = {}
+    for i, (kind, entity) in enumerate(statsig):
+        for text in {normalize(entity.get('name')), normalize(entity.get('id'))}:
+            if text:
+                by_name.setdefault(text, {}).setdefault(kind, i)
+
+    pairs = []
+    used = set()
+    unpaired = []
+    for amp_kind, amp in amplitude:
+        candidates = by_name.get(normalize(amp.get('key'))) or by_name.get(normalize(amp.get('name'))) or {}
+        match = next((candidates[k] for k in PREFERRED_TYPES.get(amp_kind, ())
+                      if k in candidates and candidates[k] not in used), None)
+        if match is None:
+            unpaired.append((amp_kind, amp))
+            continue
+        used.add(match)
+        st_kind, st = statsig[match]
+        pairs.append((amp_kind, amp, st_kind, st, 1.0))
+
+    left = {i: (amp.get('key'), amp.get('name')) for i, (_, amp) in enumerate(unpaired)}
+    right = {i: (st.get('name'), st.get('id')) for i, (_, st) in enumerate(statsig) if i not in used}
+    matched = set()
+    if left and right:
+        for left_id, right_id, score in best_matches(rank_pairs(left, right, threshold=threshold)):
+            amp_kind, amp = unpaired[left_id]
+            st_kind, st = statsig[right_id]
+            pairs.append((amp_kind, amp, st_kind, st, score))
+            matched.add(left_id)
+            used.add(right_id)
+
+    amplitude_only = [unpaired[i] for i in range(len(unpaired)) if i not in matched]
+    statsig_only = [statsig[i] for i in range(len(statsig)) if i not in used]
+    return pairs, amplitude_only, statsig_only
+
+def build_report(amplitude_export, statsig_export, workers=None, threshold=FUZZY_PAIR_THRESHOLD, mapping=None):
+    """Machine-readable diff report of the full Amplitude and Statsig inventories"""
+    with stage('load'):
+        amplitude = load_inventory(amplitude_export, AMPLITUDE_SECTIONS)
+        statsig = load_inventory(statsig_export, STATSIG_SECTIONS)
+    with stage('pair'):
+        pairs, amplitude_only, statsig_only = pair_inventories(amplitude, statsig, threshold)
+    with stage('diff'):
+        records = diff_pairs(pairs, workers, mapping)
+
+    by_field = {}
+    for record in records:
+        for field in record['differences']:
+            by_field[field] = by_field.get(field, 0) + 1
+    drifted = sum(1 for record in records if record['status'] == 'drift')
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'summary': {
+            'amplitude_entities': len(amplitude),
+            'statsig_entities': len(statsig),
+            'paired': len(records),
+            'fuzzy_paired': sum(1 for record in records if record['match_score'] < 1.0),
+            'matching': len(records) - drifted,
+            'drifted': drifted,
+            'drift_by_field': by_field,
+            'amplitude_only': len(amplitude_only),
+            'statsig_only': len(statsig_only),
+        },
+        'pairs': records,
+        'amplitude_only': [{'key': e.get('key'), 'type': kind} for kind, e in amplitude_only],
+        'statsig_only': [{'name': e.get('name') or e.get('id'), 'type': kind} for kind, e in statsig_only],
+    }
+
+def print_report_summary(report):
+    """Print the headline numbers of a diff report"""
+    summary = report['summary']
+    print(f"\n📋 INVENTORY DIFF SUMMARY")
+    print("="*30)
+    print(f"📊 Amplitude entities: {summary['amplitude_entities']}, Statsig entities: {summary['statsig_entities']}")
+    print(f"🔗 Paired: {summary['paired']} ({summary['fuzzy_paired']} by similarity)")
+    print(f"✅ Matching: {summary['matching']}")
+    print(f"❌ Drifted: {summary['drifted']}")
+    for field, count in sorted(summary['drift_by_field'].items()):
+        print(f"   - {field}: {count}")
+    print(f"⚠️  Amplitude only: {summary['amplitude_only']}")
+    print(f"⚠️  Statsig only: {summary['statsig_only']}")
+
+def run_benchmark(total, workers=None, seed=42):
+    """Pair and diff synthetic inventories of `total` Amplitude entities, serially and sharded"""
+    from synthetic_data import generate_inventories
+
+    started = time.perf_counter()
+    amplitude_export, statsig_export = generate_inventories(total, seed=seed)
+    print(f"🧪 Generated {total} Amplitude entities in {time.perf_counter() - started:.2f}s")
+
+    amplitude = load_inventory(amplitude_export, AMPLITUDE_SECTIONS)
+    statsig = load_inventory(statsig_export, STATSIG_SECTIONS)
+    started = time.perf_counter()
+    pairs, amplitude_only, statsig_only = pair_inventories(amplitude, statsig)
+    pairing = time.perf_counter() - started
+    print(f"🔗 Paired {len(pairs)} entities in {pairing:.2f}s "
+          f"({len(amplitude_only)} Amplitude only, {len(statsig_only)} Statsig only)")
+
+    results = {}
+    for label, worker_count in (('serial', 1), ('sharded', workers)):
+        started = time.perf_counter()
+        records = diff_pairs(pairs, worker_count)
+        elapsed = time.perf_counter() - started
+        results[label] = elapsed
+        drifted = sum(1 for record in records if record['status'] == 'drift')
+        print(f"   ⏱️  {label}: {elapsed:.2f}s ({len(pairs) / elapsed:,.0f} pairs/s, {drifted} drifted)")
+    return pairing, results
+
+def parse_args(argv=None):
+    """Parse command-line options for the diff engine"""
+    build_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build")
+    parser = argparse.ArgumentParser(description="Diff the full Amplitude and Statsig inventories")
+    parser.add_argument('--amplitude', default=os.path.join(build_dir, "amplitude", "amplitude_complete_export.json"),
+                        help="Amplitude combined export")
+    parser.add_argument('--statsig', default=os.path.join(build_dir, "statsig", "statsig_complete_export.json"),
+                        help="Statsig combined export")
+    parser.add_argument('--output-dir', default=os.path.join(build_dir, "statsig"),
+                        help="directory for inventory_diff.json")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="diff processes for large inventories (default: one per CPU)")
+    parser.add_argument('--threshold', type=float, default=FUZZY_PAIR_THRESHOLD,
+                        help=f"minimum name similarity for pairing renamed entities (default: {FUZZY_PAIR_THRESHOLD})")
+    parser.add_argument('--mapping', metavar='FILE',
+                        help="JSON file overriding the Amplitude → Statsig field mapping of structural_diff")
+    parser.add_argument('--format', choices=('pretty', 'compact'), default='pretty',
+                        help="report format (default: pretty)")
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help="instead of diffing exports, benchmark on N synthetic Amplitude entities")
+    add_telemetry_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'bulk_diff')
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.workers)
+        return
+
+    print("🔄 Amplitude ↔ Statsig Inventory Diff")
+    print("="*50)
+    for filepath, script in ((args.amplitude, 'amplitude_export.py'), (args.statsig, 'statsig_export.py')):
+        if not os.path.exists(filepath):
+            print(f"❌ Export file not found: {filepath}")
+            print(f"\nFirst run: python3 {script}")
+            return
+
+    report = build_report(args.amplitude, args.statsig, args.workers, args.threshold, load_mapping(args.mapping))
+    print_report_summary(report)
+    save_json(report, 'inventory_diff.json', args.output_dir, fmt=args.format)
+
+if __name__ == "__main__":
+    with run_report():
+        main()
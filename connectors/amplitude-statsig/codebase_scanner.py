@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import stat
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from export_reader import open_export
+from export_writer import save_json
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build")
+DEFAULT_CACHE = os.path.join(OUTPUT_DIR, "codebase_scan_cache.json")
+CACHE_VERSION = 1
+
+# Directories that hold dependencies, build output or VCS metadata rather than app code
+SKIP_DIRS = {'.git', '.hg', '.svn', '.gradle', '.idea', '.venv', 'venv', '__pycache__', 'node_modules',
+             'Pods', 'Carthage', 'DerivedData', 'build', 'dist', 'target', '.build', '.next'}
+# Larger files are generated bundles or data dumps
+MAX_FILE_BYTES = 32 << 20
+# A NUL byte in the first block marks a binary file
+BINARY_SNIFF_BYTES = 8192
+# Below this many files the process pool costs more than it saves
+PARALLEL_THRESHOLD = 200
+CHUNK_FILES = 128
+# Characters that continue a key, so "gender-filter" does not match inside "gender-filter-a-b"
+_WORD = rb'A-Za-z0-9_\-'
+# Reference lines are cut to this many characters in reports
+LINE_TEXT = 160
+
+class KeywordMatcher:
+    """Finds every occurrence of a set of keys in one pass over a buffer
+
+    The keys are loaded into a trie, the goto structure of an Aho-Corasick
+    automaton, and the trie is compiled into a single regular expression:
+    at each position the engine follows one branch per byte instead of
+    trying every key, and the scanning loop runs in C rather than byte by
+    byte in Python. A match must not be preceded or followed by a key
+    character, and the longest key wins where one key extends another.
+    """
+
+    def __init__(self, keys):
+        self.keys = sorted({key for key in keys if key})
+        self.digest = hashlib.sha1('\n'.join(self.keys).encode('utf-8')).hexdigest()
+        self.pattern = b'(?<![' + _WORD + b'])(' + self._trie_pattern() + b')(?![' + _WORD + b'])'
+        self.regex = re.compile(self.pattern) if self.keys else None
+
+    def _trie_pattern(self):
+        trie = {}
+        for key in self.keys:
+            node = trie
+            for byte in key.encode('utf-8'):
+                node = node.setdefault(byte, {})
+            node[None] = True
+        return _emit(trie) if trie else b''
+
+    def finditer(self, buffer):
+        """(start, end, key) of every match, in order"""
+        if self.regex is None:
+            return
+        for match in self.regex.finditer(buffer):
+            yield match.start(), match.end(), match.group(1).decode('utf-8')
+
+def _emit(node):
+    """Regex for the keys below a trie node; optional groups keep longer keys first"""
+    branches = [re.escape(bytes([byte])) + _emit(child) for byte, child in sorted(
+        (item for item in node.items() if item[0] is not None))]
+    if not branches:
+        return b''
+    terminal = None in node
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    return b'(?:' + b'|'.join(branches) + b')' + (b'?' if terminal else b'')
+
+def find_references(buffer, matcher):
+    """[key, line, text] of every match in a buffer, or [] for binary content"""
+    if b'\0' in buffer[:BINARY_SNIFF_BYTES]:
+        return []
+    spans = list(matcher.finditer(buffer))
+    if not spans:
+        return []
+    # mmap has no count(); only files with references are copied to number their lines
+    data = buffer[:]
+    references = []
+    line, position = 1, 0
+    for start, end, key in spans:
+        line += data.count(b'\n', position, start)
+        position = start
+        line_start = data.rfind(b'\n', 0, start) + 1
+        line_end = data.find(b'\n', end)
+        text = data[line_start:line_end if line_end >= 0 else len(data)].strip()
+        references.append([key, line, text[:LINE_TEXT].decode('utf-8', 'replace')])
+    return references
+
+# Each worker process compiles the matcher once, from the pattern sent to its initializer
+_worker_matcher = None
+
+def _init_worker(matcher):
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _scan_files(files, matcher=None):
+    """(path, digest, references) for each (path, cached digest); references is None when the digest is unchanged"""
+    matcher = matcher or _worker_matcher
+    results = []
+    for path, cached_digest in files:
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    results.append((path, None, []))
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    digest = hashlib.blake2b(buffer, digest_size=16).hexdigest()
+                    if digest == cached_digest:
+                        results.append((path, digest, None))
+                    else:
+                        results.append((path, digest, find_references(buffer, matcher)))
+        except (OSError, ValueError):
+            # Unreadable or vanished mid-scan; it is retried on the next scan
+            results.append((path, None, None))
+    return results
+
+def iter_files(roots, extensions=None):
+    """(path, mtime_ns, size) of every regular file under the roots, skipping SKIP_DIRS and symlinks"""
+    suffixes = tuple(f".{e.lstrip('.')}" for e in extensions) if extensions else None
+    stack = list(roots)
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_symlink():
+                continue
+            if entry.is_dir():
+                if entry.name not in SKIP_DIRS:
+                    stack.append(entry.path)
+            elif not suffixes or entry.name.endswith(suffixes):
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                if stat.S_ISREG(info.st_mode) and info.st_size <= MAX_FILE_BYTES:
+                    yield entry.path, info.st_mtime_ns, info.st_size
+
+class ScanCache:
+    """References per file from the last scan, keyed by absolute path and checked by mtime, size and hash
+
+    A file whose mtime and size are unchanged is not opened. One whose
+    mtime changed is hashed, and its cached references are kept when the
+    content is the same (after a checkout or a touch). The cache is only
+    valid for one set of keys: a different export discards it.
+    """
+
+    def __init__(self, path, digest):
+        self.path = path
+        self.digest = digest
+        self.files = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = {}
+            if cached.get('version') == CACHE_VERSION and cached.get('keys_digest') == digest:
+                self.files = cached.get('files', {})
+
+    def get(self, path):
+        return self.files.get(os.path.abspath(path))
+
+    def put(self, path, mtime_ns, size, digest, references):
+        self.files[os.path.abspath(path)] = [mtime_ns, size, digest, references]
+
+    def save(self, seen):
+        """Write the entries of the files seen in this scan; deleted files are dropped"""
+        if not self.path:
+            return
+        files = {path: entry for path, entry in self.files.items() if path in seen}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'keys_digest': self.digest, 'files': files}, f,
+                      separators=(',', ':'))
+        os.replace(temporary, self.path)
+
+def scan_repositories(roots, keys, workers=None, cache_path=DEFAULT_CACHE, extensions=None):
+    """Find every reference to the keys in the files under the roots
+
+    Returns {'references': {key: [{'file', 'line', 'text'}]}, 'files',
+    'scanned', 'cached', 'bytes', 'seconds'}. Files whose mtime and size
+    match the cache are not read; the rest are memory-mapped and matched
+    in worker processes, CHUNK_FILES at a time.
+    """
+    started = time.perf_counter()
+    matcher = KeywordMatcher(keys)
+    cache = ScanCache(cache_path, matcher.digest)
+    stats = {}
+    pending, seen = [], set()
+    total_bytes = 0
+    for path, mtime_ns, size in iter_files(roots, extensions):
+        absolute = os.path.abspath(path)
+        if absolute in seen:
+            continue
+        seen.add(absolute)
+        entry = cache.get(path)
+        if entry and entry[0] == mtime_ns and entry[1] == size:
+            continue
+        stats[path] = (mtime_ns, size)
+        total_bytes += size
+        pending.append((path, entry[2] if entry and entry[1] == size else None))
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [pending[i:i + CHUNK_FILES] for i in range(0, len(pending), CHUNK_FILES)]
+    if workers == 1 or len(pending) < PARALLEL_THRESHOLD:
+        results = [_scan_files(chunk, matcher) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(matcher,)) as pool:
+            results = list(pool.map(_scan_files, chunks))
+
+    rehashed = 0
+    for path, digest, references in (result for chunk in results for result in chunk):
+        mtime_ns, size = stats[path]
+        if references is None:
+            entry = cache.get(path)
+            if digest is None or entry is None:
+                continue
+            # Same content under a new mtime: keep the cached references
+            references = entry[3]
+            rehashed += 1
+        cache.put(path, mtime_ns, size, digest, references)
+    cache.save(seen)
+
+    found = {}
+    for path, entry in cache.files.items():
+        if path in seen:
+            for key, line, text in entry[3]:
+                found.setdefault(key, []).append({'file': path, 'line': line, 'text': text})
+    for references in found.values():
+        references.sort(key=lambda r: (r['file'], r['line']))
+    return {
+        'references': found,
+        'files': len(seen),
+        'scanned': len(pending) - rehashed,
+        'cached': len(seen) - len(pending) + rehashed,
+        'bytes': total_bytes,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+def exported_keys(amplitude_export, statsig_export=None):
+    """{key: {platform: live}} for every flag, experiment, gate and dynamic config in the exports
+
+    Live means an enabled flag, gate or config, or a running (Amplitude) or
+    active (Statsig) experiment. Either export may be a path or a loaded
+    export.
+    """
+    keys = {}
+    sections = (
+        ('amplitude', amplitude_export, 'key', {'flags': lambda e: bool(e.get('enabled')),
+                                                'experiments': lambda e: e.get('state') == 'running'}),
+        ('statsig', statsig_export, 'id', {'feature_gates': lambda e: bool(e.get('isEnabled')),
+                                           'dynamic_configs': lambda e: bool(e.get('isEnabled')),
+                                           'experiments': lambda e: e.get('status') == 'active'}),
+    )
+    for platform, export, field, live in sections:
+        if not export:
+            continue
+        if isinstance(export, str):
+            export = open_export(export)
+        for section, is_live in live.items():
+            for entity in export.get(section) or []:
+                key = entity.get(field) or entity.get('name')
+                if key:
+                    platforms = keys.setdefault(key, {})
+                    platforms[platform] = platforms.get(platform, False) or is_live(entity)
+    return keys
+
+def build_report(inventory, scan):
+    """Cross the exported keys with the references found in the code
+
+    live_unreferenced: live on a platform but never mentioned in the code.
+    referenced_missing: mentioned in the code but absent from one of the
+    exports (only when both were loaded). referenced_not_live: mentioned in
+    the code but disabled or finished everywhere it exists.
+    """
+    references = scan['references']
+    platforms = {platform for entry in inventory.values() for platform in entry}
+    live_unreferenced = sorted(key for key, entry in inventory.items() if any(entry.values()) and key not in references)
+    referenced_missing = []
+    if len(platforms) > 1:
+        for key in sorted(references):
+            missing = sorted(platforms - set(inventory.get(key, {})))
+            if missing:
+                referenced_missing.append({'key': key, 'missing_from': missing, 'references': references[key]})
+    referenced_not_live = sorted(key for key in references if inventory.get(key) and not any(inventory[key].values()))
+    return {
+        'summary': {
+            'keys': len(inventory),
+            'referenced': len(references),
+            'live_unreferenced': len(live_unreferenced),
+            'referenced_missing': len(referenced_missing),
+            'referenced_not_live': len(referenced_not_live),
+            'files': scan['files'],
+            'scanned': scan['scanned'],
+            'cached': scan['cached'],
+            'seconds': scan['seconds'],
+        },
+        'live_unreferenced': live_unreferenced,
+        'referenced_missing': referenced_missing,
+        'referenced_not_live': referenced_not_live,
+        'references': references,
+    }
+
+def print_report_summary(report, limit=20):
+    """Print the scan counts and the first `limit` keys of each finding"""
+    summary = report['summary']
+    print(f"📂 Scanned {summary['files']} files in {summary['seconds']:.2f}s "
+          f"({summary['scanned']} read, {summary['cached']} from cache)")
+    print(f"📋 {summary['referenced']} of {summary['keys']} exported keys are referenced in the code")
+
+    def _listing(title, keys, describe):
+        print(f"\n{title}: {len(keys)}")
+        for key in keys[:limit]:
+            print(f"   {describe(key)}")
+        if len(keys) > limit:
+            print(f"   ... and {len(keys) - limit} more")
+
+    def _first_reference(key):
+        reference = report['references'][key][0]
+        count = len(report['references'][key])
+        more = f" (+{count - 1} more)" if count > 1 else ""
+        return f"{reference['file']}:{reference['line']}{more}"
+
+    _listing("➕ Live but never referenced", report['live_unreferenced'], lambda key: f"📝 {key}")
+    _listing("❌ Referenced but missing from a platform", report['referenced_missing'],
+             lambda item: f"⚠️  {item['key']} (missing from {', '.join(item['missing_from'])}) "
+                          f"at {_first_reference(item['key'])}")
+    _listing("⚫ Referenced but no longer live", report['referenced_not_live'],
+             lambda key: f"🗑️  {key} at {_first_reference(key)}")
+
+def add_scanner_arguments(parser):
+    """Register the --repo options shared by the scanner and compare_configs"""
+    parser.add_argument('--repo', nargs='+', metavar='PATH', default=[],
+                        help="local repositories to scan for flag and experiment references")
+    parser.add_argument('--extensions', nargs='+', metavar='EXT',
+                        help="only scan files with these extensions, such as kt swift ts (default: all text files)")
+    parser.add_argument('--scan-workers', type=int, default=None,
+                        help="scanning processes (default: one per CPU)")
+    parser.add_argument('--scan-cache', default=DEFAULT_CACHE,
+                        help="mtime/hash cache of earlier scans (default: build/codebase_scan_cache.json)")
+    parser.add_argument('--no-scan-cache', action='store_true', help="read every file and leave the cache alone")
+
+def scan_from_args(args, inventory):
+    """Scan the --repo paths for the inventory's keys and build the report"""
+    cache_path = None if args.no_scan_cache else args.scan_cache
+    scan = scan_repositories(args.repo, inventory, args.scan_workers, cache_path, args.extensions)
+    return build_report(inventory, scan)
+
+def run_benchmark(files, total=2000, workers=None, seed=42):
+    """Scan a synthetic repository of `files` source files for the keys of `total` synthetic entities"""
+    import random
+    import tempfile
+
+    from synthetic_data import generate_inventories
+
+    amplitude, statsig = generate_inventories(total, seed=seed)
+    inventory = exported_keys(amplitude, statsig)
+    keys = sorted(inventory)
+    rng = random.Random(seed)
+    filler = [f"    val value{i} = compute(input, {i}) // unrelated code line\n" for i in range(50)]
+    with tempfile.TemporaryDirectory() as workdir:
+        repository = os.path.join(workdir, 'repo')
+        for i in range(files):
+            lines = [rng.choice(filler) for _ in range(rng.randint(100, 400))]
+            for _ in range(rng.randint(0, 3)):
+                lines.insert(rng.randrange(len(lines)), f'    if (flags.isOn("{rng.choice(keys)}")) {{ show() }}\n')
+            directory = os.path.join(repository, f"module{i % 50}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"File{i}.kt"), 'w') as f:
+                f.writelines(lines)
+        cache_path = os.path.join(workdir, 'scan_cache.json')
+        started = time.perf_counter()
+        matcher = KeywordMatcher(keys)
+        print(f"🔎 Compiled {len(keys)} keys into one matcher in {(time.perf_counter() - started) * 1000:.1f}ms")
+        for label in ('cold', 'warm'):
+            scan = scan_repositories([repository], keys, workers, cache_path)
+            rate = scan['bytes'] / (1 << 20) / scan['seconds'] if scan['scanned'] else 0
+            print(f"   ⏱️  {label}: {scan['files']} files in {scan['seconds']:.2f}s, {scan['scanned']} read "
+                  f"({rate:.1f} MB/s), {scan['cached']} cached, {len(scan['references'])} keys referenced")
+        for _, _, _, references in ScanCache(cache_path, matcher.digest).files.values():
+            assert all(key in inventory for key, _, _ in references)
+
+def parse_args(argv=None):
+    """Parse command-line options for the scanner"""
+    parser = argparse.ArgumentParser(description="Find references to exported flags and experiments in local "
+                                                 "repositories")
+    parser.add_argument('--amplitude', default=os.path.join(OUTPUT_DIR, "amplitude", "amplitude_complete_export.json"),
+                        help="Amplitude combined export")
+    parser.add_argument('--statsig', default=os.path.join(OUTPUT_DIR, "statsig", "statsig_complete_export.json"),
+                        help="Statsig combined export (optional)")
+    add_scanner_arguments(parser)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="directory for codebase_references.json")
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help="instead of reading exports, scan a synthetic repository of N files twice")
+    add_telemetry_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'codebase_scanner')
+    if args.benchmark:
+        run_benchmark(args.benchmark, workers=args.scan_workers)
+        return
+
+    print("🔎 Flag and Experiment References in the Codebase")
+    print("="*50)
+    if not args.repo:
+        print("❌ No repository to scan: pass --repo PATH [PATH ...]")
+        return
+    if not os.path.exists(args.amplitude):
+        print(f"❌ Export file not found: {args.amplitude}")
+        print("\nFirst run: python3 amplitude_export.py")
+        return
+
+    with stage('load'):
+        inventory = exported_keys(args.amplitude, args.statsig if os.path.exists(args.statsig) else None)
+    with stage('scan'):
+        report = scan_from_args(args, inventory)
+    print_report_summary(report)
+    save_json(report, 'codebase_references.json', args.output_dir)
+
+if __name__ == "__main__":
+    with run_report():
+        main()
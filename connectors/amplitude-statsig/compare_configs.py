@@ -1,23 +1,40 @@
 #!/usr/bin/env python3
 
-import json
+import argparse
 import os
+import sys
+import time
 from typing import Dict, List, Set
 
+import codebase_scanner
+from bulk_diff import build_report, print_report_summary
+from config_table import ConfigTable
+from export_reader import open_export
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
 class ConfigComparator:
     def __init__(self, amplitude_file: str, statsig_file: str = None):
         self.amplitude_data = self.load_json(amplitude_file)
         self.statsig_data = self.load_json(statsig_file) if statsig_file else None
+        self._table = None
+        
+    @property
+    def table(self) -> ConfigTable:
+        """Columnar view of the Amplitude export, built on first use"""
+        if self._table is None:
+            self._table = ConfigTable.from_export(self.amplitude_data)
+        return self._table
         
     def load_json(self, filename: str) -> Dict:
-        """Load JSON data from file"""
+        """Load an export, streaming its entity arrays instead of decoding the whole file"""
         if not os.path.exists(filename):
             print(f"⚠️  File not found: {filename}")
             return {}
         
         try:
-            with open(filename, 'r') as f:
-                return json.load(f)
+            # Entity arrays stay in the memory-mapped file and are decoded on demand
+            export = open_export(filename)
+            return export if isinstance(export, dict) else {'experiments': export}
         except Exception as e:
             print(f"❌ Error loading {filename}: {e}")
             return {}
@@ -33,23 +50,17 @@ class ConfigComparator:
         # Analyze flags
         print(f"\n📊 Feature Flags Analysis ({len(flags)} total):")
         if flags:
-            enabled_flags = [f for f in flags if f.get('enabled', False)]
-            print(f"   ✅ Enabled: {len(enabled_flags)}")
-            print(f"   ❌ Disabled: {len(flags) - len(enabled_flags)}")
+            enabled_flags = self.table.count('type=flag and enabled')
+            print(f"   ✅ Enabled: {enabled_flags}")
+            print(f"   ❌ Disabled: {len(flags) - enabled_flags}")
             
             # Group by evaluation mode
-            eval_modes = {}
-            for flag in flags:
-                mode = flag.get('evaluationMode', 'unknown')
-                eval_modes[mode] = eval_modes.get(mode, 0) + 1
-            
             print(f"\n   📋 Evaluation Modes:")
-            for mode, count in eval_modes.items():
-                print(f"      - {mode}: {count}")
+            for mode, count in self.table.group_by('evaluationMode', 'type=flag'):
+                print(f"      - {mode or 'unknown'}: {count}")
             
             # Check for variants
-            flags_with_variants = [f for f in flags if f.get('variants', [])]
-            print(f"\n   🎛️  Flags with variants: {len(flags_with_variants)}")
+            print(f"\n   🎛️  Flags with variants: {self.table.count('type=flag and variants>0')}")
             
             # Print flag details
             print(f"\n   🏷️  Flag Details:")
@@ -70,25 +81,15 @@ class ConfigComparator:
         print(f"\n🧪 Experiments Analysis ({len(experiments)} total):")
         if experiments:
             # Group by state
-            states = {}
-            for exp in experiments:
-                state = exp.get('state', 'unknown')
-                states[state] = states.get(state, 0) + 1
-            
             print(f"   📊 States:")
-            for state, count in states.items():
+            for state, count in self.table.group_by('state', 'type=experiment'):
                 emoji = "🟢" if state == 'running' else "🟡" if state == 'draft' else "⚫"
-                print(f"      {emoji} {state}: {count}")
+                print(f"      {emoji} {state or 'unknown'}: {count}")
             
             # Group by evaluation mode
-            eval_modes = {}
-            for exp in experiments:
-                mode = exp.get('evaluationMode', 'unknown')
-                eval_modes[mode] = eval_modes.get(mode, 0) + 1
-            
             print(f"\n   📋 Evaluation Modes:")
-            for mode, count in eval_modes.items():
-                print(f"      - {mode}: {count}")
+            for mode, count in self.table.group_by('evaluationMode', 'type=experiment'):
+                print(f"      - {mode or 'unknown'}: {count}")
             
             # Print experiment details
             print(f"\n   🧪 Experiment Details:")
@@ -122,78 +123,69 @@ class ConfigComparator:
             'all': flag_keys.union(experiment_keys)
         }
 
-    def compare_with_codebase_config(self):
-        """Compare with the configurations found in the codebase"""
+    def compare_with_codebase_config(self, repos: List[str], workers: int = None,
+                                     cache_path: str = codebase_scanner.DEFAULT_CACHE,
+                                     extensions: List[str] = None) -> Dict:
+        """Compare the exported keys with the references found by scanning the repository paths"""
         print("\n🔗 COMPARISON WITH CODEBASE CONFIGURATION")
         print("="*50)
         
-        # Known experiment keys from the codebase remote-allowlist
-        codebase_experiments = {
-            "enable-mutual-taps-no-paywall",
-            "disable-remote-profile-distance", 
-            "test-backend-experiment-20230106",
-            "gender-filter-a-b-20230712",
-            "gender-filter",
-            "project-everest-ios-20230207",
-            "project-everest-android-20230207",
-            "xtra-day-pass-ios-20230207",
-            "xtra-day-pass-android-20230207",
-            "server-driven-cascade",
-            "approximate-distance",
-            "unified-cascade-filters-20221019",
-            "taps-paywall-ios-20230308",
-            "taps-paywall-android-20230308",
-            "boost-price-retest-us-ios-202302",
-            "boost-price-retest-us-android-202302",
-            "boost-price-retest-gb-ios-202302",
-            "boost-price-test-gb-android-202302",
-            "boost-price-retest-br-ios-202302",
-            "boost-price-retest-br-android-202302",
-            "boost-price-test-fr-ios-202302",
-            "boost-price-test-fr-android-202302",
-            "boost-price-test-au-ios-202302",
-            "boost-price-test-au-android-202302",
-            "boost-price-test-ca-ios-202302",
-            "boost-price-test-ca-android-202302",
-            "boost-price-test-es-ios-202302",
-            "boost-price-test-es-android-202302",
-            "boost-price-test-de-ios-202302",
-            "boost-price-test-de-android-202302",
-            "boost-price-test-mx-ios-202302",
-            "boost-price-test-mx-android-202302",
-            "boost-price-test-cl-ios-202302",
-            "boost-price-test-cl-android-202302",
-            "boost-price-test-row-ios-202302",
-            "boost-price-test-row-android-202302",
-            "inaccessible-profile-preview-ios",
-            "inaccessible-profile-preview-android"
-        }
+        if not repos:
+            print("⚠️  No repository to scan: pass --repo PATH to find flag and experiment references")
+            return {}
         
-        amplitude_keys = self.extract_amplitude_keys()
+        inventory = codebase_scanner.exported_keys(self.amplitude_data, self.statsig_data)
+        print(f"📋 Scanning {', '.join(repos)} for {len(inventory)} exported keys...")
+        scan = codebase_scanner.scan_repositories(repos, inventory, workers, cache_path, extensions)
+        report = codebase_scanner.build_report(inventory, scan)
+        codebase_scanner.print_report_summary(report)
+        return report
+
+    def compare_with_statsig(self) -> Dict:
+        """Diff every Amplitude flag and experiment against the Statsig inventory"""
+        print("\n🔗 COMPARISON WITH STATSIG INVENTORY")
+        print("="*50)
         
-        print(f"📋 Codebase remote-allowlist: {len(codebase_experiments)} experiments")
-        print(f"📋 Amplitude export: {len(amplitude_keys['all'])} total configurations")
+        if not self.statsig_data:
+            print("⚠️  No Statsig export loaded")
+            return {}
         
-        # Find matches and mismatches
-        amplitude_all = amplitude_keys['all']
-        found_in_amplitude = codebase_experiments.intersection(amplitude_all)
-        missing_from_amplitude = codebase_experiments - amplitude_all
-        extra_in_amplitude = amplitude_all - codebase_experiments
+        report = build_report(self.amplitude_data, self.statsig_data)
+        print_report_summary(report)
         
-        print(f"\n✅ Found in both: {len(found_in_amplitude)}")
-        if found_in_amplitude:
-            for key in sorted(found_in_amplitude):
-                print(f"   ✓ {key}")
+        drifted = [r for r in report['pairs'] if r['status'] == 'drift']
+        for record in drifted[:10]:
+            print(f"   ❌ {record['amplitude_key']} → {record['statsig_name']}: {', '.join(record['differences'])}")
+        if len(drifted) > 10:
+            print(f"      ... and {len(drifted)-10} more drifted pairs")
+        return report
+
+    def query(self, expression=None, group_by=None, columns=None, limit=20):
+        """Print the rows matching a filter expression, or their counts per value of a column"""
+        started = time.perf_counter()
+        table = self.table
+        print(f"🧮 Loaded {table.size} rows in {time.perf_counter() - started:.2f}s")
         
-        print(f"\n❌ In codebase but missing from Amplitude: {len(missing_from_amplitude)}")
-        if missing_from_amplitude:
-            for key in sorted(missing_from_amplitude):
-                print(f"   ⚠️  {key}")
+        started = time.perf_counter()
+        if group_by:
+            result = self.table.group_by(group_by, expression, most_common=True)
+        else:
+            result = self.table.rows(expression, columns, limit)
+            total = self.table.count(expression)
+        elapsed = (time.perf_counter() - started) * 1000
         
-        print(f"\n➕ In Amplitude but not in codebase allowlist: {len(extra_in_amplitude)}")
-        if extra_in_amplitude:
-            for key in sorted(extra_in_amplitude):
-                print(f"   📝 {key}")
+        print(f"🔎 {expression or 'all rows'}" + (f" grouped by {group_by}" if group_by else ""))
+        if group_by:
+            for value, count in result:
+                print(f"   {value}: {count}")
+        else:
+            for row in result:
+                print("   " + "  ".join(f"{name}={value}" for name, value in row.items()))
+            if total > len(result):
+                print(f"   ... and {total - len(result)} more rows")
+            print(f"📋 {total} matching rows")
+        print(f"⏱️  Query took {elapsed:.1f}ms")
+        return result
 
     def generate_migration_checklist(self):
         """Generate a migration checklist for Statsig"""
@@ -225,9 +217,24 @@ class ConfigComparator:
         print("- [ ] Test payload structures match expected format")
         print("- [ ] Update application configuration allowlists")
         print("- [ ] Remove deprecated/unused experiments")
+        print("\n💡 statsig_import.py creates these in Statsig; preview with: python3 statsig_import.py --dry-run")
 
-def main():
-    import sys
+def parse_args(argv=None):
+    """Parse command-line options for the comparator"""
+    parser = argparse.ArgumentParser(description="Analyze the Amplitude export and query it")
+    parser.add_argument('--query', metavar='EXPR',
+                        help="filter such as \"type=flag and enabled and variants>1\" (clauses: col, not col, "
+                             "col=v, col!=v, col>n, col>=n, col<n, col<=n, col in a,b)")
+    parser.add_argument('--group-by', metavar='COLUMN', help="count the matching rows per value of a column, most common first")
+    parser.add_argument('--columns', help="comma-separated columns to print for matching rows")
+    parser.add_argument('--limit', type=int, default=20, help="rows to print (default: 20)")
+    codebase_scanner.add_scanner_arguments(parser)
+    add_telemetry_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'compare_configs')
     
     print("🔄 Amplitude to Statsig Configuration Comparator")
     print("="*50)
@@ -236,6 +243,7 @@ def main():
     project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     amplitude_dir = os.path.join(project_root, "build", "amplitude")
     amplitude_file = os.path.join(amplitude_dir, "amplitude_complete_export.json")
+    statsig_file = os.path.join(project_root, "build", "statsig", "statsig_complete_export.json")
     
     # Check if amplitude export file exists
     if not os.path.exists(amplitude_file):
@@ -243,12 +251,31 @@ def main():
         print("\nFirst run: python3 amplitude_export.py")
         return
     
+    if args.query is not None or args.group_by:
+        with stage('load'):
+            comparator = ConfigComparator(amplitude_file)
+        try:
+            with stage('query'):
+                comparator.query(args.query, args.group_by, args.columns.split(',') if args.columns else None,
+                                 args.limit)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        return
+    
     # Initialize comparator
-    comparator = ConfigComparator(amplitude_file)
+    with stage('load'):
+        comparator = ConfigComparator(amplitude_file, statsig_file if os.path.exists(statsig_file) else None)
     
     # Run analysis
-    comparator.analyze_amplitude_config()
-    comparator.compare_with_codebase_config()
+    with stage('analyze'):
+        comparator.analyze_amplitude_config()
+    with stage('codebase'):
+        comparator.compare_with_codebase_config(args.repo, args.scan_workers,
+                                                None if args.no_scan_cache else args.scan_cache, args.extensions)
+    if comparator.statsig_data:
+        with stage('statsig'):
+            comparator.compare_with_statsig()
     comparator.generate_migration_checklist()
     
     print(f"\n✅ Analysis completed!")
@@ -258,4 +285,5 @@ def main():
     print(f"   3. Use the checklist to ensure complete migration coverage")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_report():
+        main()
\ No newline at end of file
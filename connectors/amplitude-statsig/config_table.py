@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+import argparse
+import array
+import re
+import sys
+import time
+from collections import Counter
+from itertools import compress
+
+from bulk_diff import AMPLITUDE_SECTIONS
+
+_NOT = bytes([1, 0] + [0] * 254)
+
+def mask_and(left, right):
+    """Element-wise AND of two 0/1 masks, done as one big-integer operation"""
+    return bytearray((int.from_bytes(left, 'little') & int.from_bytes(right, 'little')).to_bytes(len(left), 'little'))
+
+def mask_not(mask):
+    """Element-wise NOT of a 0/1 mask"""
+    return mask.translate(_NOT)
+
+def _parse_bool(text):
+    return text.lower() in ('1', 'true', 'yes', 'on')
+
+def _parse_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Expected a number, got {text!r}")
+
+class Column:
+    """Dictionary-encoded column: the distinct values plus one array code per row
+
+    Strings are interned and numbers and booleans are encoded the same way,
+    since config attributes have few distinct values. Codes stay single
+    bytes while a column has at most 256 distinct values, so a filter is one
+    bytearray.translate over the codes with a per-value 0/1 lookup table.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.codes = array.array('B')
+        self.values = []
+        self._codes = {}
+
+    def _normalize(self, value):
+        if self.kind == 'bool':
+            return bool(value)
+        if self.kind == 'number':
+            return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+        return sys.intern(str(value)) if value is not None else None
+
+    def parse(self, text):
+        """A query literal converted to this column's value type"""
+        if self.kind == 'bool':
+            return _parse_bool(text)
+        if self.kind == 'number':
+            return _parse_number(text)
+        return text
+
+    def append(self, value):
+        value = self._normalize(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+            if code == 256:
+                self.codes = array.array('I', self.codes)
+        self.codes.append(code)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def _lookup(self, table):
+        if self.codes.typecode == 'B':
+            return bytearray(self.codes).translate(table.ljust(256, b'\x00'))
+        return bytearray(map(table.__getitem__, self.codes))
+
+    def mask(self, predicate):
+        """0/1 mask of the rows whose value satisfies predicate, evaluated once per distinct value"""
+        return self._lookup(bytes(1 if value is not None and predicate(value) else 0 for value in self.values))
+
+    def counts(self, mask):
+        """{value: rows} over the masked rows, in the order the values first appear there"""
+        if self.codes.typecode == 'B':
+            found = []
+            for code, value in enumerate(self.values):
+                onehot = bytearray(len(self.values))
+                onehot[code] = 1
+                rows = mask_and(self._lookup(bytes(onehot)), mask)
+                n = rows.count(1)
+                if n:
+                    found.append((rows.find(1), value, n))
+            return {value: n for _, value, n in sorted(found)}
+        return {self.values[code]: n for code, n in Counter(compress(self.codes, mask)).items()}
+
+# Column name, value type and how it is read from an Amplitude flag or experiment
+SCHEMA = (
+    ('type', 'string', None),
+    ('key', 'string', lambda e: e.get('key')),
+    ('name', 'string', lambda e: e.get('name')),
+    ('enabled', 'bool', lambda e: e.get('enabled', False)),
+    ('state', 'string', lambda e: e.get('state')),
+    ('evaluationMode', 'string', lambda e: e.get('evaluationMode')),
+    ('variants', 'number', lambda e: len(e.get('variants') or [])),
+    ('rollout', 'number', lambda e: e.get('rolloutPercentage')),
+    ('segments', 'number', lambda e: len(e.get('segments') or [])),
+    ('deployments', 'number', lambda e: len(e.get('deployments') or [])),
+)
+
+_CLAUSE = re.compile(r'^(not\s+)?(\w+)\s*(?:(>=|<=|!=|=|>|<)\s*(.+)|\s+in\s+(.+))?$')
+
+def _predicate(op, target):
+    return {
+        '=': lambda v: v == target, '!=': lambda v: v != target,
+        '>': lambda v: v > target, '>=': lambda v: v >= target,
+        '<': lambda v: v < target, '<=': lambda v: v <= target,
+    }[op]
+
+class ConfigTable:
+    """Column-oriented, array-backed view of an Amplitude export
+
+    Filters evaluate each clause over a whole column at once into a 0/1
+    mask, predicates run once per distinct value rather than per row, and
+    masks are combined with big-integer bitwise operations.
+    """
+
+    def __init__(self):
+        self.columns = {name: Column(kind) for name, kind, _ in SCHEMA}
+        self.size = 0
+
+    @classmethod
+    def from_export(cls, export):
+        """Table of every flag and experiment of a loaded Amplitude export"""
+        table = cls()
+        for section, kind in AMPLITUDE_SECTIONS:
+            for entity in export.get(section) or []:
+                table.append(kind, entity)
+        return table
+
+    def append(self, kind, entity):
+        for name, _, read in SCHEMA:
+            self.columns[name].append(kind if read is None else read(entity))
+        self.size += 1
+
+    def column(self, name):
+        if name not in self.columns:
+            raise ValueError(f"Unknown column {name!r}; expected one of {', '.join(self.columns)}")
+        return self.columns[name]
+
+    def where(self, expression=None):
+        """0/1 row mask for clauses joined by 'and': col, not col, col=v, col!=v, col>n, col in a,b"""
+        mask = bytearray(b'\x01') * self.size
+        if not expression or not expression.strip():
+            return mask
+        for clause in re.split(r'\s+and\s+', expression.strip()):
+            match = _CLAUSE.match(clause.strip())
+            if not match:
+                raise ValueError(f"Cannot parse filter clause {clause!r}")
+            negate, name, op, value, choices = match.groups()
+            column = self.column(name)
+            if choices is not None:
+                wanted = {column.parse(choice.strip()) for choice in choices.split(',')}
+                clause_mask = column.mask(wanted.__contains__)
+            elif op is None:
+                clause_mask = column.mask(bool)
+            else:
+                clause_mask = column.mask(_predicate(op, column.parse(value.strip())))
+            mask = mask_and(mask, mask_not(clause_mask) if negate else clause_mask)
+        return mask
+
+    def count(self, expression=None):
+        return self.where(expression).count(1)
+
+    def group_by(self, name, expression=None, most_common=False):
+        """[(value, rows)] of a column over the filtered rows, in first-seen order or most common first"""
+        counts = self.column(name).counts(self.where(expression))
+        if most_common:
+            return sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+        return list(counts.items())
+
+    def rows(self, expression=None, columns=None, limit=20):
+        """The first `limit` filtered rows as dicts"""
+        names = columns or list(self.columns)
+        selected = compress(range(self.size), self.where(expression))
+        return [{name: self.column(name)[row] for name in names} for row, _ in zip(selected, range(limit))]
+
+def run_benchmark(total, seed=42):
+    """Build a table of `total` synthetic entities and time typical queries"""
+    from synthetic_data import generate_inventories
+
+    amplitude, _ = generate_inventories(total, seed=seed)
+    started = time.perf_counter()
+    table = ConfigTable.from_export(amplitude)
+    print(f"🧮 Loaded {table.size} rows in {time.perf_counter() - started:.2f}s")
+
+    queries = [
+        ('count', "type=flag and enabled"),
+        ('group_by evaluationMode', "type=flag and enabled and variants>1"),
+        ('group_by state', "type=experiment"),
+        ('count', "rollout>=50 and not enabled and segments>0"),
+        ('group_by variants', "state in running,draft"),
+    ]
+    for label, expression in queries:
+        started = time.perf_counter()
+        if label == 'count':
+            result = table.count(expression)
+        else:
+            result = table.group_by(label.split()[1], expression, most_common=True)[:4]
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"   ⏱️  {elapsed:6.1f}ms  {label} where {expression} → {result}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar query benchmark for Amplitude exports")
+    parser.add_argument('--benchmark', type=int, metavar='N', default=100000,
+                        help="number of synthetic entities (default: 100000)")
+    args = parser.parse_args(argv)
+    run_benchmark(args.benchmark)
+
+if __name__ == "__main__":
+    main()
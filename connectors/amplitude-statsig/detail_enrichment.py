@@ -0,0 +1,153 @@
+import asyncio
+import time
+import urllib.parse
+
+from incremental_export import entity_key
+from telemetry import percentile
+
+# Per-entity detail and version history endpoints, relative to each exporter's base_url
+DETAIL_PATHS = {
+    'amplitude': {
+        'flags': ('flags/{id}', 'flags/{id}/versions'),
+        'experiments': ('experiments/{id}', 'experiments/{id}/versions'),
+    },
+    'statsig': {
+        'experiments': ('experiments/{id}', 'audit_logs?id={id}'),
+        'feature_gates': ('gates/{id}', 'audit_logs?id={id}'),
+        'dynamic_configs': ('dynamic_configs/{id}', 'audit_logs?id={id}'),
+    },
+}
+
+DEFAULT_DETAIL_CONCURRENCY = 32
+
+# Entities enriched per batch when the list is a paginated stream
+STREAM_BATCH_SIZE = 500
+
+def _unwrap(data, field=None):
+    """Body of a detail or history response, with any {'data': ...} / {'<field>': ...} envelope removed"""
+    if isinstance(data, dict):
+        if 'data' in data:
+            return data['data']
+        if field and field in data:
+            return data[field]
+    return data
+
+class DetailEnricher:
+    """Fetches full detail (and optionally version history) for every listed entity
+
+    List endpoints only return summaries, so this fans out one request per
+    entity (two with versions) on the exporter's async connector. At most
+    `concurrency` entities are in flight, on top of the connector's
+    per-host connection limit. Each entity's HTTP round-trip is recorded
+    apart from the time it spent queued for the vendor's rate limit.
+    """
+
+    def __init__(self, exporter, vendor, versions=False, concurrency=DEFAULT_DETAIL_CONCURRENCY):
+        self.exporter = exporter
+        self.vendor = vendor
+        self.versions = versions
+        self.concurrency = concurrency
+        self.latencies = {}
+        self.waits = {}
+        self.elapsed = {}
+
+    def _url(self, template, entity):
+        entity_id = urllib.parse.quote(str(entity.get('id') or entity_key(entity)), safe='')
+        return f"{self.exporter.base_url}/{template.format(id=entity_id)}"
+
+    async def _enrich_one(self, section, entity, slots):
+        detail_path, history_path = DETAIL_PATHS[self.vendor][section]
+        connector = self.exporter.connector.connector
+        description = f"{section} detail for {entity_key(entity)}"
+        async with slots:
+            started = time.perf_counter()
+            timings = []
+            requests = [connector.get_json(self._url(detail_path, entity), description, timings)]
+            if self.versions:
+                requests.append(connector.get_json(self._url(history_path, entity),
+                                                   f"{section} versions for {entity_key(entity)}", timings))
+            responses = await asyncio.gather(*requests)
+            # The detail and history requests run side by side, so the slower one is the entity's round-trip
+            round_trip = max(timings)
+            self.latencies[section].append(round_trip)
+            self.waits[section].append(max(0.0, time.perf_counter() - started - round_trip))
+        detail = _unwrap(responses[0])
+        enriched = dict(entity)
+        if isinstance(detail, dict):
+            enriched.update(detail)
+        if self.versions:
+            enriched['versions'] = _unwrap(responses[1], 'versions')
+        return enriched
+
+    async def _enrich_all(self, section, entities):
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._enrich_one(section, entity, slots)) for entity in entities]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # One failed entity fails the section; stop the requests still queued
+            for task in tasks:
+                task.cancel()
+
+    def enrich(self, section, entities):
+        """Detail-enriched copies of a list of entities, in the same order; raises ExportError on failure"""
+        self.latencies.setdefault(section, [])
+        self.waits.setdefault(section, [])
+        started = time.perf_counter()
+        enriched = self.exporter.connector.run(self._enrich_all(section, list(entities)))
+        self.elapsed[section] = self.elapsed.get(section, 0.0) + time.perf_counter() - started
+        return enriched
+
+    def enrich_stream(self, section, entities, batch_size=STREAM_BATCH_SIZE):
+        """Enrich a paginated stream batch by batch, so only one batch is held in memory"""
+        batch = []
+        for entity in entities:
+            batch.append(entity)
+            if len(batch) >= batch_size:
+                yield from self.enrich(section, batch)
+                batch = []
+        if batch:
+            yield from self.enrich(section, batch)
+
+    def summary(self):
+        """Per-section entity counts, wall time, round-trip percentiles and queue waits in milliseconds"""
+        summary = {}
+        for section, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            waits = sorted(self.waits.get(section, []))
+            elapsed = self.elapsed.get(section, 0.0)
+            summary[section] = {
+                'entities': len(ordered),
+                'seconds': round(elapsed, 3),
+                'per_second': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+                **{f"p{int(q * 100)}_ms": round(percentile(ordered, q) * 1000, 1) for q in (0.5, 0.9, 0.99)},
+                'max_ms': round(ordered[-1] * 1000, 1) if ordered else 0.0,
+                'wait_p50_ms': round(percentile(waits, 0.5) * 1000, 1),
+                'wait_p90_ms': round(percentile(waits, 0.9) * 1000, 1),
+            }
+        return summary
+
+    def print_summary(self):
+        """Print per-section detail fetch throughput and latency percentiles"""
+        what = "detail and versions" if self.versions else "detail"
+        print(f"\n🔎 Per-entity {what} ({self.concurrency} concurrent):")
+        for section, stats in self.summary().items():
+            print(f"   - {section}: {stats['entities']} in {stats['seconds']:.2f}s ({stats['per_second']:.0f}/s), "
+                  f"p50 {stats['p50_ms']:.0f}ms, p90 {stats['p90_ms']:.0f}ms, p99 {stats['p99_ms']:.0f}ms, "
+                  f"max {stats['max_ms']:.0f}ms; queued p50 {stats['wait_p50_ms']:.0f}ms, "
+                  f"p90 {stats['wait_p90_ms']:.0f}ms")
+
+def add_detail_arguments(parser):
+    """Register the --details options shared by the exporters"""
+    parser.add_argument('--details', action='store_true',
+                        help="fetch full per-entity detail for every listed flag, experiment, gate and config")
+    parser.add_argument('--versions', action='store_true',
+                        help="also fetch each entity's version history (implies --details)")
+    parser.add_argument('--detail-concurrency', type=int, default=DEFAULT_DETAIL_CONCURRENCY,
+                        help=f"entities fetched at once (default: {DEFAULT_DETAIL_CONCURRENCY})")
+
+def enricher_from_args(args, exporter, vendor):
+    """A DetailEnricher when --details or --versions is set, else None"""
+    if not (args.details or args.versions):
+        return None
+    return DetailEnricher(exporter, vendor, versions=args.versions, concurrency=args.detail_concurrency)
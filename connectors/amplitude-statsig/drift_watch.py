@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from amplitude_export_urllib import AmplitudeExporter
+from bulk_diff import AMPLITUDE_SECTIONS, FUZZY_PAIR_THRESHOLD, STATSIG_SECTIONS, diff_pair, pair_inventories
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache
+from incremental_export import CLOCK_SKEW_MARGIN, entity_hash, entity_key, modified_at
+from request_scheduler import ExportError
+from statsig_export import StatsigExporter
+from structural_diff import load_mapping
+
+DEFAULT_INTERVAL = 60
+
+class DriftWatcher:
+    """Both inventories, their pairing and the last diff of every pair, kept between polls
+
+    Each poll hands in the fetched sections that may have changed. Entities
+    whose lastModified predates the previous poll keep their stored hash,
+    the rest are hashed, and only pairs with a changed side are re-diffed.
+    Added and removed entities are paired against the unpaired leftovers
+    only, so the work per poll follows the churn, not the inventory size.
+    """
+
+    def __init__(self, mapping=None, threshold=FUZZY_PAIR_THRESHOLD):
+        self.mapping = mapping
+        self.threshold = threshold
+        self.kinds = {'amplitude': dict(AMPLITUDE_SECTIONS), 'statsig': dict(STATSIG_SECTIONS)}
+        # (platform, section, key) -> (hash, entity)
+        self.entities = {}
+        self.partner = {}
+        self.records = {}
+        self.since = {'amplitude': None, 'statsig': None}
+        self.baselined = False
+        self.rediffed = 0
+
+    def _update(self, platform, sections, polled_at):
+        """Fold fetched sections into the inventory; returns (added, removed, modified) identities"""
+        added, removed, modified = [], [], []
+        since = self.since[platform]
+        if since is not None:
+            # The vendor's clock may run ahead of ours; entities stamped near the last poll are hashed anyway
+            since -= CLOCK_SKEW_MARGIN
+        for section, entities in sections.items():
+            seen = set()
+            for entity in entities:
+                ident = (platform, section, entity_key(entity))
+                seen.add(ident)
+                known = self.entities.get(ident)
+                stamp = modified_at(entity)
+                if known and since is not None and stamp is not None and stamp <= since:
+                    continue
+                hash_ = entity_hash(entity)
+                if known is None:
+                    added.append(ident)
+                elif known[0] != hash_:
+                    modified.append(ident)
+                else:
+                    continue
+                self.entities[ident] = (hash_, entity)
+            for ident in [i for i in self.entities if i[0] == platform and i[1] == section and i not in seen]:
+                removed.append(ident)
+                del self.entities[ident]
+        self.since[platform] = polled_at
+        return added, removed, modified
+
+    def _inventory(self, idents):
+        return [(self.kinds[ident[0]][ident[1]], self.entities[ident][1], ident) for ident in idents]
+
+    def _pair(self, amplitude_idents, statsig_idents):
+        """Pair the given unpaired identities; returns the Amplitude identities that gained a partner"""
+        amplitude = self._inventory(amplitude_idents)
+        statsig = self._inventory(statsig_idents)
+        by_entity = {id(entity): ident for _, entity, ident in amplitude + statsig}
+        pairs, _, _ = pair_inventories([(kind, entity) for kind, entity, _ in amplitude],
+                                       [(kind, entity) for kind, entity, _ in statsig], self.threshold)
+        paired = []
+        for _, amp, _, st, score in pairs:
+            amp_ident, st_ident = by_entity[id(amp)], by_entity[id(st)]
+            self.partner[amp_ident] = (st_ident, score)
+            self.partner[st_ident] = (amp_ident, score)
+            paired.append(amp_ident)
+        return paired
+
+    def _diff(self, amp_ident):
+        st_ident, score = self.partner[amp_ident]
+        amp, st = self.entities[amp_ident][1], self.entities[st_ident][1]
+        return diff_pair((self.kinds['amplitude'][amp_ident[1]], amp, self.kinds['statsig'][st_ident[1]], st, score),
+                         self.mapping)
+
+    def _unpaired(self, platform):
+        return [ident for ident in self.entities if ident[0] == platform and ident not in self.partner]
+
+    def poll(self, amplitude_sections, statsig_sections, polled_at=None):
+        """Apply one poll's fetched sections (sections not passed are unchanged); returns drift events"""
+        polled_at = polled_at if polled_at is not None else time.time()
+        changes = {}
+        for platform, sections in (('amplitude', amplitude_sections), ('statsig', statsig_sections)):
+            changes[platform] = self._update(platform, sections, polled_at)
+
+        if not self.baselined:
+            self.baselined = True
+            for amp_ident in self._pair(self._unpaired('amplitude'), self._unpaired('statsig')):
+                self.records[amp_ident] = self._diff(amp_ident)
+            self.rediffed = len(self.records)
+            drifted = sum(1 for record in self.records.values() if record['status'] == 'drift')
+            return [{'type': 'baseline', 'paired': len(self.records), 'drifted': drifted,
+                     'amplitude_only': len(self._unpaired('amplitude')),
+                     'statsig_only': len(self._unpaired('statsig'))}]
+
+        events = []
+        stale = set()
+        for platform, (added, removed, modified) in changes.items():
+            for ident in added:
+                events.append({'type': 'entity_added', 'platform': platform, 'section': ident[1], 'key': ident[2]})
+            for ident in removed:
+                events.append({'type': 'entity_removed', 'platform': platform, 'section': ident[1], 'key': ident[2]})
+                partner = self.partner.pop(ident, None)
+                if partner:
+                    del self.partner[partner[0]]
+                    amp_ident = ident if platform == 'amplitude' else partner[0]
+                    record = self.records.pop(amp_ident, None)
+                    if record and record['status'] == 'drift':
+                        events.append(self._event('drift_resolved', record, reason=f"{platform} entity removed"))
+            for ident in modified:
+                partner = self.partner.get(ident)
+                if partner:
+                    stale.add(ident if platform == 'amplitude' else partner[0])
+
+        if any(added for added, _, _ in changes.values()) or any(removed for _, removed, _ in changes.values()):
+            stale.update(self._pair(self._unpaired('amplitude'), self._unpaired('statsig')))
+
+        stale = sorted(ident for ident in stale if ident in self.partner)
+        for amp_ident in stale:
+            before = self.records.get(amp_ident)
+            record = self.records[amp_ident] = self._diff(amp_ident)
+            was_drifting = before is not None and before['status'] == 'drift'
+            if record['status'] == 'drift' and not was_drifting:
+                events.append(self._event('drift_detected', record))
+            elif record['status'] == 'drift' and before['differences'] != record['differences']:
+                events.append(self._event('drift_changed', record))
+            elif record['status'] == 'match' and was_drifting:
+                events.append(self._event('drift_resolved', before))
+        self.rediffed = len(stale)
+        return events
+
+    @staticmethod
+    def _event(kind, record, **extra):
+        event = {'type': kind, 'amplitude_key': record['amplitude_key'], 'statsig_name': record['statsig_name'],
+                 'statsig_type': record['statsig_type'], 'fields': sorted(record['differences'])}
+        if kind != 'drift_resolved':
+            event['differences'] = record['differences']
+        event.update(extra)
+        return event
+
+class EventSink:
+    """Writes events as JSON lines to stdout or appends them to a JSONL file"""
+
+    def __init__(self, path=None):
+        self.path = path
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.stream = open(path, 'a') if path else sys.stdout
+
+    def emit(self, event):
+        event = {'at': datetime.now().isoformat(), **event}
+        self.stream.write(json.dumps(event, default=str) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        if self.path:
+            self.stream.close()
+
+class _Fetcher:
+    """Fetches one platform's sections through the shared cache, dropping those answered 304"""
+
+    def __init__(self, cache, fetchers, verbose=False):
+        self.cache = cache
+        self.fetchers = fetchers
+        self.verbose = verbose
+
+    def fetch(self, full=False):
+        """{section: entities} of the sections that changed, or of every section when full"""
+        sections = {}
+        for section, fetch in self.fetchers.items():
+            misses = self.cache.misses
+            # The exporters narrate every request; keep that off the event stream
+            # A paginated fetch is a lazy generator; drain it before counting the requests it made
+            with contextlib.redirect_stdout(sys.stderr if self.verbose else io.StringIO()):
+                entities = list(fetch())
+            if full or self.cache.misses != misses:
+                sections[section] = entities
+        return sections
+
+def parse_args(argv=None):
+    """Parse command-line options for the drift watcher"""
+    parser = argparse.ArgumentParser(description="Poll Amplitude and Statsig and emit drift events as they happen")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f"seconds between polls (default: {DEFAULT_INTERVAL})")
+    parser.add_argument('--iterations', type=int, default=None,
+                        help="stop after this many polls (default: run until interrupted)")
+    parser.add_argument('--output', metavar='FILE',
+                        help="append events to this JSONL file instead of writing them to stdout")
+    parser.add_argument('--paginate', action='store_true',
+                        help="follow the Statsig Console API page cursor")
+    parser.add_argument('--threshold', type=float, default=FUZZY_PAIR_THRESHOLD,
+                        help=f"minimum name similarity for pairing renamed entities (default: {FUZZY_PAIR_THRESHOLD})")
+    parser.add_argument('--mapping', metavar='FILE',
+                        help="JSON file overriding the Amplitude → Statsig field mapping of structural_diff")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="response cache used for conditional requests (default: build/http_cache)")
+    parser.add_argument('--verbose', action='store_true',
+                        help="print the exporters' per-request output to stderr")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    amplitude_key = os.getenv('AMPLITUDE_MANAGEMENT_API_KEY')
+    statsig_key = os.getenv('STATSIG_CONSOLE_API_KEY')
+    if not amplitude_key or not statsig_key:
+        print("❌ Error: Please set AMPLITUDE_MANAGEMENT_API_KEY and STATSIG_CONSOLE_API_KEY", file=sys.stderr)
+        return
+
+    cache = ResponseCache(args.cache_dir)
+    amplitude = AmplitudeExporter(amplitude_key, cache=cache)
+    statsig = StatsigExporter(statsig_key, cache=cache)
+    fetchers = {
+        'amplitude': _Fetcher(cache, {'flags': amplitude.export_flags, 'experiments': amplitude.export_experiments},
+                              args.verbose),
+        'statsig': _Fetcher(cache, {'experiments': lambda: statsig.get_experiments(args.paginate),
+                                    'feature_gates': lambda: statsig.get_feature_gates(args.paginate),
+                                    'dynamic_configs': lambda: statsig.get_dynamic_configs(args.paginate)},
+                            args.verbose),
+    }
+    watcher = DriftWatcher(load_mapping(args.mapping), args.threshold)
+    sink = EventSink(args.output)
+    print(f"👀 Watching Amplitude ↔ Statsig drift every {args.interval:g}s"
+          f"{f', events in {args.output}' if args.output else ''} (Ctrl-C to stop)", file=sys.stderr)
+
+    polls = 0
+    try:
+        while args.iterations is None or polls < args.iterations:
+            started = time.perf_counter()
+            polled_at = time.time()
+            try:
+                fetched = {platform: fetcher.fetch(full=not watcher.baselined) for platform, fetcher in fetchers.items()}
+            except ExportError as e:
+                print(f"⚠️  Poll failed, keeping the previous state: {e}", file=sys.stderr)
+            else:
+                events = watcher.poll(fetched['amplitude'], fetched['statsig'], polled_at)
+                for event in events:
+                    sink.emit(event)
+                changed = sum(len(entities) for sections in fetched.values() for entities in sections.values())
+                print(f"🔁 Poll {polls + 1}: {len(fetched['amplitude']) + len(fetched['statsig'])} sections changed "
+                      f"({changed} entities re-read), {watcher.rediffed} pairs re-diffed, "
+                      f"{len(events)} events in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+            polls += 1
+            if args.iterations is None or polls < args.iterations:
+                time.sleep(max(args.interval - (time.perf_counter() - started), 0))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching", file=sys.stderr)
+    finally:
+        amplitude.close()
+        statsig.close()
+        sink.close()
+        with contextlib.redirect_stdout(sys.stderr):
+            cache.print_stats()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import array
+import codecs
+import json
+import mmap
+import os
+import re
+from collections.abc import Sequence
+
+from binary_snapshot import is_snapshot, open_snapshot
+from export_writer import is_reference
+from incremental_export import entity_key
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def _map_file(path):
+    """Read-only memory map of a file (an empty bytes object for empty files)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class _Scanner:
+    """Decodes JSON values one at a time from a memory-mapped file, tracking byte offsets
+
+    Only a window of the file is decoded to text at any time; values larger
+    than the window grow it, so each value is parsed whole by the C decoder.
+    """
+
+    def __init__(self, buffer, chunk_size=1 << 20):
+        self.buffer = buffer
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.offset = 0
+        self._read_to = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+
+    @property
+    def eof(self):
+        return self._read_to >= len(self.buffer)
+
+    def _fill(self):
+        """Decode the next chunk into the window; False at the end of the file"""
+        if self.eof:
+            return False
+        size = max(self.chunk_size, len(self.text) - self.pos)
+        chunk = self.buffer[self._read_to:self._read_to + size]
+        self._read_to += len(chunk)
+        self.text = self.text[self.pos:] + self._decoder.decode(chunk, self.eof)
+        self.pos = 0
+        return True
+
+    def _advance(self, end):
+        consumed = self.text[self.pos:end]
+        self.offset += len(consumed) if consumed.isascii() else len(consumed.encode('utf-8'))
+        self.pos = end
+
+    def peek(self):
+        """Next non-whitespace character, or '' at the end of the file"""
+        while True:
+            self._advance(_WHITESPACE.match(self.text, self.pos).end())
+            if self.pos < len(self.text) or not self._fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at byte {self.offset}, found {found or 'end of file'!r}")
+        self._advance(self.pos + 1)
+
+    def value(self):
+        """Decode the next JSON value and move past it"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut off by the window boundary still decodes; make sure it is whole
+            if end == len(self.text) and self._fill():
+                continue
+            self._advance(end)
+            return value
+
+class EntitySection(Sequence):
+    """Entities of one JSON array (or NDJSON file), decoded on demand from a memory map
+
+    The byte range of every entity is recorded on the first scan, so
+    iterating, indexing and get(key) decode only the entities asked for.
+    Items that are not objects are kept in order but have no key.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._starts = array.array('Q')
+        self._ends = array.array('Q')
+        self._keys = {}
+
+    def _add(self, entity, start, end):
+        # Arrays of scalars (tags, project names) are sequences too; only objects are looked up by key
+        if isinstance(entity, dict):
+            self._keys.setdefault(entity_key(entity), len(self._starts))
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return json.loads(self._buffer[self._starts[index]:self._ends[index]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def keys(self):
+        return self._keys.keys()
+
+    def get(self, key, default=None):
+        """The entity with this key, id or name, decoded from its recorded offsets"""
+        index = self._keys.get(key)
+        return default if index is None else self[index]
+
+def _scan_array(scanner, section):
+    """Walk a JSON array item by item, recording each item's byte range"""
+    scanner.expect('[')
+    if scanner.peek() == ']':
+        scanner.expect(']')
+        return section
+    while True:
+        scanner.peek()
+        start = scanner.offset
+        entity = scanner.value()
+        section._add(entity, start, scanner.offset)
+        if scanner.peek() == ']':
+            scanner.expect(']')
+            return section
+        scanner.expect(',')
+
+def _scan_ndjson(buffer, section):
+    start = 0
+    while start < len(buffer):
+        end = buffer.find(b'\n', start)
+        end = len(buffer) if end == -1 else end
+        line = buffer[start:end]
+        if line.strip():
+            section._add(json.loads(line), start, end)
+        start = end + 1
+    return section
+
+def open_entities(filepath):
+    """EntitySection over a JSON array or NDJSON entity file, or a SnapshotSection over a snapshot"""
+    if is_snapshot(filepath):
+        return open_snapshot(filepath)
+    buffer = _map_file(filepath)
+    if filepath.endswith('.ndjson'):
+        return _scan_ndjson(buffer, EntitySection(buffer))
+    return _scan_array(_Scanner(buffer), EntitySection(buffer))
+
+def open_export(filepath):
+    """Stream a combined export (or a bare entity array) into a dict of lazy sections
+
+    Entity arrays, inline or referenced through {'$ref': file}, become
+    EntitySections; other top-level values are decoded normally. The whole
+    document is never decoded at once, and entities are only kept as byte
+    offsets into the memory-mapped file. A bare snapshot file opens as its
+    SnapshotSection.
+    """
+    if is_snapshot(filepath):
+        return open_snapshot(filepath)
+    buffer = _map_file(filepath)
+    scanner = _Scanner(buffer)
+    if scanner.peek() == '[':
+        return _scan_array(scanner, EntitySection(buffer))
+
+    export = {}
+    directory = os.path.dirname(filepath)
+    scanner.expect('{')
+    if scanner.peek() == '}':
+        return export
+    while True:
+        key = scanner.value()
+        scanner.expect(':')
+        if scanner.peek() == '[':
+            export[key] = _scan_array(scanner, EntitySection(buffer))
+        else:
+            value = scanner.value()
+            export[key] = open_entities(os.path.join(directory, value['$ref'])) if is_reference(value) else value
+        if scanner.peek() == '}':
+            return export
+        scanner.expect(',')
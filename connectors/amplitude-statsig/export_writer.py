@@ -0,0 +1,216 @@
+import json
+import os
+from collections.abc import Iterator
+
+FORMATS = ('pretty', 'compact', 'ndjson', 'binary')
+
+# Extension of each format's entity files; binary is binary_snapshot's compressed, key-indexed format
+EXTENSIONS = {'pretty': '.json', 'compact': '.json', 'ndjson': '.ndjson', 'binary': '.snap'}
+
+def entity_filename(stem, fmt):
+    """File name for an entity list in the given output format"""
+    return f"{stem}{EXTENSIONS[fmt]}"
+
+def _is_stream(data):
+    """Whether data is a lazy iterator such as a generator of paginated entities"""
+    return isinstance(data, Iterator)
+
+def write_json(f, data, compact=False):
+    """Write data as JSON, streaming a top-level list or iterator item by item
+
+    Every item, and any other document, is serialized by one json.dumps
+    call, so the output matches json.dump(data, indent=2, default=str), or
+    its compact form, without holding a paginated stream in memory.
+    """
+    if not isinstance(data, (list, tuple)) and not _is_stream(data):
+        if compact:
+            f.write(json.dumps(data, separators=(',', ':'), default=str))
+        else:
+            f.write(json.dumps(data, indent=2, default=str))
+        return
+    empty = True
+    for item in data:
+        if compact:
+            f.write(("[" if empty else ",") + json.dumps(item, separators=(',', ':'), default=str))
+        else:
+            text = json.dumps(item, indent=2, default=str).replace("\n", "\n  ")
+            f.write(("[\n  " if empty else ",\n  ") + text)
+        empty = False
+    f.write("[]" if empty else "]" if compact else "\n]")
+
+class ExportWriter:
+    """Writes an export's files to temp files and swaps them in together
+
+    Entity lists are streamed item by item, so paginated exports are never
+    held in memory. Nothing in the output directory changes until commit(),
+    which renames every temp file into place; when used as a context manager
+    an exception aborts the export and leaves the previous files untouched.
+    The combined export references the per-entity files instead of repeating
+    their contents.
+    """
+
+    def __init__(self, directory, fmt='pretty'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format {fmt!r}; expected one of {FORMATS}")
+        self.directory = directory
+        self.fmt = fmt
+        self._pending = []
+        self.written = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+    def _open_temp(self, filename, mode='w'):
+        if self.directory and not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+            print(f"📁 Created directory: {self.directory}")
+        filepath = os.path.join(self.directory, filename)
+        tmp_path = os.path.join(self.directory, f".{filename}.{os.getpid()}.tmp")
+        self._pending.append((tmp_path, filepath))
+        return open(tmp_path, mode)
+
+    def write_entities(self, stem, entities):
+        """Stream an entity list to <stem>.json, <stem>.ndjson or <stem>.snap; returns (filename, count)"""
+        filename = entity_filename(stem, self.fmt)
+        if self.fmt == 'binary':
+            from binary_snapshot import SnapshotWriter
+
+            with self._open_temp(filename, 'wb') as f:
+                snapshot = SnapshotWriter(f)
+                for entity in entities:
+                    snapshot.add(entity)
+                snapshot.close()
+            return filename, len(snapshot)
+        count = 0
+        with self._open_temp(filename) as f:
+            if self.fmt == 'ndjson':
+                for entity in entities:
+                    f.write(json.dumps(entity, separators=(',', ':'), default=str))
+                    f.write("\n")
+                    count += 1
+            else:
+                def counted():
+                    nonlocal count
+                    for entity in entities:
+                        count += 1
+                        yield entity
+                write_json(f, counted(), compact=self.fmt == 'compact')
+        return filename, count
+
+    def write_json(self, filename, data):
+        """Stream any JSON document in the writer's pretty or compact style"""
+        with self._open_temp(filename) as f:
+            write_json(f, data, compact=self.fmt == 'compact')
+        return filename
+
+    def write_combined(self, filename, header, sections, trailer=None):
+        """Write the combined export, referencing each section's entity file
+
+        sections maps a section name to the (filename, count) returned by
+        write_entities; header keys come before the sections and trailer
+        keys (summary, hashes) after them.
+        """
+        combined = dict(header)
+        for section, (entity_file, count) in sections.items():
+            combined[section] = {'$ref': entity_file, 'count': count}
+        combined.update(trailer or {})
+        return self.write_json(filename, combined)
+
+    def commit(self):
+        """Atomically move every written file into place"""
+        for tmp_path, filepath in self._pending:
+            os.replace(tmp_path, filepath)
+            self.written.append(filepath)
+            print(f"💾 Saved to {filepath}")
+        self._pending = []
+
+    def abort(self):
+        """Discard every file written so far"""
+        for tmp_path, _ in self._pending:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        self._pending = []
+
+def save_json(data, filename, directory="", fmt='pretty'):
+    """Atomically save one JSON document, streaming it item by item when it is a list or iterator"""
+    with ExportWriter(directory, 'compact' if fmt == 'compact' else 'pretty') as writer:
+        writer.write_json(filename, data)
+
+def iter_json_array(filepath, chunk_size=1 << 16):
+    """Yield the items of a top-level JSON array file without loading the whole document"""
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{filepath} does not contain a JSON array")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+            if len(buffer) < chunk_size and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+
+def iter_entities(filepath):
+    """Yield the entities of a JSON array, NDJSON or snapshot file one at a time"""
+    if filepath.endswith(EXTENSIONS['binary']):
+        from binary_snapshot import iter_snapshot
+
+        yield from iter_snapshot(filepath)
+    elif filepath.endswith('.ndjson'):
+        with open(filepath, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from iter_json_array(filepath)
+
+def find_entity_file(directory, stem):
+    """Path of the most recently written <stem>.json / .ndjson / .snap, or None"""
+    candidates = [os.path.join(directory, entity_filename(stem, fmt)) for fmt in ('pretty', 'ndjson', 'binary')]
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        return None
+    return max(existing, key=os.path.getmtime)
+
+def is_reference(value):
+    """Whether a combined-export section points at a separate entity file"""
+    return isinstance(value, dict) and '$ref' in value
+
+def resolve_references(data, directory):
+    """Replace every {'$ref': file} section of a combined export with the file's entities"""
+    if not isinstance(data, dict):
+        return data
+    for section, value in list(data.items()):
+        if is_reference(value):
+            data[section] = list(iter_entities(os.path.join(directory, value['$ref'])))
+    return data
+
+def load_export(filepath):
+    """Load a combined export, inlining the entity files it references"""
+    with open(filepath, 'r') as f:
+        data = json.load(f)
+    return resolve_references(data, os.path.dirname(filepath))
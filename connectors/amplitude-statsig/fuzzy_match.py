@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import argparse
+import random
+import re
+import time
+import zlib
+from collections import Counter, defaultdict
+
+# Mersenne prime modulus for the universal hash family used by MinHash
+_PRIME = (1 << 61) - 1
+
+def normalize(text):
+    """Lowercase a key or name and collapse separators so 'MPU_Heuristics v1' == 'mpu-heuristics-v1'"""
+    return re.sub(r'[^a-z0-9]+', '-', (text or '').lower()).strip('-')
+
+def shingles(text, n=3):
+    """Character n-grams of a normalized string, padded so short keys still shingle"""
+    padded = f"^{normalize(text)}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+class FuzzyIndex:
+    """MinHash/LSH index over the n-grams of entity keys and names
+
+    Every text added for an item is reduced to a MinHash signature and split
+    into bands; items sharing any band bucket with a query become candidates,
+    which are then ranked by exact n-gram Jaccard similarity. Lookups touch
+    only the colliding buckets, so matching m queries against n items costs
+    roughly O(m + n) instead of O(m * n).
+    """
+
+    def __init__(self, ngram=3, num_perm=32, bands=8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.ngram = ngram
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._shingles = defaultdict(list)
+        # Keys share a small n-gram vocabulary, so each n-gram's permuted hashes are computed once
+        self._gram_hashes = {}
+        self.size = 0
+
+    def __contains__(self, item_id):
+        return item_id in self._shingles
+
+    def _permuted(self, gram):
+        hashes = self._gram_hashes.get(gram)
+        if hashes is None:
+            h = zlib.crc32(gram.encode())
+            hashes = self._gram_hashes[gram] = tuple((a * h + b) % _PRIME for a, b in self._perms)
+        return hashes
+
+    def signature(self, grams):
+        """MinHash signature of a shingle set"""
+        return list(map(min, zip(*[self._permuted(g) for g in grams])))
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[i * rows:(i + 1) * rows]) for i in range(self.bands)]
+
+    def add(self, item_id, *texts):
+        """Index an item under one or more texts (typically its key and name)"""
+        for text in texts:
+            if not text:
+                continue
+            grams = shingles(text, self.ngram)
+            self._shingles[item_id].append(grams)
+            for band, key in enumerate(self._band_keys(self.signature(grams))):
+                bucket = self._buckets[band][key]
+                if not bucket or bucket[-1] != item_id:
+                    bucket.append(item_id)
+        self.size += 1
+
+    def candidates(self, *texts, max_candidates=16):
+        """Items sharing LSH buckets with the query texts, most shared buckets first
+
+        The number of colliding bands estimates similarity, so only the
+        max_candidates strongest collisions are kept for exact scoring.
+        """
+        collisions = Counter()
+        query_grams = []
+        for text in texts:
+            if not text:
+                continue
+            grams = shingles(text, self.ngram)
+            query_grams.append(grams)
+            for band, key in enumerate(self._band_keys(self.signature(grams))):
+                collisions.update(self._buckets[band].get(key, ()))
+        return [item_id for item_id, _ in collisions.most_common(max_candidates)], query_grams
+
+    def query(self, *texts, threshold=0.3, limit=5, max_candidates=16):
+        """Ranked (item_id, similarity) candidates for the query texts, best first"""
+        found, query_grams = self.candidates(*texts, max_candidates=max_candidates)
+        scored = []
+        for item_id in found:
+            score = max(jaccard(q, g) for q in query_grams for g in self._shingles[item_id])
+            if score >= threshold:
+                scored.append((item_id, score))
+        scored.sort(key=lambda pair: (-pair[1], str(pair[0])))
+        return scored[:limit]
+
+def rank_pairs(left, right, threshold=0.3, limit=3, **index_options):
+    """Ranked candidate pairs between two {id: (key, name, ...)} mappings
+
+    Builds the index over the larger side and queries it with the smaller one.
+    Returns (left_id, right_id, score) tuples sorted by descending score.
+    """
+    swap = len(left) > len(right)
+    indexed, queries = (left, right) if swap else (right, left)
+    index = FuzzyIndex(**index_options)
+    for item_id, texts in indexed.items():
+        index.add(item_id, *texts)
+    pairs = []
+    for query_id, texts in queries.items():
+        for item_id, score in index.query(*texts, threshold=threshold, limit=limit):
+            pairs.append((item_id, query_id, score) if swap else (query_id, item_id, score))
+    pairs.sort(key=lambda pair: (-pair[2], str(pair[0]), str(pair[1])))
+    return pairs
+
+def best_matches(pairs):
+    """Greedy one-to-one assignment from ranked pairs: each id is used at most once"""
+    used_left, used_right = set(), set()
+    matches = []
+    for left_id, right_id, score in pairs:
+        if left_id in used_left or right_id in used_right:
+            continue
+        used_left.add(left_id)
+        used_right.add(right_id)
+        matches.append((left_id, right_id, score))
+    return matches
+
+def _synthetic_keys(count, rng):
+    """Experiment-style keys such as boost-price-test-gb-ios-202302"""
+    words = ['mpu', 'heuristics', 'boost', 'price', 'test', 'gender', 'filter', 'paywall', 'taps',
+             'cascade', 'distance', 'profile', 'preview', 'everest', 'pass', 'optimize', 'views', 'mutual']
+    suffixes = ['ios', 'android', 'us', 'gb', 'br', 'fr', 'q125', 'q224', 'v1', 'v2', '202302', '20230712']
+    keys = set()
+    while len(keys) < count:
+        parts = rng.sample(words, rng.randint(2, 4)) + rng.sample(suffixes, rng.randint(1, 2))
+        keys.add('-'.join(parts))
+    return sorted(keys)
+
+def run_benchmark(count, seed=7):
+    """Pair `count` synthetic Amplitude keys with renamed Statsig copies and report timing and accuracy"""
+    rng = random.Random(seed)
+    amplitude_keys = _synthetic_keys(count, rng)
+    statsig_names = {}
+    for key in amplitude_keys:
+        # Simulate renames on the Statsig side: separator changes, suffix edits and casing
+        renamed = key.replace('-', rng.choice(['-', '_']))
+        if rng.random() < 0.3:
+            renamed += rng.choice(['-q125', '-v2', '-new'])
+        statsig_names[f"statsig::{key}"] = renamed.upper() if rng.random() < 0.1 else renamed
+
+    left = {key: (key,) for key in amplitude_keys}
+    right = {sid: (name,) for sid, name in statsig_names.items()}
+    started = time.perf_counter()
+    matches = best_matches(rank_pairs(left, right, threshold=0.4))
+    elapsed = time.perf_counter() - started
+    correct = sum(1 for l, r, _ in matches if r == f"statsig::{l}")
+
+    print(f"🔍 Fuzzy pairing benchmark: {count} × {count} keys")
+    print(f"   ⏱️  {elapsed:.2f}s ({count / elapsed:,.0f} keys/s)")
+    print(f"   ✅ Paired: {len(matches)} / {count}, correct: {correct} ({correct / count:.1%})")
+    return elapsed, correct
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzzy key pairing between Amplitude and Statsig")
+    parser.add_argument('--benchmark', type=int, metavar='N', default=20000,
+                        help="number of synthetic keys per platform (default: 20000)")
+    args = parser.parse_args(argv)
+    run_benchmark(args.benchmark)
+
+if __name__ == "__main__":
+    main()
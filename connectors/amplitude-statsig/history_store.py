@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from export_reader import open_export
+from incremental_export import entity_hash, entity_key
+from structural_diff import deep_diff
+
+DEFAULT_HISTORY_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                  "build", "history.sqlite3")
+
+# Entity sections recorded per platform
+PLATFORM_SECTIONS = {
+    'amplitude': ('flags', 'experiments', 'deployments'),
+    'statsig': ('experiments', 'feature_gates', 'dynamic_configs'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    exported_at TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    entities INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    modified INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_platform_time ON snapshots (platform, exported_at);
+
+-- Entity bodies, stored once per distinct content
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+) WITHOUT ROWID;
+
+-- One row per entity version, valid from the export that introduced it until
+-- the export that changed or removed it (valid_to is NULL while current)
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES bodies (hash),
+    valid_from TEXT NOT NULL,
+    valid_to TEXT
+);
+CREATE INDEX IF NOT EXISTS versions_key ON versions (key, platform, valid_from);
+CREATE INDEX IF NOT EXISTS versions_platform_time ON versions (platform, valid_from, valid_to);
+CREATE INDEX IF NOT EXISTS versions_current ON versions (platform, section, key) WHERE valid_to IS NULL;
+"""
+
+def _encode(entity):
+    return zlib.compress(json.dumps(entity, sort_keys=True, separators=(',', ':'), default=str).encode())
+
+def _decode(body):
+    return json.loads(zlib.decompress(body))
+
+class HistoryStore:
+    """Append-only SQLite history of every export, one row per entity version
+
+    Each recorded export only writes the entities that were added, changed
+    or removed since the platform's previous snapshot, and entity bodies are
+    deduplicated by content hash. As-of lookups and per-key history are
+    index range scans, so they stay fast however many snapshots pile up.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def latest(self, platform):
+        """exported_at of the platform's most recent snapshot, or None"""
+        row = self.db.execute("SELECT MAX(exported_at) FROM snapshots WHERE platform = ?", (platform,)).fetchone()
+        return row[0]
+
+    def record(self, platform, export, exported_at=None):
+        """Append one export (a combined-export dict, lazy or loaded); returns the change counts
+
+        Hashes from the export's entity_hashes section are reused when present.
+        A key repeated within a section keeps its first entity; the others are
+        skipped and counted as duplicates, so each key has one open version.
+        """
+        exported_at = exported_at or export.get('exported_at') or datetime.now().isoformat()
+        latest = self.latest(platform)
+        if latest and exported_at < latest:
+            raise ValueError(f"{platform} snapshot {exported_at} is older than the latest recorded one ({latest})")
+        stored_hashes = export.get('entity_hashes') or {}
+
+        current = {}
+        for section, key, hash_, version_id in self.db.execute(
+                "SELECT section, key, hash, id FROM versions WHERE platform = ? AND valid_to IS NULL", (platform,)):
+            current[(section, key)] = (hash_, version_id)
+
+        counts = {'entities': 0, 'added': 0, 'modified': 0, 'removed': 0, 'duplicates': 0}
+        seen = set()
+        with self.db:
+            for section in PLATFORM_SECTIONS.get(platform, ()):
+                known = stored_hashes.get(section) or {}
+                for entity in export.get(section) or []:
+                    key = entity_key(entity)
+                    if (section, key) in seen:
+                        counts['duplicates'] += 1
+                        continue
+                    hash_ = known.get(key) or entity_hash(entity)
+                    seen.add((section, key))
+                    counts['entities'] += 1
+                    previous = current.get((section, key))
+                    if previous and previous[0] == hash_:
+                        continue
+                    self.db.execute("INSERT OR IGNORE INTO bodies (hash, body) VALUES (?, ?)", (hash_, _encode(entity)))
+                    if previous:
+                        self.db.execute("UPDATE versions SET valid_to = ? WHERE id = ?", (exported_at, previous[1]))
+                        counts['modified'] += 1
+                    else:
+                        counts['added'] += 1
+                    self.db.execute("INSERT INTO versions (platform, section, key, hash, valid_from) VALUES (?, ?, ?, ?, ?)",
+                                    (platform, section, key, hash_, exported_at))
+            removed = [(exported_at, version_id) for ident, (_, version_id) in current.items() if ident not in seen]
+            self.db.executemany("UPDATE versions SET valid_to = ? WHERE id = ?", removed)
+            counts['removed'] = len(removed)
+            self.db.execute(
+                "INSERT INTO snapshots (platform, exported_at, recorded_at, entities, added, modified, removed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (platform, exported_at, datetime.now().isoformat(), counts['entities'],
+                 counts['added'], counts['modified'], counts['removed']))
+        return counts
+
+    def record_file(self, platform, filepath, exported_at=None):
+        """Append a combined export file, streaming its entities from disk"""
+        return self.record(platform, open_export(filepath), exported_at)
+
+    def snapshots(self, platform=None):
+        query = "SELECT platform, exported_at, entities, added, modified, removed FROM snapshots"
+        params = ()
+        if platform:
+            query += " WHERE platform = ?"
+            params = (platform,)
+        columns = ('platform', 'exported_at', 'entities', 'added', 'modified', 'removed')
+        return [dict(zip(columns, row)) for row in self.db.execute(query + " ORDER BY exported_at", params)]
+
+    def as_of(self, when, platform, key=None, section=None):
+        """Entities of a platform as they were at `when`: {(section, key): entity}, or one entity with key"""
+        query = ("SELECT v.section, v.key, b.body FROM versions v JOIN bodies b ON b.hash = v.hash "
+                 "WHERE v.platform = ? AND v.valid_from <= ? AND (v.valid_to IS NULL OR v.valid_to > ?)")
+        params = [platform, when, when]
+        if key is not None:
+            query += " AND v.key = ?"
+            params.append(key)
+        if section is not None:
+            query += " AND v.section = ?"
+            params.append(section)
+        rows = {(s, k): _decode(body) for s, k, body in self.db.execute(query, params)}
+        if key is not None:
+            return next(iter(rows.values()), None)
+        return rows
+
+    def history(self, key, platform=None):
+        """Every version of a key, oldest first, with the paths that changed from the version before"""
+        query = ("SELECT v.platform, v.section, v.valid_from, v.valid_to, v.hash, b.body FROM versions v "
+                 "JOIN bodies b ON b.hash = v.hash WHERE v.key = ?")
+        params = [key]
+        if platform:
+            query += " AND v.platform = ?"
+            params.append(platform)
+        versions = []
+        previous = {}
+        for platform_, section, valid_from, valid_to, hash_, body in self.db.execute(query + " ORDER BY v.valid_from", params):
+            entity = _decode(body)
+            before = previous.get((platform_, section))
+            versions.append({
+                'platform': platform_,
+                'section': section,
+                'valid_from': valid_from,
+                'valid_to': valid_to,
+                'hash': hash_,
+                'changes': [change['path'] for change in deep_diff(before, entity)] if before is not None else [],
+                'entity': entity,
+            })
+            previous[(platform_, section)] = entity
+        return versions
+
+def add_history_arguments(parser):
+    """Register the --history options shared by the exporters"""
+    parser.add_argument('--history', action='store_true',
+                        help="append this export to the SQLite snapshot history")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB,
+                        help="history database (default: build/history.sqlite3)")
+
+def record_history(args, platform, filepath, exported_at):
+    """Append a written combined export to the history when --history is set"""
+    if not args.history:
+        return
+    with HistoryStore(args.history_db) as store:
+        counts = store.record_file(platform, filepath, exported_at)
+    print(f"🗄️  History: recorded {counts['entities']} {platform} entities "
+          f"(+{counts['added']} ~{counts['modified']} -{counts['removed']}) in {args.history_db}")
+    if counts['duplicates']:
+        print(f"⚠️  History: skipped {counts['duplicates']} entities with an already recorded key")
+
+def run_benchmark(path, snapshots, entities, churn=0.01, seed=5):
+    """Record `snapshots` exports of `entities` entities with `churn` changing each time, then time queries"""
+    from synthetic_data import generate_inventories
+
+    rng = random.Random(seed)
+    amplitude, _ = generate_inventories(entities, seed=seed)
+    # Carry entity hashes along the way an --incremental export does, rehashing only what changed
+    amplitude['entity_hashes'] = {section: {entity_key(e): entity_hash(e) for e in amplitude.get(section) or []}
+                                  for section in PLATFORM_SECTIONS['amplitude']}
+    start = datetime(2025, 1, 1)
+    with HistoryStore(path) as store:
+        started = time.perf_counter()
+        for i in range(snapshots):
+            for entity in rng.sample(amplitude['flags'], max(1, int(len(amplitude['flags']) * churn))):
+                entity['rolloutPercentage'] = rng.choice([0, 10, 25, 50, 100])
+                entity['enabled'] = not entity['enabled']
+                amplitude['entity_hashes']['flags'][entity_key(entity)] = entity_hash(entity)
+            store.record('amplitude', amplitude, (start + timedelta(hours=i)).isoformat())
+        elapsed = time.perf_counter() - started
+        versions = store.db.execute("SELECT COUNT(*) FROM versions").fetchone()[0]
+        print(f"🗄️  Recorded {snapshots} snapshots of {entities} entities in {elapsed:.1f}s "
+              f"({versions} versions stored, {os.path.getsize(path) / 1e6:.1f} MB)")
+
+        key = amplitude['flags'][0]['key']
+        middle = (start + timedelta(hours=snapshots // 2, minutes=30)).isoformat()
+        # A single-key as_of returns one entity (or None), not a collection to count
+        for label, query, single in (('as-of one key', lambda: store.as_of(middle, 'amplitude', key), True),
+                                     ('history of one key', lambda: store.history(key, 'amplitude'), False),
+                                     ('as-of full inventory', lambda: store.as_of(middle, 'amplitude'), False)):
+            started = time.perf_counter()
+            result = query()
+            elapsed = (time.perf_counter() - started) * 1000
+            size = int(result is not None) if single else len(result)
+            print(f"   ⏱️  {label}: {elapsed:.1f}ms ({size} results)")
+
+def _print_json(data):
+    print(json.dumps(data, indent=2, default=str))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot history of Amplitude and Statsig exports")
+    parser.add_argument('--db', default=DEFAULT_HISTORY_DB, help="history database (default: build/history.sqlite3)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="append a combined export file")
+    record.add_argument('platform', choices=sorted(PLATFORM_SECTIONS))
+    record.add_argument('file')
+    record.add_argument('--exported-at', help="override the export's timestamp")
+
+    listing = commands.add_parser('snapshots', help="list recorded snapshots")
+    listing.add_argument('--platform', choices=sorted(PLATFORM_SECTIONS))
+
+    as_of = commands.add_parser('as-of', help="entities as they were at a point in time")
+    as_of.add_argument('when', help="ISO timestamp or date, e.g. 2025-06-01T12:00")
+    as_of.add_argument('--platform', choices=sorted(PLATFORM_SECTIONS), default='amplitude')
+    as_of.add_argument('--key', help="print one entity instead of the inventory summary")
+
+    history = commands.add_parser('history', help="every version of a key and what changed")
+    history.add_argument('key')
+    history.add_argument('--platform', choices=sorted(PLATFORM_SECTIONS))
+    history.add_argument('--full', action='store_true', help="print each version's entity too")
+
+    benchmark = commands.add_parser('benchmark', help="time recording and queries on synthetic snapshots")
+    benchmark.add_argument('--snapshots', type=int, default=2000)
+    benchmark.add_argument('--entities', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.command == 'benchmark':
+        if os.path.exists(args.db):
+            print(f"❌ Refusing to benchmark into existing database {args.db}; pass --db with a new path")
+            return
+        run_benchmark(args.db, args.snapshots, args.entities)
+        return
+
+    with HistoryStore(args.db) as store:
+        if args.command == 'record':
+            counts = store.record_file(args.platform, args.file, args.exported_at)
+            print(f"🗄️  Recorded {counts['entities']} entities "
+                  f"(+{counts['added']} ~{counts['modified']} -{counts['removed']})")
+            if counts['duplicates']:
+                print(f"⚠️  Skipped {counts['duplicates']} entities with an already recorded key")
+        elif args.command == 'snapshots':
+            for snapshot in store.snapshots(args.platform):
+                print(f"   {snapshot['exported_at']}  {snapshot['platform']:<9} {snapshot['entities']:>6} entities  "
+                      f"+{snapshot['added']} ~{snapshot['modified']} -{snapshot['removed']}")
+        elif args.command == 'as-of':
+            if args.key:
+                entity = store.as_of(args.when, args.platform, args.key)
+                if entity is None:
+                    print(f"❌ {args.key} did not exist in {args.platform} at {args.when}")
+                else:
+                    _print_json(entity)
+            else:
+                entities = store.as_of(args.when, args.platform)
+                print(f"📋 {args.platform} as of {args.when}: {len(entities)} entities")
+                sections = {}
+                for section, _ in entities:
+                    sections[section] = sections.get(section, 0) + 1
+                for section, count in sorted(sections.items()):
+                    print(f"   - {section}: {count}")
+        elif args.command == 'history':
+            versions = store.history(args.key, args.platform)
+            if not versions:
+                print(f"❌ No history for {args.key}")
+            for version in versions:
+                until = version['valid_to'] or 'now'
+                print(f"📅 {version['valid_from']} → {until}  {version['platform']}/{version['section']}")
+                for path in version['changes']:
+                    print(f"   ~ {path}")
+                if args.full:
+                    _print_json(version['entity'])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Shared by both exporters: <project root>/build/http_cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build", "http_cache")
+
+class ResponseCache:
+    """On-disk HTTP cache keyed by URL that revalidates with ETag / Last-Modified
+
+    Each entry is a pair of files: <key>.json holding the validators and
+    <key>.body holding the response body. The body's mtime records when the
+    entry was last served, which drives age- and size-based eviction.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_age=None, max_bytes=None):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+        self.seconds_saved = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def _key(self, url, headers):
+        """Cache key for a URL, scoped to the credentials used to fetch it"""
+        credential = headers.get("Authorization") or headers.get("STATSIG-API-KEY") or ""
+        return hashlib.sha256(f"{credential}\n{url}".encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _read_meta(self, key):
+        meta_path, body_path = self._paths(key)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url, headers):
+        """Return request headers extended with If-None-Match / If-Modified-Since when cached"""
+        meta = self._read_meta(self._key(url, headers))
+        merged = dict(headers)
+        if meta:
+            if meta.get('etag'):
+                merged["If-None-Match"] = meta['etag']
+            if meta.get('last_modified'):
+                merged["If-Modified-Since"] = meta['last_modified']
+        return merged
+
+    def resolve(self, url, headers, status, response_headers, body, elapsed=0.0):
+        """Serve a 304 from disk or store a fresh 200; returns the (status, body) to use
+
+        Any other status is passed through untouched.
+        """
+        key = self._key(url, headers)
+        meta_path, body_path = self._paths(key)
+        if status == 304:
+            try:
+                with open(body_path, 'rb') as f:
+                    cached = f.read()
+            except OSError:
+                return status, body
+            os.utime(body_path)
+            meta = self._read_meta(key) or {}
+            with self._lock:
+                self.hits += 1
+                self.bytes_saved += len(cached)
+                self.hit_seconds += elapsed
+                self.seconds_saved += max(meta.get('fetch_seconds', 0.0) - elapsed, 0.0)
+            return 200, cached
+
+        if status == 200:
+            with self._lock:
+                self.misses += 1
+                self.bytes_downloaded += len(body)
+                self.miss_seconds += elapsed
+            lowered = {k.lower(): v for k, v in (response_headers or {}).items()}
+            etag = lowered.get('etag')
+            last_modified = lowered.get('last-modified')
+            if etag or last_modified:
+                self._write_atomic(body_path, body)
+                meta = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                        'stored_at': time.time(), 'fetch_seconds': elapsed}
+                self._write_atomic(meta_path, json.dumps(meta).encode())
+                if self.max_bytes is not None:
+                    self.evict()
+        return status, body
+
+    def _write_atomic(self, path, data):
+        """Write a cache file through a temp file so readers never see partial entries"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Drop entries unused for longer than max_age, then least-recently-used ones over max_bytes"""
+        if self.max_age is None and self.max_bytes is None:
+            return 0
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.body'):
+                continue
+            body_path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(body_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-len('.body')]))
+
+        now = time.time()
+        removed = 0
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for last_used, size, key in entries:
+            expired = self.max_age is not None and now - last_used > self.max_age
+            oversized = self.max_bytes is not None and total > self.max_bytes
+            if not (expired or oversized):
+                continue
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        """Hit/miss counters with the bandwidth and latency saved by revalidation
+
+        Latency saved compares each 304 round trip with the time the full
+        download took when the entry was stored.
+        """
+        with self._lock:
+            avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            avg_hit = self.hit_seconds / self.hits if self.hits else 0.0
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved,
+                'bytes_downloaded': self.bytes_downloaded,
+                'avg_hit_seconds': round(avg_hit, 4),
+                'avg_miss_seconds': round(avg_miss, 4),
+                'estimated_seconds_saved': round(self.seconds_saved, 4)
+            }
+
+    def print_stats(self):
+        """Print a one-line cache summary"""
+        stats = self.stats()
+        print(f"🗄️  HTTP cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['bytes_saved'] / 1024:.1f} KiB not re-downloaded, "
+              f"~{stats['estimated_seconds_saved']:.2f}s saved")
+
+def add_cache_arguments(parser):
+    """Register the --cache options shared by the exporters"""
+    parser.add_argument('--cache', action='store_true',
+                        help="revalidate responses against the on-disk cache in build/http_cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="cache directory (default: build/http_cache)")
+    parser.add_argument('--cache-max-age', type=float, default=None,
+                        help="evict entries unused for this many hours")
+    parser.add_argument('--cache-max-mb', type=float, default=None,
+                        help="evict least-recently-used entries beyond this size in MiB")
+
+def cache_from_args(args):
+    """Build a ResponseCache from parsed --cache options, or None when caching is off"""
+    if not args.cache:
+        return None
+    max_age = args.cache_max_age * 3600 if args.cache_max_age is not None else None
+    max_bytes = int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb is not None else None
+    return ResponseCache(args.cache_dir, max_age=max_age, max_bytes=max_bytes)
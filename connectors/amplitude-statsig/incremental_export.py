@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from export_writer import resolve_references, save_json
+
+# Fields the vendors use for an entity's last modification time
+MODIFIED_FIELDS = ('lastModifiedTime', 'lastModified', 'updatedAt', 'updated_at')
+# Seconds by which the vendors' clocks may run ahead of ours; entities stamped this close to the
+# previous export are hashed rather than trusted as unchanged
+CLOCK_SKEW_MARGIN = 60
+
+def entity_key(entity):
+    """Stable identifier of an exported entity"""
+    return entity.get('key') or entity.get('id') or entity.get('name') or ''
+
+def entity_hash(entity):
+    """Content hash of an entity, independent of dict key order"""
+    canonical = json.dumps(entity, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+def _timestamp(value):
+    """Convert an epoch (seconds or milliseconds) or ISO-8601 value to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+def modified_at(entity):
+    """Last modification time of an entity in epoch seconds, when the vendor reports one"""
+    for field in MODIFIED_FIELDS:
+        if field in entity:
+            return _timestamp(entity[field])
+    return None
+
+def export_settings(args):
+    """Options that change what an export writes; a snapshot taken with other settings is rewritten in full"""
+    versions = bool(getattr(args, 'versions', False))
+    return {'format': args.format, 'details': versions or bool(getattr(args, 'details', False)), 'versions': versions}
+
+def load_snapshot(filepath):
+    """Load the previous combined export, or None when there is no usable snapshot
+
+    Referenced entity files are only read when the snapshot predates
+    entity_hashes and the entities have to be hashed.
+    """
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath, 'r') as f:
+            snapshot = json.load(f)
+        if 'entity_hashes' not in snapshot:
+            snapshot = resolve_references(snapshot, os.path.dirname(filepath))
+        return snapshot
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable snapshot {filepath}: {e}")
+        return None
+
+class DeltaTracker:
+    """Diffs a fresh export against the previous snapshot, entity by entity
+
+    Entities whose lastModified timestamp predates the previous export's
+    start by more than CLOCK_SKEW_MARGIN are taken as unchanged without
+    hashing; everything else is compared by content hash. exported_at must
+    therefore be taken before the fetch, so an entity edited while the
+    export ran is hashed again next time. When the snapshot was written
+    with other export settings (format, --details, --versions), nothing is
+    skipped and has_changes() is true, so the export is written again.
+    Works on lists and on paginated streams alike.
+    """
+
+    def __init__(self, previous_snapshot, sections, settings=None):
+        previous_snapshot = previous_snapshot or {}
+        self.sections = sections
+        self.previous_exported_at = previous_snapshot.get('exported_at')
+        self.previous_settings = previous_snapshot.get('export_settings')
+        self.settings = settings
+        self.settings_changed = bool(previous_snapshot) and settings is not None and self.previous_settings != settings
+        self.since = _timestamp(self.previous_exported_at) if self.previous_exported_at else None
+        if self.since is not None:
+            self.since -= CLOCK_SKEW_MARGIN
+        if self.settings_changed:
+            # Entities fetched with other settings carry other fields, so every one is hashed again
+            self.since = None
+        stored_hashes = previous_snapshot.get('entity_hashes') or {}
+        self.previous_hashes = {}
+        for section in sections:
+            if section in stored_hashes:
+                self.previous_hashes[section] = stored_hashes[section]
+            else:
+                entities = previous_snapshot.get(section) or []
+                self.previous_hashes[section] = {entity_key(e): entity_hash(e) for e in entities}
+        self.hashes = {section: {} for section in sections}
+        self.changes = {section: {'added': [], 'removed': [], 'modified': []} for section in sections}
+        self.unhashed = 0
+
+    def track(self, section, entities):
+        """Yield entities unchanged while recording how they differ from the snapshot"""
+        previous = self.previous_hashes[section]
+        current = self.hashes[section]
+        changes = self.changes[section]
+        for entity in entities:
+            key = entity_key(entity)
+            stamp = modified_at(entity)
+            if key in previous and self.since is not None and stamp is not None and stamp <= self.since:
+                current[key] = previous[key]
+                self.unhashed += 1
+            else:
+                current[key] = entity_hash(entity)
+                if key not in previous:
+                    changes['added'].append(key)
+                elif previous[key] != current[key]:
+                    changes['modified'].append(key)
+            yield entity
+        changes['removed'] = sorted(set(previous) - set(current))
+
+    def has_changes(self):
+        """Whether any section gained, lost or changed an entity, or the export settings changed"""
+        return self.settings_changed or any(c['added'] or c['removed'] or c['modified']
+                                            for c in self.changes.values())
+
+    def changelog(self, exported_at):
+        """Compact record of added, removed and modified keys per section"""
+        changelog = {
+            'from': self.previous_exported_at,
+            'to': exported_at,
+            'changes': {section: {kind: keys for kind, keys in c.items() if keys}
+                        for section, c in self.changes.items()}
+        }
+        if self.settings_changed:
+            changelog['settings'] = {'from': self.previous_settings, 'to': self.settings}
+        return changelog
+
+    def print_summary(self):
+        """Print per-section change counts"""
+        since = self.previous_exported_at or "no previous snapshot"
+        print(f"\n🔁 Changes since {since}:")
+        for section, c in self.changes.items():
+            print(f"   - {section}: +{len(c['added'])} -{len(c['removed'])} ~{len(c['modified'])}")
+        if self.unhashed:
+            print(f"   ({self.unhashed} entities skipped by lastModified)")
+        if self.settings_changed:
+            print(f"   (export settings changed from {self.previous_settings} to {self.settings}; rewriting in full)")
+
+def save_changelog(changelog, filename, directory):
+    """Write the change log as compact JSON next to the snapshot"""
+    save_json(changelog, filename, directory, fmt='compact')
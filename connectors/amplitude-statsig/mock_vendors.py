@@ -0,0 +1,259 @@
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic_data import generate_inventories
+
+AMPLITUDE_PREFIX = '/api/1'
+STATSIG_PREFIX = '/console/v1'
+
+# Console API list path -> section of a Statsig export
+STATSIG_ENDPOINTS = {'experiments': 'experiments', 'gates': 'feature_gates', 'dynamic_configs': 'dynamic_configs'}
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # A deep listen backlog, so bursts of concurrent connections are not refused
+    request_queue_size = 1024
+    daemon_threads = True
+
+class MockVendorServer:
+    """Local stand-in for the Amplitude Management API and the Statsig Console API
+
+    Serves synthetic inventories from synthetic_data on /api/1/{flags,
+    experiments,deployments} and /console/v1/{experiments,gates,
+    dynamic_configs}, including per-entity detail, version history,
+    page/limit pagination and ETag revalidation. POST to a Statsig list
+    path creates an entity and POST to /console/v1/<list>/<id> updates
+    one, so imports can be run against it; `missing` is the share of
+    Amplitude entities with no Statsig counterpart yet. Every request waits
+    `latency` seconds (jittered) and fails with a retryable 503 at
+    `error_rate`. Requests are counted by endpoint kind and status.
+    """
+
+    def __init__(self, size=1000, latency=0.0, error_rate=0.0, seed=42, payload_kb=0, missing=0.03):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.amplitude, self.statsig = generate_inventories(size, seed=seed, payload_kb=payload_kb, missing=missing)
+        self.rng = random.Random(seed)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._by_id = {}
+        for section in ('flags', 'experiments'):
+            for entity in self.amplitude[section]:
+                self._by_id[('amplitude', section, entity['id'])] = entity
+        for path, section in STATSIG_ENDPOINTS.items():
+            for entity in self.statsig[section]:
+                self._by_id[('statsig', path, entity['id'])] = entity
+        self._server = None
+        self._thread = None
+
+    @property
+    def amplitude_url(self):
+        return f"{self.url}{AMPLITUDE_PREFIX}"
+
+    @property
+    def statsig_url(self):
+        return f"{self.url}{STATSIG_PREFIX}"
+
+    def start(self):
+        """Serve on an ephemeral localhost port from a daemon thread"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, each response waits for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._handle(self)
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _MockHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def snapshot_counts(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def _count(self, kind, status):
+        with self._lock:
+            self.counts[f"{kind}:{status}"] += 1
+            self.counts['total'] += 1
+
+    def _route(self, path, query):
+        """(request kind, response body) for a path, or (kind, None) when not found"""
+        if path.startswith(AMPLITUDE_PREFIX + '/'):
+            parts = path[len(AMPLITUDE_PREFIX) + 1:].split('/')
+            section = parts[0]
+            if section not in ('flags', 'experiments', 'deployments'):
+                return 'unknown', None
+            if len(parts) == 1:
+                return 'list', self.amplitude[section]
+            entity = self._by_id.get(('amplitude', section, parts[1]))
+            if entity is None:
+                return 'detail', None
+            if len(parts) == 3 and parts[2] == 'versions':
+                return 'versions', _versions(entity)
+            return 'detail', entity
+
+        if path.startswith(STATSIG_PREFIX + '/'):
+            parts = path[len(STATSIG_PREFIX) + 1:].split('/')
+            if parts[0] == 'audit_logs':
+                return 'versions', {'data': _versions({'id': query.get('id', [''])[0]})}
+            section = STATSIG_ENDPOINTS.get(parts[0])
+            if section is None:
+                return 'unknown', None
+            if len(parts) == 2:
+                entity = self._by_id.get(('statsig', parts[0], parts[1]))
+                return 'detail', None if entity is None else {'data': entity}
+            items = self.statsig[section]
+            if 'page' not in query:
+                return 'list', {'data': items}
+            page, limit = int(query['page'][0]), int(query.get('limit', ['100'])[0])
+            data = items[(page - 1) * limit:page * limit]
+            return 'page', {'data': data, 'pagination': {'nextPage': page + 1 if page * limit < len(items) else None}}
+        return 'unknown', None
+
+    def _write(self, path, payload):
+        """(request kind, status, response body) for a Statsig create or update"""
+        parts = path[len(STATSIG_PREFIX) + 1:].split('/') if path.startswith(STATSIG_PREFIX + '/') else []
+        section = STATSIG_ENDPOINTS.get(parts[0]) if parts else None
+        if section is None or len(parts) > 2 or not isinstance(payload, dict):
+            return 'unknown', 404, {'error': 'not found'}
+        with self._lock:
+            if len(parts) == 1:
+                entity_id = payload.get('id') or payload.get('name')
+                if not entity_id:
+                    return 'create', 400, {'message': 'id or name is required'}
+                if ('statsig', parts[0], entity_id) in self._by_id:
+                    return 'create', 400, {'message': f"{entity_id} already exists"}
+                entity = dict(payload, id=entity_id, lastModifiedTime=int(time.time() * 1000))
+                self.statsig[section].append(entity)
+                self._by_id[('statsig', parts[0], entity_id)] = entity
+                return 'create', 201, {'data': entity}
+            entity = self._by_id.get(('statsig', parts[0], parts[1]))
+            if entity is None:
+                return 'update', 404, {'error': 'not found'}
+            entity.update(payload, id=parts[1], lastModifiedTime=int(time.time() * 1000))
+            return 'update', 200, {'data': entity}
+
+    def _handle(self, request):
+        parsed = urllib.parse.urlsplit(request.path)
+        if parsed.path == '/__stats':
+            return _respond(request, 200, json.dumps(self.snapshot_counts()).encode())
+        if request.command == 'POST':
+            # The body is read before any injected failure so the kept-alive connection stays in sync
+            length = int(request.headers.get('Content-Length') or 0)
+            try:
+                payload = json.loads(request.rfile.read(length) or b'null')
+            except ValueError:
+                payload = None
+            kind = 'write'
+        else:
+            kind, body = self._route(parsed.path, urllib.parse.parse_qs(parsed.query))
+        if self.latency:
+            time.sleep(self.latency * (0.5 + self.rng.random()))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self._count(kind, 503)
+            return _respond(request, 503, b'{"error": "unavailable"}', {'Retry-After': '0'})
+        if request.command == 'POST':
+            kind, status, body = self._write(parsed.path, payload)
+            self._count(kind, status)
+            return _respond(request, status, json.dumps(body).encode(), {'Content-Type': 'application/json'})
+        if body is None:
+            self._count(kind, 404)
+            return _respond(request, 404, b'{"error": "not found"}')
+        data = json.dumps(body).encode()
+        etag = f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            self._count(kind, 304)
+            return _respond(request, 304, b'', {'ETag': etag})
+        self._count(kind, 200)
+        return _respond(request, 200, data, {'ETag': etag, 'Content-Type': 'application/json'})
+
+def _serve(parameters, urls):
+    server = MockVendorServer(**parameters).start()
+    urls.put(server.url)
+    server._thread.join()
+
+class MockVendorProcess:
+    """A MockVendorServer in a child process, so its CPU time and memory stay out of measurements
+
+    Request counts are read back over the server's /__stats endpoint.
+    """
+
+    def __init__(self, size=1000, latency=0.0, error_rate=0.0, seed=42, payload_kb=0, missing=0.03):
+        self.parameters = {'size': size, 'latency': latency, 'error_rate': error_rate, 'seed': seed,
+                           'payload_kb': payload_kb, 'missing': missing}
+        self._process = None
+
+    @property
+    def amplitude_url(self):
+        return f"{self.url}{AMPLITUDE_PREFIX}"
+
+    @property
+    def statsig_url(self):
+        return f"{self.url}{STATSIG_PREFIX}"
+
+    def start(self, timeout=300):
+        urls = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve, args=(self.parameters, urls), daemon=True)
+        self._process.start()
+        self.url = urls.get(timeout=timeout)
+        return self
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def snapshot_counts(self):
+        with urllib.request.urlopen(f"{self.url}/__stats") as response:
+            return json.loads(response.read())
+
+def _versions(entity):
+    return [{'version': n, 'entityId': entity.get('id'), 'createdAt': f"2025-0{n}-01T00:00:00Z"} for n in (1, 2, 3)]
+
+def _respond(request, status, body, headers=None):
+    request.send_response(status)
+    for name, value in (headers or {}).items():
+        request.send_header(name, value)
+    request.send_header('Content-Length', str(len(body)))
+    request.end_headers()
+    if body:
+        request.wfile.write(body)
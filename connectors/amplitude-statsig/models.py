@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import time
+
+from export_reader import open_export
+
+# Payload JSON up to this length is interned, so the many identical small payloads share one string
+INTERN_PAYLOAD_CHARS = 64
+# json.dumps with non-default separators builds a new encoder per call; one is shared instead
+_compact = json.JSONEncoder(separators=(',', ':')).encode
+
+def _intern(value):
+    """Interned text for values that repeat across entities (modes, states, segment and property names)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _strings(values):
+    return tuple(map(_intern, values or ()))
+
+def _encode(value):
+    """A payload kept as compact JSON text until it is read, or None when absent"""
+    if value is None:
+        return None
+    text = _compact(value)
+    return sys.intern(text) if len(text) <= INTERN_PAYLOAD_CHARS else text
+
+def _decode(text):
+    return None if text is None else json.loads(text)
+
+class Variant:
+    """An Amplitude variant or a Statsig experiment group; the payload is decoded on each access"""
+    __slots__ = ('key', 'weight', '_payload')
+
+    def __init__(self, key, weight=None, payload=None):
+        self.key = _intern(key)
+        self.weight = weight
+        self._payload = _encode(payload)
+
+    @property
+    def payload(self):
+        return _decode(self._payload)
+
+    def __repr__(self):
+        return f"Variant({self.key!r}, weight={self.weight!r})"
+
+class Condition:
+    """One targeting condition in its vendor's vocabulary (Amplitude prop/op or Statsig field/operator)"""
+    __slots__ = ('type', 'field', 'operator', 'values')
+
+    def __init__(self, type, field, operator, values):
+        self.type = _intern(type)
+        self.field = _intern(field)
+        self.operator = _intern(operator)
+        self.values = _strings(values if isinstance(values, (list, tuple)) else [values])
+
+    @classmethod
+    def from_amplitude(cls, condition):
+        return cls(condition.get('type'), condition.get('prop'), condition.get('op'), condition.get('values'))
+
+    @classmethod
+    def from_statsig(cls, condition):
+        values = condition.get('targetValue')
+        return cls(condition.get('type'), condition.get('field'), condition.get('operator'),
+                   () if values is None else values)
+
+    def __repr__(self):
+        return f"Condition({self.field!r} {self.operator} {list(self.values)!r})"
+
+class Rule:
+    """An Amplitude segment or a Statsig rule: the share of matching users that pass"""
+    __slots__ = ('name', 'percentage', 'conditions', '_return_value')
+
+    def __init__(self, name, percentage, conditions=(), return_value=None):
+        self.name = _intern(name)
+        self.percentage = percentage
+        self.conditions = tuple(conditions)
+        self._return_value = _encode(return_value)
+
+    @classmethod
+    def from_amplitude(cls, segment):
+        return cls(segment.get('name'), segment.get('percentage'),
+                   [Condition.from_amplitude(c) for c in segment.get('conditions') or []])
+
+    @classmethod
+    def from_statsig(cls, rule):
+        return cls(rule.get('name'), rule.get('passPercentage'),
+                   [Condition.from_statsig(c) for c in rule.get('conditions') or []], rule.get('returnValue'))
+
+    @property
+    def return_value(self):
+        return _decode(self._return_value)
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, {self.percentage!r}%, {len(self.conditions)} conditions)"
+
+def _amplitude_variants(entity):
+    weights = entity.get('rolloutWeights') if isinstance(entity.get('rolloutWeights'), dict) else {}
+    return tuple(Variant(v.get('key'), weights.get(v.get('key')), v.get('payload'))
+                 for v in entity.get('variants') or [])
+
+class Flag:
+    """An Amplitude feature flag"""
+    __slots__ = ('id', 'key', 'name', 'description', 'enabled', 'evaluation_mode', 'bucketing_key',
+                 'bucketing_salt', 'rollout', 'variants', 'rules', 'deployments', 'tags', 'last_modified')
+
+    def __init__(self, key, name=None, enabled=False, id=None, description='', evaluation_mode=None,
+                 bucketing_key=None, bucketing_salt=None, rollout=None, variants=(), rules=(), deployments=(),
+                 tags=(), last_modified=None):
+        self.id = id
+        self.key = key
+        self.name = name
+        self.description = description
+        self.enabled = enabled
+        self.evaluation_mode = _intern(evaluation_mode)
+        self.bucketing_key = _intern(bucketing_key)
+        self.bucketing_salt = bucketing_salt
+        self.rollout = rollout
+        self.variants = tuple(variants)
+        self.rules = tuple(rules)
+        self.deployments = _strings(deployments)
+        self.tags = _strings(tags)
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_amplitude(cls, entity):
+        return cls(entity.get('key'), entity.get('name'), bool(entity.get('enabled')), entity.get('id'),
+                   entity.get('description') or '', entity.get('evaluationMode'), entity.get('bucketingKey'),
+                   entity.get('bucketingSalt'), entity.get('rolloutPercentage'), _amplitude_variants(entity),
+                   [Rule.from_amplitude(s) for s in entity.get('segments') or []], entity.get('deployments'),
+                   entity.get('tags'), entity.get('lastModified'))
+
+    def __repr__(self):
+        return f"Flag({self.key!r}, enabled={self.enabled})"
+
+class Experiment:
+    """An Amplitude or Statsig experiment
+
+    state is the vendor's own value (Amplitude running / draft / ..., Statsig
+    active / setup / ...), rollout is Amplitude's rollout percentage or
+    Statsig's allocation, and variants are Amplitude variants weighted by
+    rolloutWeights or Statsig groups weighted by size.
+    """
+    __slots__ = ('vendor', 'id', 'key', 'name', 'description', 'state', 'evaluation_mode', 'bucketing_key',
+                 'bucketing_salt', 'rollout', 'variants', 'rules', 'deployments', 'tags', 'start_date',
+                 'targeting_gate', 'last_modified')
+
+    def __init__(self, vendor, key, name=None, state=None, id=None, description='', evaluation_mode=None,
+                 bucketing_key=None, bucketing_salt=None, rollout=None, variants=(), rules=(), deployments=(),
+                 tags=(), start_date=None, targeting_gate=None, last_modified=None):
+        self.vendor = _intern(vendor)
+        self.id = id
+        self.key = key
+        self.name = name
+        self.description = description
+        self.state = _intern(state)
+        self.evaluation_mode = _intern(evaluation_mode)
+        self.bucketing_key = _intern(bucketing_key)
+        self.bucketing_salt = bucketing_salt
+        self.rollout = rollout
+        self.variants = tuple(variants)
+        self.rules = tuple(rules)
+        self.deployments = _strings(deployments)
+        self.tags = _strings(tags)
+        self.start_date = _intern(start_date)
+        self.targeting_gate = targeting_gate
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_amplitude(cls, entity):
+        return cls('amplitude', entity.get('key'), entity.get('name'), entity.get('state'), entity.get('id'),
+                   entity.get('description') or '', entity.get('evaluationMode'), entity.get('bucketingKey'),
+                   entity.get('bucketingSalt'), entity.get('rolloutPercentage'), _amplitude_variants(entity),
+                   [Rule.from_amplitude(s) for s in entity.get('segments') or []], entity.get('deployments'),
+                   entity.get('tags'), entity.get('startDate'), last_modified=entity.get('lastModified'))
+
+    @classmethod
+    def from_statsig(cls, entity):
+        allocation = entity.get('allocation')
+        variants = [Variant(g.get('name'), g.get('size'), g.get('parameterValues')) for g in entity.get('groups') or []]
+        return cls('statsig', entity.get('id') or entity.get('name'), entity.get('name'), entity.get('status'),
+                   entity.get('id'), entity.get('description') or '', bucketing_key=entity.get('idType'),
+                   rollout=allocation if isinstance(allocation, (int, float)) else None, variants=variants,
+                   tags=entity.get('tags'), targeting_gate=entity.get('targetingGateID'),
+                   last_modified=entity.get('lastModifiedTime'))
+
+    @property
+    def running(self):
+        return self.state in ('running', 'active')
+
+    def __repr__(self):
+        return f"Experiment({self.vendor}:{self.key!r}, state={self.state!r})"
+
+class Gate:
+    """A Statsig feature gate"""
+    __slots__ = ('id', 'name', 'description', 'enabled', 'rules', 'tags', 'last_modified')
+
+    def __init__(self, id, name=None, enabled=False, description='', rules=(), tags=(), last_modified=None):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.enabled = enabled
+        self.rules = tuple(rules)
+        self.tags = _strings(tags)
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_statsig(cls, entity):
+        return cls(entity.get('id') or entity.get('name'), entity.get('name'), bool(entity.get('isEnabled')),
+                   entity.get('description') or '', [Rule.from_statsig(r) for r in entity.get('rules') or []],
+                   entity.get('tags'), entity.get('lastModifiedTime'))
+
+    def __repr__(self):
+        return f"Gate({self.id!r}, enabled={self.enabled})"
+
+class DynamicConfig:
+    """A Statsig dynamic config; rule return values and the default value are decoded on access"""
+    __slots__ = ('id', 'name', 'description', 'enabled', 'rules', 'tags', 'last_modified', '_default_value')
+
+    def __init__(self, id, name=None, enabled=False, description='', rules=(), default_value=None, tags=(),
+                 last_modified=None):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.enabled = enabled
+        self.rules = tuple(rules)
+        self._default_value = _encode(default_value)
+        self.tags = _strings(tags)
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_statsig(cls, entity):
+        return cls(entity.get('id') or entity.get('name'), entity.get('name'), bool(entity.get('isEnabled')),
+                   entity.get('description') or '', [Rule.from_statsig(r) for r in entity.get('rules') or []],
+                   entity.get('defaultValue'), entity.get('tags'), entity.get('lastModifiedTime'))
+
+    @property
+    def default_value(self):
+        return _decode(self._default_value)
+
+    def __repr__(self):
+        return f"DynamicConfig({self.id!r}, enabled={self.enabled})"
+
+class Deployment:
+    """An Amplitude deployment (the client or server key flags are served to)"""
+    __slots__ = ('id', 'key', 'label')
+
+    def __init__(self, id, key=None, label=None):
+        self.id = _intern(id)
+        self.key = key
+        self.label = _intern(label)
+
+    @classmethod
+    def from_amplitude(cls, entity):
+        return cls(entity.get('id'), entity.get('key'), entity.get('label'))
+
+    def __repr__(self):
+        return f"Deployment({self.id!r}, {self.label!r})"
+
+AMPLITUDE_MODELS = {'flags': Flag.from_amplitude, 'experiments': Experiment.from_amplitude,
+                    'deployments': Deployment.from_amplitude}
+STATSIG_MODELS = {'experiments': Experiment.from_statsig, 'feature_gates': Gate.from_statsig,
+                  'dynamic_configs': DynamicConfig.from_statsig}
+
+def _load(export, models):
+    if isinstance(export, str):
+        export = open_export(export)
+    return {section: [build(entity) for entity in export.get(section) or []] for section, build in models.items()}
+
+def load_amplitude(export):
+    """{'flags': [Flag], 'experiments': [Experiment], 'deployments': [Deployment]} from a combined export
+
+    export may be a path, read entity by entity through open_export so the
+    raw dicts never pile up, or an already loaded export.
+    """
+    return _load(export, AMPLITUDE_MODELS)
+
+def load_statsig(export):
+    """{'experiments': [Experiment], 'feature_gates': [Gate], 'dynamic_configs': [DynamicConfig]} from a combined export"""
+    return _load(export, STATSIG_MODELS)
+
+def run_benchmark(total, seed=42, payload_kb=0):
+    """Load a synthetic export of `total` Amplitude entities (and its Statsig counterpart) as dicts and as models"""
+    import contextlib
+    import gc
+    import io
+    import os
+    import tempfile
+    import tracemalloc
+
+    from export_writer import load_export, save_json
+    from synthetic_data import generate_inventories
+
+    amplitude, statsig = generate_inventories(total, seed=seed, payload_kb=payload_kb)
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for platform, export in (('amplitude', amplitude), ('statsig', statsig)):
+                save_json(export, f"{platform}_complete_export.json", workdir)
+                paths[platform] = os.path.join(workdir, f"{platform}_complete_export.json")
+        del amplitude, statsig
+        size = sum(os.path.getsize(p) for p in paths.values()) / (1 << 20)
+        print(f"🧠 Memory benchmark: {total} Amplitude entities and their Statsig counterparts, {size:.1f}MB of JSON")
+        print(f"   {'loader':<10} {'retained':>10} {'peak':>10} {'time':>7}")
+        loaders = (('dicts', load_export, load_export), ('models', load_amplitude, load_statsig))
+        results = {}
+        for label, load_amplitude_export, load_statsig_export in loaders:
+            # Timed untraced, since tracemalloc slows allocation-heavy code unevenly; then traced for memory
+            started = time.perf_counter()
+            loaded = (load_amplitude_export(paths['amplitude']), load_statsig_export(paths['statsig']))
+            elapsed = time.perf_counter() - started
+            del loaded
+            gc.collect()
+            tracemalloc.start()
+            loaded = (load_amplitude_export(paths['amplitude']), load_statsig_export(paths['statsig']))
+            gc.collect()
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[label] = retained
+            print(f"   {label:<10} {retained / (1 << 20):>8.1f}MB {peak / (1 << 20):>8.1f}MB {elapsed:>6.2f}s")
+            del loaded
+        print(f"   📉 Models retain {1 - results['models'] / results['dicts']:.0%} less memory than dicts")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory benchmark for the slotted domain models")
+    parser.add_argument('--benchmark', type=int, metavar='N', default=50000,
+                        help="number of synthetic Amplitude entities (default: 50000)")
+    parser.add_argument('--payload-kb', type=int, default=0, help="payload size per variant in KB (default: 0)")
+    args = parser.parse_args(argv)
+    run_benchmark(args.benchmark, payload_kb=args.payload_kb)
+
+if __name__ == "__main__":
+    main()
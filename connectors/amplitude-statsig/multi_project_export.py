@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from export_reader import open_export
+from export_writer import ExportWriter
+from history_store import record_history
+from request_scheduler import ExportError
+from telemetry import run_report, stage, telemetry_from_args
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            "build", "projects")
+
+# Platform -> (sections of its combined export, fields namespaced with the project name)
+PLATFORMS = {
+    'amplitude': (('flags', 'experiments', 'deployments'), ('key',)),
+    'statsig': (('experiments', 'feature_gates', 'dynamic_configs'), ('id', 'name')),
+}
+_PROJECT_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+def load_projects(filepath):
+    """Projects from a JSON config, with their API keys resolved
+
+    The file holds {"projects": [{"name": "ios", "amplitude_key_env":
+    "AMPLITUDE_IOS_KEY", "statsig_key_env": "STATSIG_IOS_KEY"}, ...]}. A key
+    may also be given inline as amplitude_key / statsig_key, and
+    amplitude_base_url / statsig_base_url point a project at another API
+    host (such as Amplitude's EU data center). A project may have only one
+    platform. Raises ValueError for an invalid config.
+    """
+    with open(filepath, 'r') as f:
+        config = json.load(f)
+    projects = []
+    for entry in config.get('projects') or []:
+        name = entry.get('name')
+        if not name or not _PROJECT_NAME.match(name):
+            raise ValueError(f"Project names must be letters, digits, '-' or '_': {name!r}")
+        if name in PLATFORMS:
+            raise ValueError(f"{name!r} is reserved for the merged snapshot's directory")
+        if any(p['name'] == name for p in projects):
+            raise ValueError(f"Duplicate project name: {name}")
+        project = {'name': name}
+        for platform in PLATFORMS:
+            key = entry.get(f"{platform}_key")
+            variable = entry.get(f"{platform}_key_env")
+            if not key and variable:
+                key = os.getenv(variable)
+                if not key:
+                    raise ValueError(f"{name}: environment variable {variable} is not set")
+            if key:
+                project[platform] = {'key': key, 'base_url': entry.get(f"{platform}_base_url")}
+        if not any(platform in project for platform in PLATFORMS):
+            raise ValueError(f"{name}: no Amplitude or Statsig API key configured")
+        projects.append(project)
+    if not projects:
+        raise ValueError(f"{filepath} lists no projects")
+    return projects
+
+def export_project(project, args, output_dir):
+    """Export one project's platforms into <output_dir>/<name>/<platform>; runs in a worker process
+
+    Output goes to <name>/export.log. Returns a small summary rather than
+    the entities, which the merge reads back from disk; failures are
+    returned as messages because ExportError does not survive pickling.
+    """
+    import amplitude_export_urllib
+    import statsig_export
+
+    exporters = {'amplitude': amplitude_export_urllib.run_export, 'statsig': statsig_export.run_export}
+    directory = os.path.join(output_dir, project['name'])
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    result = {'name': project['name'], 'exports': {}, 'error': None}
+    with open(os.path.join(directory, 'export.log'), 'w') as log, contextlib.redirect_stdout(log):
+        telemetry_from_args(args, f"multi_project_{project['name']}")
+        try:
+            with run_report(), ThreadPoolExecutor(max_workers=2, thread_name_prefix='export') as pool:
+                futures = {}
+                for platform, run_export in exporters.items():
+                    if platform in project:
+                        credentials = project[platform]
+                        futures[platform] = pool.submit(run_export, args, credentials['key'], None,
+                                                        os.path.join(directory, platform), credentials['base_url'])
+                for platform, future in futures.items():
+                    future.result()
+                    result['exports'][platform] = os.path.join(directory, platform, f"{platform}_complete_export.json")
+        except ExportError as e:
+            print(f"\n❌ Export failed, the export would be incomplete: {e}")
+            result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+def _namespaced(section, project, fields, counts):
+    """Entities of one project's section, tagged with the project and with their identifiers prefixed"""
+    for entity in section:
+        entity = dict(entity, project=project)
+        for field in fields:
+            if entity.get(field):
+                entity[field] = f"{project}/{entity[field]}"
+        counts[project] = counts.get(project, 0) + 1
+        yield entity
+
+def merge_exports(results, platform, output_dir, fmt='pretty'):
+    """Merge every project's export of one platform into <output_dir>/<platform>; returns the combined path
+
+    Sections are streamed project by project from the per-project files, so
+    the merged inventory is never held in memory.
+    """
+    sections, fields = PLATFORMS[platform]
+    exports = [(r['name'], open_export(r['exports'][platform])) for r in results if platform in r['exports']]
+    directory = os.path.join(output_dir, platform)
+    exported_at = datetime.now().isoformat()
+    counts = {section: {} for section in sections}
+    with ExportWriter(directory, fmt) as writer:
+        written = {}
+        for section in sections:
+            entities = (entity for project, export in exports
+                        for entity in _namespaced(export.get(section) or [], project, fields, counts[section]))
+            written[section] = writer.write_entities(f"{platform}_{section}", entities)
+        # Top-level arrays read back as entity sections, so the project list lives in the summary
+        header = {'exported_at': exported_at}
+        trailer = {'summary': {f"total_{section}": written[section][1] for section in sections}}
+        trailer['summary']['projects'] = [project for project, _ in exports]
+        trailer['summary']['by_project'] = {project: {section: counts[section].get(project, 0) for section in sections}
+                                            for project, _ in exports}
+        writer.write_combined(f"{platform}_complete_export.json", header, written, trailer)
+    return os.path.join(directory, f"{platform}_complete_export.json"), exported_at
+
+def add_arguments(parser):
+    """Register the multi-project options on a parser that already has both exporters' options"""
+    parser.add_argument('--config', required=True, metavar='FILE',
+                        help="JSON file listing the projects and where to find their API keys")
+    parser.add_argument('--project-workers', type=int, default=None,
+                        help="projects exported at once, one process each (default: all of them)")
+    parser.add_argument('--output-dir', default=PROJECTS_DIR,
+                        help="per-project exports go to <dir>/<project>, the merged snapshot to "
+                             "<dir>/amplitude and <dir>/statsig (default: build/projects)")
+
+def parse_args(argv=None):
+    """Parse options: both exporters' options plus the project config"""
+    import amplitude_export_urllib
+    import statsig_export
+
+    parser = argparse.ArgumentParser(conflict_handler='resolve',
+                                     description="Export several Amplitude and Statsig projects in parallel and "
+                                                 "merge them into one namespaced snapshot")
+    # The exporters share --incremental, --format, --cache and the rest; the later registration wins
+    amplitude_export_urllib.add_arguments(parser)
+    statsig_export.add_arguments(parser)
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'multi_project_export')
+    print("🔄 Multi-project Amplitude / Statsig Export")
+    print("="*50)
+    try:
+        projects = load_projects(args.config)
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid project config {args.config}: {e}")
+        sys.exit(2)
+
+    # Each project's history would overwrite the others'; the merged snapshot is recorded instead
+    worker_args = argparse.Namespace(**vars(args))
+    worker_args.history = None
+    workers = args.project_workers or len(projects)
+    print(f"🚀 Exporting {len(projects)} projects in {min(workers, len(projects))} processes...")
+    started = time.perf_counter()
+    results = []
+    with stage('export'), ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(export_project, project, worker_args, args.output_dir) for project in projects]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            log = os.path.join(args.output_dir, result['name'], 'export.log')
+            if result['error']:
+                print(f"   ❌ {result['name']}: {result['error']} ({result['seconds']:.2f}s, see {log})")
+            else:
+                print(f"   ✓ {result['name']}: {', '.join(result['exports'])} in {result['seconds']:.2f}s")
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda r: [p['name'] for p in projects].index(r['name']))
+    print(f"⏱️  {len(projects)} projects in {elapsed:.2f}s (slowest {max(r['seconds'] for r in results):.2f}s, "
+          f"sum {sum(r['seconds'] for r in results):.2f}s)")
+
+    failed = [r['name'] for r in results if r['error']]
+    if failed:
+        raise ExportError('multi-project', f"{', '.join(failed)} failed; merged snapshot left untouched")
+
+    print("\n🔗 Merging projects into one namespaced snapshot...")
+    with stage('merge'):
+        for platform in PLATFORMS:
+            if any(platform in r['exports'] for r in results):
+                merged, exported_at = merge_exports(results, platform, args.output_dir, args.format)
+                record_history(args, platform, merged, exported_at)
+    print(f"\n✅ Multi-project export completed: {args.output_dir}")
+
+if __name__ == "__main__":
+    try:
+        with run_report():
+            main()
+    except ExportError as e:
+        print(f"\n❌ Export failed, the export would be incomplete: {e}")
+        sys.exit(1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from request_scheduler import ExportError
+from telemetry import run_report, stage, telemetry_from_args
+
+# Subcommand -> (module whose main() it runs, summary); modules are imported only when their command runs
+COMMANDS = {
+    'amplitude': ('amplitude_export_urllib', "export Amplitude flags, experiments and deployments"),
+    'statsig': ('statsig_export', "export Statsig and diff it against the last Amplitude export"),
+    'import': ('statsig_import', "create or update the migration candidates in Statsig"),
+    'projects': ('multi_project_export', "export several projects in parallel into one namespaced snapshot"),
+    'diff': ('bulk_diff', "diff the full inventories of the last two exports"),
+    'compare': ('compare_configs', "analyze and query the Amplitude export"),
+    'simulate': ('bucketing_simulator', "bucket users through both platforms' allocation of each experiment"),
+    'evaluate': ('rule_evaluator', "evaluate flag and gate targeting rules on user contexts"),
+    'scan': ('codebase_scanner', "find references to the exported keys in local repositories"),
+    'history': ('history_store', "record and query the snapshot history"),
+    'watch': ('drift_watch', "poll both platforms and emit drift events"),
+    'benchmark': ('benchmark_suite', "benchmark the pipeline against local mock vendors"),
+    'run': (None, "export both platforms concurrently and compare them in one process"),
+}
+
+def parse_run_args(argv=None):
+    """Parse options for `run`: both exporters' options plus the report selection"""
+    import amplitude_export_urllib
+    import statsig_export
+
+    parser = argparse.ArgumentParser(prog="pipeline.py run", conflict_handler='resolve',
+                                     description="Export Amplitude and Statsig concurrently, then diff and compare "
+                                                 "the exports in memory")
+    # The exporters share --incremental, --format, --cache and the rest; the later registration wins
+    amplitude_export_urllib.add_arguments(parser)
+    statsig_export.add_arguments(parser)
+    parser.add_argument('--report', nargs='+', metavar='KEY', default=[],
+                        help="also write <key>_comparison.json for each of these experiments (implies --targets)")
+    parser.add_argument('--sequential', action='store_true',
+                        help="export one platform after the other instead of both at once")
+    args = parser.parse_args(argv)
+    if args.report:
+        args.targets = list(dict.fromkeys((args.targets or []) + args.report))
+    return args
+
+def _staged(name, function, *args):
+    with stage(name):
+        return function(*args)
+
+def run_pipeline(argv=None):
+    """Export both platforms, then diff and compare the in-memory exports without reading them back"""
+    import amplitude_export_urllib
+    import statsig_export
+    from export_writer import save_json
+    from http_cache import cache_from_args
+
+    args = parse_run_args(argv)
+    telemetry_from_args(args, 'pipeline_run')
+    print("🔄 Amplitude → Statsig Pipeline")
+    print("="*50)
+
+    amplitude_key = os.getenv('AMPLITUDE_MANAGEMENT_API_KEY')
+    statsig_key = os.getenv('STATSIG_CONSOLE_API_KEY')
+    if not amplitude_key:
+        amplitude_export_urllib.print_missing_key()
+    if not statsig_key:
+        statsig_export.print_missing_key()
+    if not amplitude_key or not statsig_key:
+        return
+
+    # One cache for both exporters; entries are scoped by credential, so they never collide
+    cache = cache_from_args(args)
+    # The exports share nothing but the scheduler, which limits each vendor separately
+    with ThreadPoolExecutor(max_workers=1 if args.sequential else 2, thread_name_prefix='export') as pool:
+        amplitude = pool.submit(_staged, 'amplitude', amplitude_export_urllib.run_export, args, amplitude_key, cache)
+        statsig = pool.submit(_staged, 'statsig', statsig_export.run_export, args, statsig_key, cache)
+        amplitude, statsig = amplitude.result(), statsig.result()
+    if cache:
+        cache.print_stats()
+
+    report, comparisons, report_files = statsig_export.run_comparison(
+        args, amplitude, statsig, amplitude_experiments=amplitude['experiments'])
+    for key in args.report:
+        comparison = next((c for c in comparisons if c['experiment_key'] == key), None)
+        filename = f"{key.replace('-', '_')}_comparison.json"
+        if comparison is None:
+            print(f"❌ Could not find {key} in comparison results")
+            continue
+        save_json(comparison, filename, statsig_export.OUTPUT_DIR)
+        report_files.append(os.path.join(statsig_export.OUTPUT_DIR, filename))
+
+    print(f"\n✅ Pipeline completed: {report['summary']['paired']} pairs, {report['summary']['drifted']} drifted")
+    print(f"📁 Reports in {statsig_export.OUTPUT_DIR}:")
+    for filepath in report_files:
+        print(f"   - {os.path.basename(filepath)}")
+
+def print_usage():
+    print("usage: pipeline.py <command> [options]\n")
+    print("commands:")
+    for command, (_, summary) in COMMANDS.items():
+        print(f"  {command:<10} {summary}")
+    print("\nRun `pipeline.py <command> --help` for a command's options.")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return
+    command, options = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Unknown command: {command}\n")
+        print_usage()
+        sys.exit(2)
+    module, _ = COMMANDS[command]
+    if module is None:
+        run_pipeline(options)
+    else:
+        importlib.import_module(module).main(options)
+
+if __name__ == "__main__":
+    try:
+        with run_report():
+            main()
+    except ExportError as e:
+        print(f"\n❌ Export failed, the export would be incomplete: {e}")
+        sys.exit(1)
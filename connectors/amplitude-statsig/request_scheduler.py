@@ -0,0 +1,220 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+# Sustained requests per second and burst size per vendor. Amplitude's
+# Management API and Statsig's Console API both throttle per key; these
+# defaults sit just under the documented limits and adapt on 429.
+VENDOR_LIMITS = {
+    'amplitude': {'rate': 5.0, 'burst': 10, 'max_in_flight': 4},
+    'statsig': {'rate': 10.0, 'burst': 20, 'max_in_flight': 8},
+}
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class ExportError(Exception):
+    """A request failed for good, so the export would be partial"""
+
+    def __init__(self, vendor, description, status=None):
+        super().__init__(f"{vendor}: {description}" + (f" (HTTP {status})" if status else ""))
+        self.vendor = vendor
+        self.description = description
+        self.status = status
+
+class TokenBucket:
+    """Thread-safe token bucket with additive-increase / multiplicative-decrease rate"""
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token if one is available; returns 0.0, or the seconds to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self._refill(max(now, self.updated))
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def throttled(self, pause=0.0):
+        """Halve the rate, drain the bucket and hold every caller for the vendor's pause"""
+        with self._lock:
+            now = time.monotonic()
+            # Concurrent 429s from the same burst count as one signal
+            if now >= self.paused_until:
+                self.rate = max(self.max_rate / 8, self.rate / 2)
+            self.tokens = 0.0
+            self.updated = now
+            self.paused_until = max(self.paused_until, now + pause)
+
+    def succeeded(self):
+        """Creep the rate back towards its configured maximum"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+def retry_after_seconds(headers):
+    """Parse a Retry-After header given as delta-seconds or an HTTP date"""
+    if not headers:
+        return None
+    value = None
+    for name, header_value in headers.items():
+        if name.lower() == 'retry-after':
+            value = header_value
+            break
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+class RequestScheduler:
+    """Funnels every connector request through per-vendor rate limits and retries
+
+    Each vendor gets a token bucket, a cap on in-flight requests, and
+    exponential backoff with full jitter that defers to Retry-After when
+    the vendor sends one. Requests that still fail raise ExportError.
+    """
+
+    def __init__(self, limits=None, max_retries=5, base_delay=0.5, max_delay=30.0):
+        self.limits = dict(VENDOR_LIMITS)
+        self.limits.update(limits or {})
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.throttle_events = 0
+
+    def _vendor(self, vendor):
+        """Bucket and in-flight semaphore for a vendor, created on first use"""
+        with self._lock:
+            if vendor not in self._buckets:
+                limits = self.limits.get(vendor, {'rate': 5.0, 'burst': 5, 'max_in_flight': 4})
+                self._buckets[vendor] = TokenBucket(limits['rate'], limits['burst'])
+                self._slots[vendor] = threading.BoundedSemaphore(limits['max_in_flight'])
+            return self._buckets[vendor], self._slots[vendor]
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before the next attempt: Retry-After if given, else capped exponential with full jitter"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _settle(self, vendor, bucket, description, attempt_number, status, headers, error):
+        """Judge one attempt: None when it succeeded, else the delay before retrying
+
+        Raises ExportError for rejected requests and once retries run out.
+        """
+        if error is None and status not in RETRYABLE_STATUSES:
+            if 200 <= status < 300 or status == 304:
+                bucket.succeeded()
+                return None
+            raise ExportError(vendor, f"request for {description} was rejected", status)
+
+        retry_after = retry_after_seconds(headers) if status == 429 else None
+        if status == 429:
+            bucket.throttled(retry_after or 0.0)
+            with self._lock:
+                self.throttle_events += 1
+        if attempt_number == self.max_retries:
+            if error is not None:
+                raise ExportError(vendor, f"request for {description} failed after {self.max_retries} retries: {error}")
+            raise ExportError(vendor, f"request for {description} failed after {self.max_retries} retries", status)
+        delay = self.backoff(attempt_number, retry_after)
+        reason = f"HTTP {status}" if error is None else str(error) or type(error).__name__
+        print(f"⏳ {vendor} {description}: {reason}, retrying in {delay:.1f}s "
+              f"({attempt_number + 1}/{self.max_retries})")
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def execute(self, vendor, description, attempt):
+        """Run attempt() under the vendor's limits until it succeeds or retries run out
+
+        attempt must return a (status, headers, result) tuple; the result of the
+        first non-retryable 2xx/304 response is returned.
+        """
+        bucket, slots = self._vendor(vendor)
+        for attempt_number in range(self.max_retries + 1):
+            bucket.acquire()
+            with slots:
+                try:
+                    status, headers, result = attempt()
+                except OSError as e:
+                    status, headers, result, error = None, None, None, e
+                else:
+                    error = None
+            delay = self._settle(vendor, bucket, description, attempt_number, status, headers, error)
+            if delay is None:
+                return result
+            time.sleep(delay)
+
+    async def execute_async(self, vendor, description, attempt):
+        """Coroutine version of execute for an async attempt(); waits never block the event loop
+
+        The vendor's token bucket and retry accounting are shared with
+        execute. Concurrency is bounded by the caller's connection limits
+        rather than the thread semaphore.
+        """
+        bucket, _ = self._vendor(vendor)
+        for attempt_number in range(self.max_retries + 1):
+            await bucket.acquire_async()
+            try:
+                status, headers, result = await attempt()
+            except (OSError, EOFError, asyncio.TimeoutError) as e:
+                status, headers, result, error = None, None, None, e
+            else:
+                error = None
+            delay = self._settle(vendor, bucket, description, attempt_number, status, headers, error)
+            if delay is None:
+                return result
+            await asyncio.sleep(delay)
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def get_scheduler():
+    """Process-wide scheduler shared by every exporter"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
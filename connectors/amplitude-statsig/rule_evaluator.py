@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+
+import argparse
+import functools
+import multiprocessing
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from bulk_diff import AMPLITUDE_SECTIONS, STATSIG_SECTIONS, load_inventory, pair_inventories
+from export_writer import iter_entities, save_json
+from structural_diff import DEFAULT_MAPPING
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          "build", "statsig")
+
+DEFAULT_CONTEXTS = 10000
+# Disagreeing contexts kept as examples per (flag, Amplitude rule, Statsig rule)
+EXAMPLES = 3
+# Below this many pairs the process pool costs more than it saves
+PARALLEL_THRESHOLD = 200
+CHUNK_SIZE = 100
+
+# Both platforms' operators mapped onto one set of compiled comparisons
+AMPLITUDE_OPERATORS = {
+    'is': 'any', 'is not': 'none', 'contains': 'contains_any', 'does not contain': 'contains_none',
+    'less': 'lt', 'less or equal': 'lte', 'greater': 'gt', 'greater or equal': 'gte',
+    'version less': 'version_lt', 'version less or equal': 'version_lte',
+    'version greater': 'version_gt', 'version greater or equal': 'version_gte',
+    'set contains': 'any', 'set does not contain': 'none', 'regex match': 'matches',
+}
+STATSIG_OPERATORS = {
+    'any': 'any', 'none': 'none', 'any_case_sensitive': 'any_case_sensitive',
+    'none_case_sensitive': 'none_case_sensitive', 'str_contains_any': 'contains_any',
+    'str_contains_none': 'contains_none', 'eq': 'any', 'neq': 'none',
+    'lt': 'lt', 'lte': 'lte', 'gt': 'gt', 'gte': 'gte',
+    'version_lt': 'version_lt', 'version_lte': 'version_lte', 'version_gt': 'version_gt',
+    'version_gte': 'version_gte', 'version_eq': 'version_eq', 'version_neq': 'version_neq',
+    'str_matches': 'matches',
+}
+# Statsig condition types that imply the user field they test, as context property names
+STATSIG_TYPE_FIELDS = {'user_id': 'user_id', 'country': 'country', 'app_version': 'app_version',
+                       'os_name': 'platform', 'browser_name': 'browser', 'email': 'email', 'ip_address': 'ip'}
+# Statsig user fields and the Amplitude property names the contexts use for them
+STATSIG_FIELD_ALIASES = {'userID': 'user_id', 'appVersion': 'app_version', 'osName': 'platform',
+                         'os_name': 'platform', 'browserName': 'browser', 'ip': 'ip'}
+# What an entity serves when it is switched off
+DISABLED = ('disabled', 0)
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value).lower()
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+@functools.lru_cache(maxsize=4096)
+def _version(value):
+    parts = re.findall(r'\d+', str(value))
+    if not parts:
+        return None
+    numbers = tuple(int(p) for p in parts[:4])
+    return numbers + (0,) * (4 - len(numbers))
+
+def _values(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+def _never(context):
+    return False
+
+def _always(context):
+    return True
+
+def compile_condition(field, operator, target):
+    """Predicate closure for one condition; None when the operator or its pattern is not supported
+
+    Target values are normalized once, into lookup sets for equality and
+    parsed numbers or versions for comparisons, so a call only normalizes the
+    context's value. A missing property matches only the negated operators.
+    """
+    targets = _values(target)
+    if operator in ('any', 'none'):
+        lookup = frozenset(_text(t) for t in targets)
+        negate = operator == 'none'
+
+        def predicate(context):
+            value = context.get(field)
+            if isinstance(value, (list, tuple)):
+                return any(_text(v) in lookup for v in value) != negate
+            return (_text(value) in lookup) != negate
+        return predicate
+    if operator in ('any_case_sensitive', 'none_case_sensitive'):
+        lookup = frozenset(str(t) for t in targets)
+        negate = operator == 'none_case_sensitive'
+        return lambda context: (context.get(field) is not None and str(context.get(field)) in lookup) != negate
+    if operator in ('contains_any', 'contains_none'):
+        needles = tuple(_text(t) for t in targets)
+        negate = operator == 'contains_none'
+
+        def predicate(context):
+            value = _text(context.get(field))
+            return (value is not None and any(n in value for n in needles)) != negate
+        return predicate
+    if operator in ('lt', 'lte', 'gt', 'gte'):
+        numbers = [n for n in (_number(t) for t in targets) if n is not None]
+        compare = {'lt': float.__lt__, 'lte': float.__le__, 'gt': float.__gt__, 'gte': float.__ge__}[operator]
+
+        def predicate(context):
+            value = _number(context.get(field))
+            return value is not None and any(compare(value, n) for n in numbers)
+        return predicate
+    if operator.startswith('version_'):
+        versions = [v for v in (_version(t) for t in targets) if v is not None]
+        compare = {'lt': tuple.__lt__, 'lte': tuple.__le__, 'gt': tuple.__gt__, 'gte': tuple.__ge__,
+                   'eq': tuple.__eq__, 'neq': tuple.__ne__}[operator[len('version_'):]]
+
+        def predicate(context):
+            value = context.get(field)
+            version = _version(value) if value is not None else None
+            return version is not None and any(compare(version, v) for v in versions)
+        return predicate
+    if operator == 'matches':
+        try:
+            patterns = [re.compile(str(t)) for t in targets]
+        except re.error:
+            # An invalid pattern cannot be evaluated here; the condition is reported as unsupported
+            return None
+
+        def predicate(context):
+            value = context.get(field)
+            return value is not None and any(p.search(str(value)) for p in patterns)
+        return predicate
+    return None
+
+def _all_of(predicates):
+    if not predicates:
+        return _always
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def predicate(context):
+        for p in predicates:
+            if not p(context):
+                return False
+        return True
+    return predicate
+
+class CompiledRules:
+    """An entity's ordered targeting rules compiled into predicate closures
+
+    evaluate(context) returns (rule name, pass percentage) of the first rule
+    whose conditions all hold, `default` when none does, or DISABLED when
+    the entity is switched off. Conditions that cannot be evaluated locally
+    (cohorts, other gates, unknown operators) never match; they are listed in
+    `unsupported`.
+    """
+
+    def __init__(self, name, enabled, rules, default):
+        self.name = name
+        self.enabled = enabled
+        self.rules = rules
+        self.default = default
+        self.unsupported = []
+
+    def evaluate(self, context):
+        if not self.enabled:
+            return DISABLED
+        for name, predicate, percentage in self.rules:
+            if predicate(context):
+                return name, percentage
+        return self.default
+
+def _percentage(value):
+    return 100 if value is None else value
+
+def compile_amplitude(entity, mapping=None):
+    """CompiledRules of an Amplitude flag: its segments in order, then the default rollout"""
+    mapping = mapping or DEFAULT_MAPPING
+    compiled = CompiledRules(entity.get('key'), entity.get('enabled', True), [],
+                             (mapping['catch_all_rule'], _percentage(entity.get('rolloutPercentage'))))
+    for position, segment in enumerate(entity.get('segments') or []):
+        predicates = []
+        for condition in segment.get('conditions') or []:
+            operator = AMPLITUDE_OPERATORS.get(condition.get('op'))
+            predicate = None
+            if condition.get('type', 'property') == 'property' and operator:
+                predicate = compile_condition(condition.get('prop'), operator, condition.get('values'))
+            if predicate is None:
+                compiled.unsupported.append(f"{condition.get('type')}:{condition.get('op')}")
+                predicate = _never
+            predicates.append(predicate)
+        name = segment.get('name') or f"segment {position + 1}"
+        compiled.rules.append((name, _all_of(predicates), _percentage(segment.get('percentage'))))
+    return compiled
+
+def compile_statsig(entity):
+    """CompiledRules of a Statsig gate or dynamic config: its rules in order; no match fails"""
+    compiled = CompiledRules(entity.get('name') or entity.get('id'), entity.get('isEnabled', True), [], (None, 0))
+    for position, rule in enumerate(entity.get('rules') or []):
+        predicates = []
+        for condition in rule.get('conditions') or []:
+            kind = condition.get('type')
+            if kind == 'public':
+                continue
+            field = condition.get('field') if kind in ('user_field', 'custom_field') else STATSIG_TYPE_FIELDS.get(kind)
+            operator = STATSIG_OPERATORS.get(condition.get('operator'))
+            predicate = None
+            if field and operator:
+                predicate = compile_condition(STATSIG_FIELD_ALIASES.get(field, field), operator,
+                                              condition.get('targetValue'))
+            if predicate is None:
+                compiled.unsupported.append(f"{kind}:{condition.get('operator')}")
+                predicate = _never
+            predicates.append(predicate)
+        name = rule.get('name') or f"rule {position + 1}"
+        compiled.rules.append((name, _all_of(predicates), _percentage(rule.get('passPercentage'))))
+    return compiled
+
+def evaluate_pair(pair, contexts, mapping=None):
+    """Evaluate one Amplitude flag and its Statsig gate or config on every context
+
+    The platforms agree on a context when they serve the same pass
+    percentage; the rule names may differ. Disagreements are counted per
+    (Amplitude rule, Statsig rule) with a few example contexts.
+    """
+    amplitude, statsig, statsig_kind = pair
+    amp_rules, st_rules = compile_amplitude(amplitude, mapping), compile_statsig(statsig)
+    amp_evaluate, st_evaluate = amp_rules.evaluate, st_rules.evaluate
+    disagreements = Counter()
+    examples = {}
+    for context in contexts:
+        amp, st = amp_evaluate(context), st_evaluate(context)
+        if amp[1] != st[1]:
+            outcome = (amp, st)
+            disagreements[outcome] += 1
+            if disagreements[outcome] <= EXAMPLES:
+                examples.setdefault(outcome, []).append(context)
+    total = sum(disagreements.values())
+    return {
+        'amplitude_key': amplitude.get('key'),
+        'statsig_name': st_rules.name,
+        'statsig_type': statsig_kind,
+        'contexts': len(contexts),
+        'disagreements': total,
+        'disagreement_rate': round(total / len(contexts), 5) if contexts else 0.0,
+        'by_rule': [{
+            'amplitude_rule': amp[0], 'amplitude_percentage': amp[1],
+            'statsig_rule': st[0], 'statsig_percentage': st[1],
+            'contexts': count, 'examples': examples[(amp, st)],
+        } for (amp, st), count in disagreements.most_common()],
+        'unsupported': sorted(set(amp_rules.unsupported + st_rules.unsupported)),
+    }
+
+def _evaluate_chunk(pairs, contexts, mapping=None):
+    return [evaluate_pair(pair, contexts, mapping) for pair in pairs]
+
+# Pairs and contexts inherited by forked workers, so only (start, end) bounds are pickled
+_shared = None
+
+def _evaluate_range(bounds, mapping=None):
+    pairs, contexts = _shared
+    return _evaluate_chunk(pairs[bounds[0]:bounds[1]], contexts, mapping)
+
+def evaluate_pairs(pairs, contexts, workers=None, mapping=None):
+    """Evaluate every pair, sharded across forked processes for large inventories"""
+    global _shared
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pairs) < PARALLEL_THRESHOLD or 'fork' not in multiprocessing.get_all_start_methods():
+        return _evaluate_chunk(pairs, contexts, mapping)
+    bounds = [(i, min(i + CHUNK_SIZE, len(pairs))) for i in range(0, len(pairs), CHUNK_SIZE)]
+    results = []
+    _shared = (pairs, contexts)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            for chunk in pool.map(functools.partial(_evaluate_range, mapping=mapping), bounds):
+                results.extend(chunk)
+    finally:
+        _shared = None
+    return results
+
+def targeting_pairs(amplitude_export, statsig_export, targets=None):
+    """(Amplitude flag, Statsig entity, type) for every flag paired with a gate or dynamic config"""
+    amplitude = [(kind, entity) for kind, entity in load_inventory(amplitude_export, AMPLITUDE_SECTIONS)
+                 if kind == 'flag' and (not targets or entity.get('key') in targets)]
+    statsig = load_inventory(statsig_export, STATSIG_SECTIONS)
+    pairs, _, _ = pair_inventories(amplitude, statsig)
+    return [(amp, st, st_kind) for _, amp, st_kind, st, _ in pairs if st_kind in ('gate', 'dynamic_config')]
+
+def build_report(pairs, contexts, workers=None, mapping=None):
+    """Disagreement report of every pair over every context"""
+    started = time.perf_counter()
+    results = evaluate_pairs(pairs, contexts, workers, mapping)
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda r: r['disagreements'], reverse=True)
+    by_rule = Counter()
+    for result in results:
+        for outcome in result['by_rule']:
+            by_rule[f"{outcome['amplitude_rule']} → {outcome['statsig_rule']}"] += outcome['contexts']
+    evaluations = 2 * len(pairs) * len(contexts)
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'summary': {
+            'pairs': len(pairs),
+            'contexts': len(contexts),
+            'disagreeing_pairs': sum(1 for r in results if r['disagreements']),
+            'disagreements': sum(r['disagreements'] for r in results),
+            'disagreements_by_rule': dict(by_rule.most_common()),
+            'with_unsupported_conditions': sum(1 for r in results if r['unsupported']),
+            'seconds': round(elapsed, 3),
+            'evaluations_per_second': round(evaluations / elapsed) if elapsed else None,
+        },
+        'pairs': results,
+    }
+
+def print_report_summary(report):
+    """Print the headline numbers and the flags that disagree most"""
+    summary = report['summary']
+    print(f"\n📋 TARGETING PARITY SUMMARY")
+    print("="*30)
+    print(f"🔗 {summary['pairs']} flag pairs × {summary['contexts']:,} contexts in {summary['seconds']:.2f}s "
+          f"({summary['evaluations_per_second'] or 0:,} rule evaluations/s)")
+    print(f"✅ Agreeing on every context: {summary['pairs'] - summary['disagreeing_pairs']}")
+    print(f"❌ Disagreeing: {summary['disagreeing_pairs']} ({summary['disagreements']:,} flag evaluations)")
+    for result in report['pairs'][:10]:
+        if not result['disagreements']:
+            break
+        worst = result['by_rule'][0]
+        print(f"   - {result['amplitude_key']}: {result['disagreement_rate']:.1%} of contexts, mostly "
+              f"{worst['amplitude_rule']} {worst['amplitude_percentage']}% → "
+              f"{worst['statsig_rule']} {worst['statsig_percentage']}%")
+    if summary['with_unsupported_conditions']:
+        print(f"⚠️  {summary['with_unsupported_conditions']} pairs have conditions that cannot be evaluated locally")
+
+def run_benchmark(contexts, total=2000, workers=None, seed=42):
+    """Evaluate `contexts` synthetic contexts against the flags and gates of `total` synthetic entities"""
+    from synthetic_data import generate_inventories, synthetic_contexts
+
+    amplitude, statsig = generate_inventories(total, seed=seed)
+    pairs = targeting_pairs(amplitude, statsig)
+    users = synthetic_contexts(contexts, seed)
+    started = time.perf_counter()
+    for amp, st, _ in pairs:
+        compile_amplitude(amp), compile_statsig(st)
+    compiling = time.perf_counter() - started
+    print(f"🧪 Compiled {len(pairs)} flag pairs in {compiling * 1000:.1f}ms")
+    for label, worker_count in (('serial', 1), ('sharded', workers)):
+        report = build_report(pairs, users, worker_count)
+        summary = report['summary']
+        rate = summary['pairs'] * summary['contexts'] / summary['seconds']
+        print(f"   ⏱️  {label}: {summary['seconds']:.2f}s, {rate * 60 / 1e6:,.1f}M context evaluations/min "
+              f"per platform pair ({summary['disagreeing_pairs']} pairs disagree)")
+
+def parse_args(argv=None):
+    """Parse command-line options for the evaluator"""
+    build_dir = os.path.dirname(OUTPUT_DIR)
+    parser = argparse.ArgumentParser(description="Evaluate exported Amplitude flags and their Statsig gates and "
+                                                 "configs on user contexts and report disagreements")
+    parser.add_argument('--amplitude', default=os.path.join(build_dir, "amplitude", "amplitude_complete_export.json"),
+                        help="Amplitude combined export")
+    parser.add_argument('--statsig', default=os.path.join(build_dir, "statsig", "statsig_complete_export.json"),
+                        help="Statsig combined export")
+    parser.add_argument('--targets', nargs='+', metavar='KEY', help="only evaluate these Amplitude flag keys")
+    parser.add_argument('--contexts', metavar='FILE',
+                        help="user contexts as a JSON array or NDJSON file (default: synthetic contexts)")
+    parser.add_argument('--count', type=int, default=DEFAULT_CONTEXTS,
+                        help=f"synthetic contexts to generate without --contexts (default: {DEFAULT_CONTEXTS})")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="evaluation processes for large inventories (default: one per CPU)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="directory for rule_disagreements.json")
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help="instead of reading exports, time N synthetic contexts against synthetic flags")
+    add_telemetry_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'rule_evaluator')
+    if args.benchmark:
+        run_benchmark(args.benchmark, workers=args.workers)
+        return
+
+    print("⚖️  Amplitude ↔ Statsig Targeting Parity")
+    print("="*50)
+    for filepath, script in ((args.amplitude, 'amplitude_export.py'), (args.statsig, 'statsig_export.py')):
+        if not os.path.exists(filepath):
+            print(f"❌ Export file not found: {filepath}")
+            print(f"\nFirst run: python3 {script}")
+            return
+
+    with stage('load'):
+        pairs = targeting_pairs(args.amplitude, args.statsig, args.targets)
+        if args.contexts:
+            contexts = list(iter_entities(args.contexts))
+        else:
+            from synthetic_data import synthetic_contexts
+            contexts = synthetic_contexts(args.count)
+    if not pairs:
+        print("⚠️  No Amplitude flag is paired with a Statsig gate or dynamic config")
+        return
+    with stage('evaluate'):
+        report = build_report(pairs, contexts, args.workers)
+    print_report_summary(report)
+    save_json(report, 'rule_disagreements.json', args.output_dir)
+
+if __name__ == "__main__":
+    with run_report():
+        main()
@@ -49,59 +49,27 @@ cd /Users/marcuss/agentic-dev || exit 1
 echo "🧹 Cleaning up old export files..."
 rm -f amplitude_*.json statsig_*.json mpu_*.json
 
-# Run the Amplitude export
-echo "🔄 Exporting data from Amplitude..."
-python3 connectors/amplitude-statsig/amplitude_export_urllib.py
+# Export both platforms concurrently, then diff and compare them in one process
+echo "🔄 Exporting data from Amplitude and Statsig and comparing experiments..."
+python3 connectors/amplitude-statsig/pipeline.py run --cache --targets \
+    mpu-heuristics-v1 \
+    mpu-rest-of-world \
+    mpu-optimize-for-views-asia-south-america-africa \
+    mpu-heuristic-algorithm-optimizations-q125 \
+    expand-mpu-heuristics \
+    --report mpu-heuristics-v1
 if [ $? -ne 0 ]; then
-    echo "❌ Error: Failed to export data from Amplitude"
+    echo "❌ Error: Failed to export or compare data"
     exit 1
 fi
-echo
-
-# Run the Statsig export and comparison
-echo "🔄 Exporting data from Statsig and comparing experiments..."
-python3 connectors/amplitude-statsig/statsig_export.py
-if [ $? -ne 0 ]; then
-    echo "❌ Error: Failed to export data from Statsig or compare experiments"
-    exit 1
-fi
-echo
-
-# Generate a detailed report for mpu-heuristics-v1
-echo "📝 Generating detailed report for mpu-heuristics-v1..."
-
-# Extract mpu-heuristics-v1 data from the comparison results
-python3 -c "
-import json
-import os
-
-# Load comparison results
-with open('mpu_experiments_comparison.json', 'r') as f:
-    comparisons = json.load(f)
-
-# Find mpu-heuristics-v1 comparison
-mpu_heuristics = None
-for comp in comparisons:
-    if comp['experiment_key'] == 'mpu-heuristics-v1':
-        mpu_heuristics = comp
-        break
-
-if mpu_heuristics:
-    # Save to a separate file for easier access
-    with open('mpu_heuristics_v1_comparison.json', 'w') as f:
-        json.dump(mpu_heuristics, f, indent=2)
-    print('✅ Extracted mpu-heuristics-v1 data to mpu_heuristics_v1_comparison.json')
-else:
-    print('❌ Could not find mpu-heuristics-v1 in comparison results')
-"
-
 echo
 echo "✅ Comparison completed!"
 echo "📊 Results are available in the following files:"
-echo "   - amplitude_complete_export.json: All Amplitude data"
-echo "   - statsig_complete_export.json: All Statsig data"
-echo "   - mpu_experiments_comparison.json: Comparison of all MPU experiments"
-echo "   - mpu_heuristics_v1_comparison.json: Detailed data for mpu-heuristics-v1"
+echo "   - build/amplitude/amplitude_complete_export.json: All Amplitude data"
+echo "   - build/statsig/statsig_complete_export.json: All Statsig data"
+echo "   - build/statsig/inventory_diff.json: Diff of the full inventories"
+echo "   - build/statsig/mpu_experiments_comparison.json: Comparison of all MPU experiments"
+echo "   - build/statsig/mpu_heuristics_v1_comparison.json: Detailed data for mpu-heuristics-v1"
 echo
 echo "To run this comparison again, simply execute:"
 echo "   bash connectors/amplitude-statsig/set_env_and_compare.sh"
\ No newline at end of file
@@ -1,104 +1,181 @@
 #!/usr/bin/env python3
 
-import json
+import argparse
 import os
+import sys
 from datetime import datetime
 
 # Using urllib to avoid dependency issues
-import urllib.request
 import urllib.parse
 
+from async_connector import BlockingConnector
+from bulk_diff import build_report, print_report_summary
+from export_reader import open_entities, open_export
+from export_writer import FORMATS, ExportWriter, find_entity_file, iter_entities, save_json
+from fuzzy_match import FuzzyIndex, best_matches
+from detail_enrichment import add_detail_arguments, enricher_from_args
+from history_store import add_history_arguments, record_history
+from http_cache import add_cache_arguments, cache_from_args
+from incremental_export import DeltaTracker, export_settings, load_snapshot, save_changelog
+from request_scheduler import ExportError, get_scheduler
+from structural_diff import structural_diff
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
+# Console API list endpoints accept at most 100 items per page
+DEFAULT_PAGE_LIMIT = 100
+
+# Minimum n-gram similarity for pairing a renamed Statsig experiment with its Amplitude key; platform
+# siblings such as foo-ios / foo-android score around 0.55
+FUZZY_MATCH_THRESHOLD = 0.6
+
 class StatsigExporter:
-    def __init__(self, console_api_key):
+    def __init__(self, console_api_key, page_limit=DEFAULT_PAGE_LIMIT, cache=None, scheduler=None, base_url=None):
         self.api_key = console_api_key
-        self.base_url = "https://statsigapi.net/console/v1"
+        self.base_url = base_url or "https://statsigapi.net/console/v1"
+        self.page_limit = page_limit
+        self.cache = cache
+        self.scheduler = scheduler or get_scheduler()
         self.headers = {
             "STATSIG-API-KEY": console_api_key,
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+        # Every request goes through the shared async connector core, over one keep-alive pool
+        self.connector = BlockingConnector('statsig', self.headers, cache=cache, scheduler=self.scheduler)
+
+    def _make_request(self, endpoint, params=None):
+        """Make authenticated request to Statsig Console API
+
+        Goes through the shared request scheduler; raises ExportError when the
+        request cannot be completed.
+        """
+        return self.connector.get_json(self.url(endpoint, params), endpoint)
+
+    def url(self, endpoint, params=None):
+        url = f"{self.base_url}/{endpoint}"
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        return url
+
+    def close(self):
+        """Close kept-alive connections"""
+        self.connector.close()
+
+    def iter_pages(self, endpoint):
+        """Yield each page of a list endpoint, prefetching the next page on the connector's event loop"""
+        def prefetch(page):
+            url = self.url(endpoint, {"page": page, "limit": self.page_limit})
+            return self.connector.submit(self.connector.connector.get_json(url, f"{endpoint} page {page}"))
 
-    def _make_request(self, endpoint):
-        """Make authenticated request to Statsig Console API"""
+        page = 1
+        pending = prefetch(page)
         try:
-            url = f"{self.base_url}/{endpoint}"
-            req = urllib.request.Request(url, headers=self.headers)
-            
-            with urllib.request.urlopen(req) as response:
-                if response.status == 200:
-                    return json.loads(response.read().decode())
+            while pending is not None:
+                data = pending.result()
+                if not data:
+                    return
+                items = data.get("data", [])
+                pagination = data.get("pagination") or {}
+                if pagination:
+                    has_next = bool(pagination.get("nextPage"))
                 else:
-                    print(f"Error: HTTP {response.status} for {endpoint}")
-                    print(f"Response: {response.read().decode()}")
-                    return None
-        except Exception as e:
-            print(f"Request failed for {endpoint}: {e}")
-            return None
-
-    def get_experiments(self):
-        """Get all experiments from Statsig"""
-        print("Fetching experiments from Statsig...")
-        data = self._make_request("experiments")
+                    # Older responses carry no pagination block, so a full page is the only hint
+                    has_next = len(items) >= self.page_limit
+                pending = None
+                if items and has_next:
+                    page += 1
+                    pending = prefetch(page)
+                yield items
+        finally:
+            # A consumer that stops early cancels the page still in flight
+            if pending is not None:
+                pending.cancel()
+
+    def iter_entities(self, endpoint, label):
+        """Yield every entity of a list endpoint one at a time across all pages"""
+        count = 0
+        for items in self.iter_pages(endpoint):
+            for item in items:
+                count += 1
+                yield item
+        print(f"✓ Streamed {count} {label}")
+
+    def _get_all(self, endpoint, label, paginate):
+        """Return a full list endpoint, or a lazy entity stream in paginated mode"""
+        if paginate:
+            return self.iter_entities(endpoint, label)
+        data = self._make_request(endpoint)
         if data:
-            experiments = data.get("data", [])
-            print(f"✓ Found {len(experiments)} experiments")
-            return experiments
+            entities = data.get("data", [])
+            print(f"✓ Found {len(entities)} {label}")
+            return entities
         return []
 
-    def get_feature_gates(self):
+    def get_experiments(self, paginate=False):
+        """Get all experiments from Statsig"""
+        print("Fetching experiments from Statsig...")
+        return self._get_all("experiments", "experiments", paginate)
+
+    def get_feature_gates(self, paginate=False):
         """Get all feature gates from Statsig"""
         print("Fetching feature gates from Statsig...")
-        data = self._make_request("gates")
-        if data:
-            gates = data.get("data", [])
-            print(f"✓ Found {len(gates)} feature gates")
-            return gates
-        return []
+        return self._get_all("gates", "feature gates", paginate)
 
-    def get_dynamic_configs(self):
+    def get_dynamic_configs(self, paginate=False):
         """Get all dynamic configs from Statsig"""
         print("Fetching dynamic configs from Statsig...")
-        data = self._make_request("dynamic_configs")
-        if data:
-            configs = data.get("data", [])
-            print(f"✓ Found {len(configs)} dynamic configs")
-            return configs
-        return []
+        return self._get_all("dynamic_configs", "dynamic configs", paginate)
 
-def save_json(data, filename, directory=""):
-    """Save data as pretty-printed JSON"""
-    # Create directory if it doesn't exist
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-        print(f"📁 Created directory: {directory}")
-    
-    # Construct the full path
-    filepath = os.path.join(directory, filename) if directory else filename
-    
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
-    print(f"💾 Saved to {filepath}")
+def match_statsig_experiments(statsig_data, target_experiments, threshold=FUZZY_MATCH_THRESHOLD):
+    """Find each target in a single pass over Statsig experiments, keeping only the matches
+
+    statsig_data may be a list or a paginated stream. Every experiment is
+    scored against the targets by n-gram similarity (via a MinHash/LSH
+    index over the targets), an exact name scoring 1.0. Matches are then
+    assigned one-to-one, best score first, so one experiment is never the
+    match of two targets. Returns {target: (experiment, score)}.
+    """
+    index = FuzzyIndex()
+    for key in target_experiments:
+        index.add(key, key)
+    experiments = []
+    pairs = []
+    exact = set()
+    for exp in statsig_data:
+        name = exp.get('name', exp.get('id', ''))
+        scored = {} if name not in index else {name: 1.0}
+        for key, score in index.query(name, exp.get('id'), threshold=threshold):
+            scored.setdefault(key, score)
+        if scored:
+            # Only experiments that matched something are kept, by their position in the stream
+            pairs.extend((key, len(experiments), score) for key, score in scored.items())
+            experiments.append(exp)
+        if name in index:
+            exact.add(name)
+            if len(exact) == len(set(target_experiments)):
+                # Every target has an exact match, which nothing later can outscore
+                break
+    pairs.sort(key=lambda pair: (-pair[2], pair[1], str(pair[0])))
+    return {key: (experiments[position], score) for key, position, score in best_matches(pairs)}
 
-def compare_mpu_experiments(amplitude_data, statsig_data, target_experiments):
-    """Compare specific MPU experiments between Amplitude and Statsig"""
+def compare_mpu_experiments(amplitude_data, statsig_data, target_experiments, simulate_users=0,
+                            threshold=FUZZY_MATCH_THRESHOLD):
+    """Compare specific MPU experiments between Amplitude and Statsig
+
+    With simulate_users, that many synthetic users are also bucketed on both
+    platforms (see bucketing_simulator) to check where they actually land.
+    """
     print("\n🔍 MPU EXPERIMENTS COMPARISON")
     print("="*50)
     
-    # Load amplitude experiments
+    # Load amplitude experiments; files are indexed by key and only the targets are decoded
     if isinstance(amplitude_data, str):
-        with open(amplitude_data, 'r') as f:
-            amp_data = json.load(f)
-            # Handle both old and new format
-            if isinstance(amp_data, dict) and 'experiments' in amp_data:
-                amplitude_experiments = amp_data.get('experiments', [])
-            else:
-                amplitude_experiments = amp_data
+        amp_data = open_entities(amplitude_data) if amplitude_data.endswith('.ndjson') else open_export(amplitude_data)
+        # Handle both old and new format
+        amp_exp_dict = (amp_data.get('experiments') or {}) if isinstance(amp_data, dict) else amp_data
     else:
-        amplitude_experiments = amplitude_data
-
-    # Create lookup dictionaries
-    amp_exp_dict = {exp.get('key'): exp for exp in amplitude_experiments}
-    statsig_exp_dict = {exp.get('name', exp.get('id', '')): exp for exp in statsig_data}
+        amp_exp_dict = {exp.get('key'): exp for exp in amplitude_data}
+    statsig_matches = match_statsig_experiments(statsig_data, target_experiments, threshold)
     
     comparison_results = []
     
@@ -108,14 +185,8 @@ def compare_mpu_experiments(amplitude_data, statsig_data, target_experiments):
         
         # Find in Amplitude
         amp_exp = amp_exp_dict.get(exp_key)
-        # Find in Statsig (try exact match first, then partial)
-        statsig_exp = statsig_exp_dict.get(exp_key)
-        if not statsig_exp:
-            # Try to find by partial match
-            for name, exp in statsig_exp_dict.items():
-                if exp_key.lower() in name.lower() or name.lower() in exp_key.lower():
-                    statsig_exp = exp
-                    break
+        # Find in Statsig (exact match preferred over the most similar name)
+        statsig_exp, match_score = statsig_matches.get(exp_key, (None, 0.0))
         
         result = {
             'experiment_key': exp_key,
@@ -123,11 +194,14 @@ def compare_mpu_experiments(amplitude_data, statsig_data, target_experiments):
             'found_in_statsig': statsig_exp is not None,
             'amplitude_data': amp_exp,
             'statsig_data': statsig_exp,
+            'match_score': round(match_score, 3),
             'comparison': {}
         }
         
         if amp_exp and statsig_exp:
             print("✅ Found in both platforms")
+            if match_score < 1.0:
+                print(f"   Matched Statsig '{statsig_exp.get('name', statsig_exp.get('id'))}' (similarity {match_score:.2f})")
             
             # Compare key attributes
             comparison = {}
@@ -167,11 +241,25 @@ def compare_mpu_experiments(amplitude_data, statsig_data, target_experiments):
                 'statsig_allocation': statsig_allocation
             }
             
+            # Deep diff of variant payloads against group parameter values
+            comparison['structure'] = structural_diff(amp_exp, statsig_exp, 'experiment')
+            
+            if simulate_users:
+                from bucketing_simulator import simulate_pair, synthetic_users
+                comparison['bucketing'] = simulate_pair(amp_exp, statsig_exp, synthetic_users(simulate_users))
+            
             result['comparison'] = comparison
             
             print(f"   Name: {'✅' if comparison['name_match'] else '❌'}")
             print(f"   Status: {amp_state} → {statsig_status} {'✅' if comparison['status_comparison']['equivalent'] else '❌'}")
             print(f"   Variants: {amp_variant_keys} → {statsig_group_names} {'✅' if comparison['variants']['variants_match'] else '❌'}")
+            structure_changes = len(comparison['structure'])
+            print(f"   Payloads: {'✅' if not structure_changes else f'❌ {structure_changes} differences'}")
+            if simulate_users:
+                bucketing = comparison['bucketing']
+                srm = [p for p in ('amplitude', 'statsig') if bucketing[p]['srm']['mismatch']]
+                print(f"   Bucketing: {bucketing['agreement']['same_variant']:.1%} of {simulate_users:,} users in the "
+                      f"same variant {'✅' if not srm else '❌ SRM on ' + ', '.join(srm)}")
             
         elif amp_exp:
             print("⚠️  Found only in Amplitude")
@@ -188,96 +276,211 @@ def compare_mpu_experiments(amplitude_data, statsig_data, target_experiments):
     
     return comparison_results
 
-def main():
+# Where every run writes its export and reports: <project root>/build/statsig
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build", "statsig")
+AMPLITUDE_DIR = os.path.join(os.path.dirname(OUTPUT_DIR), "amplitude")
+
+def add_arguments(parser):
+    """Register the exporter's options on a parser"""
+    parser.add_argument('--paginate', action='store_true',
+                        help="follow the Console API page cursor and stream entities to disk")
+    parser.add_argument('--page-limit', type=int, default=DEFAULT_PAGE_LIMIT,
+                        help=f"items requested per page in paginated mode (default: {DEFAULT_PAGE_LIMIT})")
+    parser.add_argument('--incremental', action='store_true',
+                        help="diff against the previous snapshot, write a change log and skip rewriting unchanged exports")
+    parser.add_argument('--format', choices=FORMATS, default='pretty',
+                        help="entity file format: pretty or compact JSON, NDJSON, or compressed binary snapshots "
+                             "(default: pretty)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes used to diff large inventories (default: one per CPU)")
+    parser.add_argument('--targets', nargs='+', metavar='KEY',
+                        help="also write a detailed side-by-side comparison of these experiment keys")
+    parser.add_argument('--simulate-users', type=int, default=0, metavar='N',
+                        help="bucket N synthetic users through each --targets experiment on both platforms (needs numpy)")
+    parser.add_argument('--match-threshold', type=float, default=FUZZY_MATCH_THRESHOLD,
+                        help="minimum name similarity for pairing a --targets key with a renamed Statsig experiment "
+                             f"(default: {FUZZY_MATCH_THRESHOLD})")
+    add_cache_arguments(parser)
+    add_history_arguments(parser)
+    add_detail_arguments(parser)
+    add_telemetry_arguments(parser)
+
+def parse_args(argv=None):
+    """Parse command-line options for the exporter"""
+    parser = argparse.ArgumentParser(description="Export Statsig configuration and diff it against the Amplitude export")
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+def print_missing_key():
+    print("❌ Error: Please set STATSIG_CONSOLE_API_KEY environment variable")
+    print("\nTo get your Statsig Console API key:")
+    print("1. Go to your Statsig console")
+    print("2. Navigate to Settings → Keys & Environments")  
+    print("3. Create or copy a Console API key")
+    print("\nThen run:")
+    print("export STATSIG_CONSOLE_API_KEY='console-your-key-here'")
+    print("python3 statsig_export.py")
+
+def run_export(args, api_key, cache=None, output_dir=OUTPUT_DIR, base_url=None):
+    """Fetch, optionally enrich and write the Statsig export
+
+    Returns the export in memory ({'exported_at', 'experiments',
+    'feature_gates', 'dynamic_configs'}). In paginated mode entities are
+    streamed to disk rather than held, so the path of the combined export
+    is returned instead. A cache passed in is shared with the caller, who
+    reports its stats; otherwise one is made from args.
+    """
+    owns_cache = cache is None
+    if owns_cache:
+        cache = cache_from_args(args)
+    exporter = StatsigExporter(api_key, page_limit=args.page_limit, cache=cache, base_url=base_url)
+    try:
+        return _export(args, exporter, output_dir)
+    finally:
+        exporter.close()
+        if cache and owns_cache:
+            cache.print_stats()
+
+def _export(args, exporter, output_dir):
+    # Taken before the fetch: the next --incremental run trusts lastModified up to this moment
+    exported_at = datetime.now().isoformat()
+    # Export Statsig data; paginated streams are only fetched as the write stage consumes them
+    with stage('fetch'):
+        experiments = exporter.get_experiments(paginate=args.paginate)
+        feature_gates = exporter.get_feature_gates(paginate=args.paginate)
+        dynamic_configs = exporter.get_dynamic_configs(paginate=args.paginate)
+    enricher = enricher_from_args(args, exporter, 'statsig')
+    if enricher:
+        # Paginated streams are enriched a batch at a time as they are written out
+        enrich = enricher.enrich_stream if args.paginate else enricher.enrich
+        with stage('details'):
+            experiments = enrich('experiments', experiments)
+            feature_gates = enrich('feature_gates', feature_gates)
+            dynamic_configs = enrich('dynamic_configs', dynamic_configs)
+    
+    statsig_export = os.path.join(output_dir, 'statsig_complete_export.json')
+    
+    tracker = None
+    unchanged = False
+    if args.incremental:
+        with stage('incremental'):
+            previous = load_snapshot(statsig_export)
+            tracker = DeltaTracker(previous, ('experiments', 'feature_gates', 'dynamic_configs'), export_settings(args))
+            experiments = tracker.track('experiments', experiments)
+            feature_gates = tracker.track('feature_gates', feature_gates)
+            dynamic_configs = tracker.track('dynamic_configs', dynamic_configs)
+            if not args.paginate:
+                experiments = list(experiments)
+                feature_gates = list(feature_gates)
+                dynamic_configs = list(dynamic_configs)
+                unchanged = previous is not None and not tracker.has_changes()
+    
+    if unchanged:
+        tracker.print_summary()
+        save_changelog(tracker.changelog(exported_at), 'statsig_changelog.json', output_dir)
+        print("\n✅ No changes since the last export; snapshot left untouched")
+        written = []
+    else:
+        # Stream every entity list to a temp file, then swap the whole export in at once
+        with stage('write'), ExportWriter(output_dir, args.format) as writer:
+            sections = {
+                'experiments': writer.write_entities('statsig_experiments', experiments),
+                'feature_gates': writer.write_entities('statsig_feature_gates', feature_gates),
+                'dynamic_configs': writer.write_entities('statsig_dynamic_configs', dynamic_configs)
+            }
+            trailer = {
+                'summary': {
+                    'total_experiments': sections['experiments'][1],
+                    'total_feature_gates': sections['feature_gates'][1],
+                    'total_dynamic_configs': sections['dynamic_configs'][1]
+                }
+            }
+            if tracker:
+                tracker.print_summary()
+                save_changelog(tracker.changelog(exported_at), 'statsig_changelog.json', output_dir)
+                trailer['entity_hashes'] = tracker.hashes
+            if enricher:
+                trailer['detail_latency'] = enricher.summary()
+            header = {'exported_at': exported_at, 'export_settings': export_settings(args)}
+            writer.write_combined('statsig_complete_export.json', header, sections, trailer)
+        written = [os.path.join(output_dir, filename) for filename, _ in sections.values()] + [statsig_export]
+    if enricher:
+        enricher.print_summary()
+    record_history(args, 'statsig', statsig_export, exported_at)
+    
+    print(f"\n✅ Statsig export completed!")
+    print(f"📁 Files created:")
+    for filepath in written:
+        print(f"   - {os.path.basename(filepath)}")
+    if args.paginate:
+        return statsig_export
+    return {'exported_at': exported_at, 'experiments': experiments, 'feature_gates': feature_gates,
+            'dynamic_configs': dynamic_configs}
+
+def run_comparison(args, amplitude, statsig, output_dir=OUTPUT_DIR, amplitude_experiments=None):
+    """Diff the full inventories and, with --targets, compare the selected experiments
+
+    amplitude and statsig are combined exports, either loaded or as paths.
+    amplitude_experiments, when given, is the in-memory Amplitude experiment
+    list; otherwise the targets are looked up in the experiment file.
+    Returns (report, target comparisons or None, files written).
+    """
+    # Diff the full inventories: every flag and experiment against every gate, experiment and config
+    print(f"\n🔍 Comparing full Amplitude and Statsig inventories...")
+    with stage('inventory_diff'):
+        report = build_report(amplitude, statsig, workers=args.workers)
+    print_report_summary(report)
+    save_json(report, 'inventory_diff.json', output_dir)
+    report_files = [os.path.join(output_dir, 'inventory_diff.json')]
+    
+    comparison_results = None
+    if args.targets:
+        if amplitude_experiments is None:
+            amplitude_dir = os.path.dirname(amplitude) if isinstance(amplitude, str) else AMPLITUDE_DIR
+            amplitude_experiments = find_entity_file(amplitude_dir, 'amplitude_experiments')
+        if isinstance(statsig, str):
+            # Paginated exports are streamed back from disk rather than loaded whole
+            experiments = iter_entities(find_entity_file(os.path.dirname(statsig), 'statsig_experiments'))
+        else:
+            experiments = statsig['experiments']
+        print(f"\n🔍 Comparing {len(args.targets)} selected experiments...")
+        with stage('targets'):
+            comparison_results = compare_mpu_experiments(amplitude_experiments, experiments, args.targets,
+                                                         args.simulate_users, args.match_threshold)
+        save_json(comparison_results, 'mpu_experiments_comparison.json', output_dir)
+        report_files.append(os.path.join(output_dir, 'mpu_experiments_comparison.json'))
+    return report, comparison_results, report_files
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'statsig_export')
     print("🔄 Statsig Configuration Exporter & Comparator")
     print("="*50)
     
     # Get API key from environment
     api_key = os.getenv('STATSIG_CONSOLE_API_KEY')
     if not api_key:
-        print("❌ Error: Please set STATSIG_CONSOLE_API_KEY environment variable")
-        print("\nTo get your Statsig Console API key:")
-        print("1. Go to your Statsig console")
-        print("2. Navigate to Settings → Keys & Environments")  
-        print("3. Create or copy a Console API key")
-        print("\nThen run:")
-        print("export STATSIG_CONSOLE_API_KEY='console-your-key-here'")
-        print("python3 statsig_export.py")
+        print_missing_key()
         return
     
-    exporter = StatsigExporter(api_key)
-    
-    # Export Statsig data
-    experiments = exporter.get_experiments()
-    feature_gates = exporter.get_feature_gates()
-    dynamic_configs = exporter.get_dynamic_configs()
-    
-    # Define output directory
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build", "statsig")
-    
-    # Save individual files
-    if experiments:
-        save_json(experiments, 'statsig_experiments.json', output_dir)
-    if feature_gates:
-        save_json(feature_gates, 'statsig_feature_gates.json', output_dir)
-    if dynamic_configs:
-        save_json(dynamic_configs, 'statsig_dynamic_configs.json', output_dir)
-    
-    # Save combined export
-    combined_data = {
-        'exported_at': datetime.now().isoformat(),
-        'experiments': experiments,
-        'feature_gates': feature_gates,
-        'dynamic_configs': dynamic_configs,
-        'summary': {
-            'total_experiments': len(experiments),
-            'total_feature_gates': len(feature_gates),
-            'total_dynamic_configs': len(dynamic_configs)
-        }
-    }
-    save_json(combined_data, 'statsig_complete_export.json', output_dir)
-    
-    # Compare specific MPU experiments
-    target_experiments = [
-        "mpu-heuristics-v1",
-        "mpu-rest-of-world", 
-        "mpu-optimize-for-views-asia-south-america-africa",
-        "mpu-heuristic-algorithm-optimizations-q125",
-        "expand-mpu-heuristics"
-    ]
+    statsig = run_export(args, api_key)
     
     # Define amplitude data path
-    amplitude_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "build", "amplitude")
-    amplitude_file = os.path.join(amplitude_dir, 'amplitude_experiments.json')
-    
-    if os.path.exists(amplitude_file):
-        print(f"\n🔍 Comparing {len(target_experiments)} MPU experiments...")
-        comparison_results = compare_mpu_experiments(amplitude_file, experiments, target_experiments)
-        save_json(comparison_results, 'mpu_experiments_comparison.json', output_dir)
-        
-        # Summary
-        print(f"\n📋 COMPARISON SUMMARY")
-        print("="*30)
-        found_both = sum(1 for r in comparison_results if r['found_in_amplitude'] and r['found_in_statsig'])
-        found_amp_only = sum(1 for r in comparison_results if r['found_in_amplitude'] and not r['found_in_statsig'])
-        found_statsig_only = sum(1 for r in comparison_results if not r['found_in_amplitude'] and r['found_in_statsig'])
-        found_neither = sum(1 for r in comparison_results if not r['found_in_amplitude'] and not r['found_in_statsig'])
-        
-        print(f"✅ Found in both: {found_both}")
-        print(f"⚠️  Amplitude only: {found_amp_only}")
-        print(f"⚠️  Statsig only: {found_statsig_only}")
-        print(f"❌ Found in neither: {found_neither}")
-        
-    else:
-        print("⚠️  amplitude_experiments.json not found. Run amplitude_export.py first.")
+    amplitude_export = os.path.join(AMPLITUDE_DIR, 'amplitude_complete_export.json')
+    if not os.path.exists(amplitude_export):
+        print("⚠️  amplitude_complete_export.json not found. Run amplitude_export.py first.")
+        return
+    _, _, report_files = run_comparison(args, amplitude_export, statsig)
     
     print(f"\n✅ Export and comparison completed!")
     print(f"📁 Files created:")
-    print(f"   - statsig_experiments.json")
-    print(f"   - statsig_feature_gates.json")
-    print(f"   - statsig_dynamic_configs.json")
-    print(f"   - statsig_complete_export.json")
-    print(f"   - mpu_experiments_comparison.json")
+    for filepath in report_files:
+        print(f"   - {os.path.basename(filepath)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        with run_report():
+            main()
+    except ExportError as e:
+        print(f"\n❌ Export failed, the export would be incomplete: {e}")
+        sys.exit(1)
\ No newline at end of file
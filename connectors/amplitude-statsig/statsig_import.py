@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime
+
+from bulk_diff import GATE_VARIANTS
+from export_reader import open_export
+from export_writer import save_json
+from incremental_export import entity_hash
+from request_scheduler import VENDOR_LIMITS, ExportError
+from statsig_export import AMPLITUDE_DIR, OUTPUT_DIR, StatsigExporter, print_missing_key
+from structural_diff import DEFAULT_MAPPING, load_mapping, translate_condition
+from telemetry import add_telemetry_arguments, run_report, stage, telemetry_from_args
+
+DEFAULT_CHECKPOINT = os.path.join(OUTPUT_DIR, "import_checkpoint.ndjson")
+
+# Statsig entity type -> (Console API list path, section of a Statsig export)
+KINDS = {
+    'gate': ('gates', 'feature_gates'),
+    'dynamic_config': ('dynamic_configs', 'dynamic_configs'),
+    'experiment': ('experiments', 'experiments'),
+}
+
+# Writes in flight at once; the scheduler's token bucket still paces them
+DEFAULT_CONCURRENCY = VENDOR_LIMITS['statsig']['max_in_flight']
+PROGRESS_EVERY = 50
+# Statuses Statsig answers a create with when the id is already taken
+CONFLICT_STATUSES = {400, 409}
+
+def migration_candidates(amplitude_export, include_all=False, targets=None):
+    """(section, entity) of the Amplitude flags and experiments to import
+
+    By default these are the migration checklist's: enabled flags and
+    running experiments. include_all takes every flag and experiment;
+    targets narrows either set to those keys.
+    """
+    if isinstance(amplitude_export, str):
+        amplitude_export = open_export(amplitude_export)
+    live = {'flags': lambda e: e.get('enabled', False), 'experiments': lambda e: e.get('state') == 'running'}
+    wanted = set(targets) if targets else None
+    candidates = []
+    for section, is_live in live.items():
+        for entity in amplitude_export.get(section) or []:
+            if not entity.get('key') or (wanted is not None and entity['key'] not in wanted):
+                continue
+            if include_all or is_live(entity):
+                candidates.append((section, entity))
+    return candidates
+
+def statsig_kind(entity, section):
+    """Statsig type an Amplitude entity migrates to: on/off flags become gates, other flags dynamic configs"""
+    if section == 'experiments':
+        return 'experiment'
+    variants = {str(v.get('key')).lower() for v in entity.get('variants') or []}
+    return 'gate' if variants <= GATE_VARIANTS else 'dynamic_config'
+
+def statsig_payload(entity, kind, mapping=None):
+    """Console API create body for an Amplitude flag or experiment, translated with the field mapping
+
+    The Statsig id is the Amplitude key. Segments become rules in order,
+    followed by the catch-all rule serving the default rollout; experiment
+    variants become groups sized by their rollout weights.
+    """
+    mapping = mapping or DEFAULT_MAPPING
+    key = entity.get('key')
+    variants = entity.get('variants') or []
+    payload = {'id': key, 'name': key, 'description': entity.get('description') or '',
+               'tags': list(entity.get('tags') or [])}
+    if kind == 'experiment':
+        variant = mapping['variant']
+        weights = entity.get('rolloutWeights') if isinstance(entity.get('rolloutWeights'), dict) else {}
+        total = sum(weights.values())
+        payload['allocation'] = entity.get('rolloutPercentage')
+        payload['groups'] = [{
+            variant['key']: v.get('key'),
+            'size': 100 * weights.get(v.get('key'), 0) / total if total else 100 / len(variants),
+            variant['payload']: v.get('payload') or {},
+        } for v in variants]
+        return payload
+
+    segment = mapping['segment']
+    rules = [{
+        segment['name']: s.get('name'),
+        segment['percentage']: s.get('percentage'),
+        segment['conditions']: [translate_condition(c, mapping) for c in s.get('conditions') or []],
+    } for s in entity.get('segments') or []]
+    rules.append({segment['name']: mapping['catch_all_rule'], segment['percentage']: entity.get('rolloutPercentage'),
+                  segment['conditions']: [{'type': 'public'}]})
+    payload['isEnabled'] = bool(entity.get('enabled'))
+    if kind == 'dynamic_config':
+        # A dynamic config serves the first variant payload wherever the flag is on
+        value = next((v.get('payload') for v in variants if v.get('payload')), {})
+        for rule in rules:
+            rule['returnValue'] = value
+        payload['defaultValue'] = {}
+    payload['rules'] = rules
+    return payload
+
+def _normalized(value):
+    """Numbers rounded to two decimals, with whole floats as ints, so 33.33 and 100 / 3 hash alike"""
+    if isinstance(value, float):
+        value = round(value, 2)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, dict):
+        return {k: _normalized(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalized(v) for v in value]
+    return value
+
+def _projection(existing, desired):
+    """The existing entity restricted, level by level, to the fields the payload sets"""
+    if isinstance(existing, dict) and isinstance(desired, dict):
+        return {k: _projection(existing.get(k), v) for k, v in desired.items()}
+    if isinstance(existing, list) and isinstance(desired, list) and len(existing) == len(desired):
+        return [_projection(e, d) for e, d in zip(existing, desired)]
+    return existing
+
+def payload_hash(payload):
+    return entity_hash(_normalized(payload))
+
+def is_unchanged(existing, payload):
+    """True when the Statsig entity already holds everything the payload would write"""
+    return payload_hash(_projection(existing, payload)) == payload_hash(payload)
+
+class ImportCheckpoint:
+    """Append-only journal of the creates and updates that succeeded, one JSON line each
+
+    A run that fails or is interrupted leaves every finished write in the
+    journal, so the next run skips those entities even when Statsig
+    rewrote parts of the submitted body. Lines are flushed as they are
+    written; a line cut short by a crash is ignored on load.
+    """
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self.done = {}
+        self._file = None
+        if path and os.path.exists(path):
+            if restart:
+                os.remove(path)
+                return
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.done[(record['kind'], record['id'])] = record['hash']
+
+    def matches(self, kind, entity_id, digest):
+        return self.done.get((kind, entity_id)) == digest
+
+    def record(self, item):
+        if not self.path:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a')
+        self._file.write(json.dumps({'kind': item['kind'], 'id': item['id'], 'hash': item['hash'],
+                                     'action': item['action'], 'at': datetime.now().isoformat()}) + '\n')
+        self._file.flush()
+        self.done[(item['kind'], item['id'])] = item['hash']
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def load_statsig_inventory(source):
+    """{kind: {id: entity}} from a live StatsigExporter, a combined export path, or None for an empty project"""
+    if source is None:
+        return {kind: {} for kind in KINDS}
+    if isinstance(source, StatsigExporter):
+        sections = {'gate': source.get_feature_gates(paginate=True),
+                    'dynamic_config': source.get_dynamic_configs(paginate=True),
+                    'experiment': source.get_experiments(paginate=True)}
+    else:
+        export = open_export(source)
+        sections = {kind: export.get(section) or [] for kind, (_, section) in KINDS.items()}
+    return {kind: {entity.get('id') or entity.get('name'): entity for entity in entities}
+            for kind, entities in sections.items()}
+
+def plan_import(candidates, inventory, checkpoint, mapping=None):
+    """One item per candidate: {'id', 'kind', 'source', 'action', 'hash', 'payload'}
+
+    The action is create when Statsig has no entity with that id, unchanged
+    when it already holds the payload's content, done when an earlier run's
+    checkpoint recorded this exact payload, and update otherwise.
+    """
+    items = []
+    for section, entity in candidates:
+        kind = statsig_kind(entity, section)
+        payload = statsig_payload(entity, kind, mapping)
+        digest = payload_hash(payload)
+        existing = inventory[kind].get(payload['id'])
+        if existing is None:
+            action = 'create'
+        elif is_unchanged(existing, payload):
+            action = 'unchanged'
+        elif checkpoint.matches(kind, payload['id'], digest):
+            action = 'done'
+        else:
+            action = 'update'
+        items.append({'id': payload['id'], 'kind': kind, 'source': section, 'action': action, 'hash': digest,
+                      'payload': payload})
+    return items
+
+async def _write(exporter, item):
+    """Send one item's create or update
+
+    A create is retried on 5xx like any request, so an attempt whose
+    response was lost may already have created the entity and the retry is
+    refused as a duplicate. The entity is then read back by id, and updated
+    unless it already matches.
+    """
+    connector = exporter.connector.connector
+    endpoint = KINDS[item['kind']][0]
+    entity_url = exporter.url(f"{endpoint}/{urllib.parse.quote(item['id'], safe='')}")
+    update = {k: v for k, v in item['payload'].items() if k != 'id'}
+    if item['action'] == 'update':
+        await connector.send_json('POST', entity_url, update, f"update {endpoint} {item['id']}")
+        return
+    try:
+        await connector.send_json('POST', exporter.url(endpoint), item['payload'], f"create {endpoint} {item['id']}")
+        return
+    except ExportError as e:
+        if e.status not in CONFLICT_STATUSES:
+            raise
+        conflict = e
+    try:
+        existing = await connector.get_json(entity_url, f"{endpoint} {item['id']}")
+    except ExportError:
+        # Not there after all: the create was rejected for another reason
+        raise conflict
+    if is_unchanged(existing.get('data', existing), item['payload']):
+        item['reconciled'] = 'unchanged'
+        return
+    await connector.send_json('POST', entity_url, update, f"update {endpoint} {item['id']}")
+    item['reconciled'] = 'updated'
+
+async def _submit_all(exporter, items, checkpoint, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+    submitted = 0
+
+    async def submit(item):
+        nonlocal submitted
+        async with slots:
+            try:
+                await _write(exporter, item)
+            except ExportError as e:
+                item['error'] = str(e)
+                print(f"   ❌ {item['kind']} {item['id']}: {e}")
+                return
+        checkpoint.record(item)
+        submitted += 1
+        if submitted % PROGRESS_EVERY == 0:
+            print(f"   ✓ {submitted}/{len(items)} submitted")
+
+    await asyncio.gather(*(submit(item) for item in items))
+
+def submit_plan(exporter, items, checkpoint, concurrency=DEFAULT_CONCURRENCY):
+    """Create or update the items, `concurrency` writes at a time; returns the items that failed
+
+    Each success is journaled as it lands. A failed write is recorded on
+    its item and the rest carry on, so one bad entity does not stop the
+    import. Interrupting the run cancels the writes still in flight.
+    """
+    exporter.connector.run(_submit_all(exporter, items, checkpoint, concurrency))
+    return [item for item in items if item.get('error')]
+
+def import_candidates(candidates, exporter, checkpoint, concurrency=DEFAULT_CONCURRENCY, dry_run=False,
+                      mapping=None, inventory=None):
+    """Plan and (unless dry_run) submit an import; returns {'dry_run', 'summary', 'items'}
+
+    The current Statsig inventory is listed through the exporter unless one
+    is passed in.
+    """
+    started = time.perf_counter()
+    with stage('plan'):
+        if inventory is None:
+            inventory = load_statsig_inventory(exporter)
+        items = plan_import(candidates, inventory, checkpoint, mapping)
+    actions = Counter(item['action'] for item in items)
+    print(f"📋 {len(items)} candidates: {actions['create']} to create, {actions['update']} to update, "
+          f"{actions['unchanged']} unchanged, {actions['done']} done by an earlier run")
+
+    pending = [item for item in items if item['action'] in ('create', 'update')]
+    failed = []
+    if pending and not dry_run:
+        print(f"🚀 Submitting {len(pending)} writes, {concurrency} at a time...")
+        with stage('submit'):
+            failed = submit_plan(exporter, pending, checkpoint, concurrency)
+    seconds = time.perf_counter() - started
+    written = 0 if dry_run else len(pending) - len(failed)
+    summary = {action: actions[action] for action in ('create', 'update', 'unchanged', 'done')}
+    summary.update(candidates=len(items), submitted=written, failed=len(failed),
+                   reconciled=sum(1 for item in pending if item.get('reconciled')), seconds=round(seconds, 3))
+    for item in items:
+        if item['action'] not in ('create', 'update'):
+            del item['payload']
+    return {'dry_run': dry_run, 'summary': summary, 'items': items}
+
+def add_arguments(parser):
+    """Register the importer's options on a parser"""
+    parser.add_argument('--amplitude', default=os.path.join(AMPLITUDE_DIR, "amplitude_complete_export.json"),
+                        help="Amplitude combined export to import from")
+    parser.add_argument('--targets', nargs='+', metavar='KEY', help="only import these Amplitude keys")
+    parser.add_argument('--all', action='store_true',
+                        help="import every flag and experiment, not only enabled flags and running experiments")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="plan the import and write the payloads without changing Statsig")
+    parser.add_argument('--statsig', metavar='FILE',
+                        help="with --dry-run and no API key, plan against this Statsig export instead of the live "
+                             "project (default: build/statsig/statsig_complete_export.json)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"writes in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help="journal of finished writes that a re-run resumes from "
+                             "(default: build/statsig/import_checkpoint.ndjson)")
+    parser.add_argument('--restart', action='store_true', help="discard the checkpoint before importing")
+    parser.add_argument('--mapping', metavar='FILE', help="JSON overrides of the Amplitude to Statsig field mapping")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="directory for statsig_import.json")
+    add_telemetry_arguments(parser)
+
+def parse_args(argv=None):
+    """Parse command-line options for the importer"""
+    parser = argparse.ArgumentParser(description="Create or update Statsig gates, dynamic configs and experiments "
+                                                 "from the Amplitude export")
+    add_arguments(parser)
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help="instead of importing, time an import of N synthetic entities into a local mock Statsig")
+    return parser.parse_args(argv)
+
+def run_import(args, api_key=None, base_url=None):
+    """Import the candidates selected by args into Statsig and write statsig_import.json
+
+    Without an API key (dry runs only) the plan is made against a Statsig
+    export. Raises ExportError when any write failed; re-running resumes
+    from the checkpoint.
+    """
+    candidates = migration_candidates(args.amplitude, args.all, args.targets)
+    mapping = load_mapping(args.mapping)
+    # A dry run reads the checkpoint but never writes or discards it
+    checkpoint = ImportCheckpoint(args.checkpoint, args.restart and not args.dry_run)
+    if args.dry_run and args.restart:
+        checkpoint.done = {}
+    inventory = None
+    if not api_key:
+        statsig_file = args.statsig or os.path.join(OUTPUT_DIR, "statsig_complete_export.json")
+        if os.path.exists(statsig_file):
+            print(f"📂 Planning against {statsig_file}")
+            inventory = load_statsig_inventory(statsig_file)
+        else:
+            print("⚠️  No API key and no Statsig export: every candidate is planned as a create")
+            inventory = load_statsig_inventory(None)
+    exporter = StatsigExporter(api_key or '', base_url=base_url)
+    try:
+        report = import_candidates(candidates, exporter, checkpoint, args.concurrency, args.dry_run, mapping,
+                                   inventory)
+    finally:
+        exporter.close()
+        checkpoint.close()
+    save_json(report, 'statsig_import.json', args.output_dir)
+    summary = report['summary']
+    if summary['failed']:
+        raise ExportError('statsig', f"{summary['failed']} of {summary['failed'] + summary['submitted']} writes "
+                                     f"failed; re-run to resume from {args.checkpoint}")
+    if not args.dry_run:
+        print(f"✅ {summary['submitted']} entities written in {summary['seconds']:.2f}s")
+    return report
+
+def run_benchmark(total, latency=0.05, seed=42):
+    """Import the candidates of `total` synthetic entities into a mock Statsig that has none of them
+
+    Runs one write at a time, then DEFAULT_CONCURRENCY at a time, then
+    repeats the concurrent import against the populated project, which
+    must find nothing to write.
+    """
+    import contextlib
+    import io
+    import tempfile
+
+    from mock_vendors import MockVendorProcess
+    from request_scheduler import RequestScheduler
+    from synthetic_data import generate_inventories
+
+    amplitude, _ = generate_inventories(total, seed=seed)
+    candidates = migration_candidates(amplitude)
+    # Rate limits are lifted so the runs measure concurrency against the mock's latency
+    scheduler = RequestScheduler({'statsig': {'rate': 1e5, 'burst': 100000, 'max_in_flight': 64}})
+    print(f"📦 Import benchmark: {len(candidates)} candidates of {total} entities, {latency * 1000:.0f}ms latency")
+    runs = (('sequential', 1, False), ('concurrent', DEFAULT_CONCURRENCY, False), ('re-run', DEFAULT_CONCURRENCY, True))
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            for label, concurrency, again in runs:
+                if not again:
+                    if server:
+                        server.stop()
+                    server = MockVendorProcess(size=total, latency=latency, seed=seed, missing=1.0).start()
+                exporter = StatsigExporter('benchmark', scheduler=scheduler, base_url=server.statsig_url)
+                checkpoint = ImportCheckpoint(os.path.join(workdir, f"{label}.ndjson"))
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        report = import_candidates(candidates, exporter, checkpoint, concurrency)
+                finally:
+                    exporter.close()
+                    checkpoint.close()
+                summary = report['summary']
+                rate = summary['candidates'] / summary['seconds'] * 60
+                print(f"   ⏱️  {label} ({concurrency} in flight): {summary['submitted']} written, "
+                      f"{summary['unchanged']} unchanged, {summary['failed']} failed in "
+                      f"{summary['seconds']:.2f}s ({rate:,.0f} entities/min)")
+        finally:
+            if server:
+                server.stop()
+
+def main(argv=None):
+    args = parse_args(argv)
+    telemetry_from_args(args, 'statsig_import')
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+        return
+
+    print("📥 Amplitude → Statsig Import" + (" (dry run)" if args.dry_run else ""))
+    print("="*50)
+    if not os.path.exists(args.amplitude):
+        print(f"❌ Amplitude export file not found: {args.amplitude}")
+        print("\nFirst run: python3 amplitude_export.py")
+        return
+    api_key = os.getenv('STATSIG_CONSOLE_API_KEY')
+    if not api_key and not args.dry_run:
+        print_missing_key()
+        return
+    run_import(args, api_key)
+
+if __name__ == "__main__":
+    try:
+        with run_report():
+            main()
+    except ExportError as e:
+        print(f"\n❌ Import incomplete: {e}")
+        sys.exit(1)
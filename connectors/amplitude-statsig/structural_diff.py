@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+
+import argparse
+import copy
+import hashlib
+import json
+import marshal
+import random
+import time
+
+# How Amplitude field names and values translate to Statsig's. Override any
+# section with a JSON file of the same shape (see load_mapping).
+DEFAULT_MAPPING = {
+    # Amplitude variant -> Statsig experiment group
+    'variant': {'key': 'name', 'payload': 'parameterValues'},
+    # Amplitude segment -> Statsig rule
+    'segment': {'name': 'name', 'percentage': 'passPercentage', 'conditions': 'conditions'},
+    # Amplitude segment condition -> Statsig rule condition
+    'condition': {'type': 'type', 'prop': 'field', 'op': 'operator', 'values': 'targetValue'},
+    'condition_types': {'property': 'user_field', 'cohort': 'passes_segment'},
+    'operators': {
+        'is': 'any', 'is not': 'none', 'contains': 'str_contains_any', 'does not contain': 'str_contains_none',
+        'less': 'lt', 'greater': 'gt', 'version less': 'version_lt', 'version greater': 'version_gt',
+    },
+    # Amplitude's default rollout becomes a catch-all Statsig rule with this name
+    'catch_all_rule': 'Everyone',
+}
+
+def load_mapping(path=None):
+    """The default field mapping, with sections overridden from a JSON file"""
+    mapping = copy.deepcopy(DEFAULT_MAPPING)
+    if path:
+        with open(path, 'r') as f:
+            overrides = json.load(f)
+        for section, value in overrides.items():
+            if isinstance(value, dict) and isinstance(mapping.get(section), dict):
+                mapping[section].update(value)
+            else:
+                mapping[section] = value
+    return mapping
+
+def _empty_to_none(value):
+    return value if value not in ({}, [], '') else None
+
+def translate_condition(condition, mapping):
+    """An Amplitude segment condition in Statsig's field names, types and operators"""
+    fields = mapping['condition']
+    translated = {}
+    for amp_field, value in condition.items():
+        if amp_field == 'type':
+            value = mapping['condition_types'].get(value, value)
+        elif amp_field == 'op':
+            value = mapping['operators'].get(value, value)
+        translated[fields.get(amp_field, amp_field)] = value
+    return translated
+
+def _keyed(named):
+    """(name, value) pairs keyed by name, or by `#<position>` when the name is missing or already taken"""
+    keyed = {}
+    for index, (name, value) in enumerate(named):
+        keyed[name if name and name not in keyed else f"#{index}"] = value
+    return keyed
+
+def amplitude_tree(entity, statsig_kind, mapping=None):
+    """Amplitude entity translated into the Statsig field names of statsig_kind"""
+    mapping = mapping or DEFAULT_MAPPING
+    if statsig_kind == 'experiment':
+        variant = mapping['variant']
+        return {'groups': _keyed((v.get('key'), {variant['payload']: _empty_to_none(v.get('payload'))})
+                                 for v in entity.get('variants', []))}
+
+    segment = mapping['segment']
+    named = [(s.get('name'), {
+        segment['percentage']: s.get('percentage'),
+        segment['conditions']: [translate_condition(c, mapping) for c in s.get('conditions') or []],
+    }) for s in entity.get('segments') or []]
+    named.append((mapping['catch_all_rule'], {
+        segment['percentage']: entity.get('rolloutPercentage'),
+        segment['conditions']: [{'type': 'public'}],
+    }))
+    rules = _keyed(named)
+    if statsig_kind == 'dynamic_config':
+        # A dynamic config serves the first variant payload wherever the flag is on
+        payload = next((v.get('payload') for v in entity.get('variants', []) if v.get('payload')), None)
+        for rule in rules.values():
+            rule['returnValue'] = _empty_to_none(payload)
+    return {'rules': rules}
+
+def statsig_tree(entity, kind):
+    """The parts of a Statsig entity that amplitude_tree produces, keyed the same way"""
+    if kind == 'experiment':
+        return {'groups': _keyed((g.get('name'), {'parameterValues': _empty_to_none(g.get('parameterValues'))})
+                                 for g in entity.get('groups', []))}
+    named = []
+    for rule in entity.get('rules') or []:
+        tree = {'passPercentage': rule.get('passPercentage'), 'conditions': rule.get('conditions') or []}
+        if kind == 'dynamic_config':
+            tree['returnValue'] = _empty_to_none(rule.get('returnValue'))
+        named.append((rule.get('name'), tree))
+    return {'rules': _keyed(named)}
+
+def subtree_hash(value):
+    """Content hash of a JSON subtree, serialized in C so the subtree is not walked in Python
+
+    marshal is several times faster than canonical JSON but sensitive to key
+    order, so equal subtrees may occasionally hash differently. That only
+    costs a descent: deep_diff compares leaves by value. Version 2 is used
+    because later versions emit back-references that depend on refcounts.
+    """
+    try:
+        data = marshal.dumps(value, 2)
+    except ValueError:
+        data = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _same(left, right):
+    if isinstance(left, (dict, list)) and isinstance(right, (dict, list)):
+        return subtree_hash(left) == subtree_hash(right)
+    return left == right and type(left) is type(right)
+
+def _leaf_bytes(value):
+    try:
+        return marshal.dumps(value, 2)
+    except ValueError:
+        data = json.dumps(value, sort_keys=True, default=str).encode()
+        return b'j%d:' % len(data) + data
+
+def merkle_tree(value):
+    """(hash, children) for a JSON subtree, each node hashed once from its children's hashes
+
+    children maps dict keys or list positions to child nodes. It is None for
+    leaves, and for flat containers (no nested dicts or lists), which are
+    hashed whole with subtree_hash and expanded by _children only when a
+    diff descends into them. Leaf hashes are their marshal bytes, which are
+    short and self-delimiting.
+    """
+    if isinstance(value, dict):
+        if not any(isinstance(child, (dict, list)) for child in value.values()):
+            return subtree_hash(value), None
+        children = {key: merkle_tree(child) for key, child in value.items()}
+        digest = hashlib.blake2b(b'{', digest_size=16)
+        for key in sorted(children, key=str):
+            digest.update(_leaf_bytes(key))
+            digest.update(children[key][0])
+        return digest.digest(), children
+    if isinstance(value, list):
+        if not any(isinstance(child, (dict, list)) for child in value):
+            return subtree_hash(value), None
+        children = [merkle_tree(child) for child in value]
+        return hashlib.blake2b(b'[' + b''.join(node[0] for node in children), digest_size=16).digest(), children
+    return _leaf_bytes(value), None
+
+def _children(value, node):
+    """The child nodes of a container, expanding a flat container's leaves"""
+    if node[1] is not None:
+        return node[1]
+    if isinstance(value, dict):
+        return {key: (_leaf_bytes(child), None) for key, child in value.items()}
+    return [(_leaf_bytes(child), None) for child in value]
+
+# Long lists are compared in this many slices per level, so one changed item
+# among thousands costs a few slice comparisons rather than one per item
+LIST_FANOUT = 16
+
+def _join(path, key):
+    return f"{path}.{key}" if path else str(key)
+
+def _diff_range(left, right, nodes, hashes, start, end, path, changes, limit):
+    """Diff list items [start, end) by comparing the item hashes of ever smaller slices"""
+    if end - start <= LIST_FANOUT:
+        for i in range(start, end):
+            if len(changes) >= limit:
+                return
+            if hashes[0][i] != hashes[1][i]:
+                _diff_nodes(left[i], right[i], nodes[0][i], nodes[1][i], _join(path, i), changes, limit)
+        return
+    step = -(-(end - start) // LIST_FANOUT)
+    for lo in range(start, end, step):
+        hi = min(lo + step, end)
+        if len(changes) >= limit:
+            return
+        if hashes[0][lo:hi] != hashes[1][lo:hi]:
+            _diff_range(left, right, nodes, hashes, lo, hi, path, changes, limit)
+
+def _diff_nodes(left, right, left_node, right_node, path, changes, limit):
+    if len(changes) >= limit:
+        return
+    if isinstance(left, dict) and isinstance(right, dict):
+        left_children, right_children = _children(left, left_node), _children(right, right_node)
+        for key in sorted(set(left) | set(right), key=str):
+            if key not in right:
+                changes.append({'path': _join(path, key), 'amplitude': left[key], 'statsig': None})
+            elif key not in left:
+                changes.append({'path': _join(path, key), 'amplitude': None, 'statsig': right[key]})
+            elif left_children[key][0] != right_children[key][0]:
+                _diff_nodes(left[key], right[key], left_children[key], right_children[key],
+                            _join(path, key), changes, limit)
+            if len(changes) >= limit:
+                break
+    elif isinstance(left, list) and isinstance(right, list):
+        nodes = (_children(left, left_node), _children(right, right_node))
+        hashes = tuple([node[0] for node in children] for children in nodes)
+        common = min(len(left), len(right))
+        _diff_range(left, right, nodes, hashes, 0, common, path, changes, limit)
+        for i in range(common, max(len(left), len(right))):
+            if len(changes) >= limit:
+                break
+            changes.append({'path': _join(path, i),
+                            'amplitude': left[i] if i < len(left) else None,
+                            'statsig': right[i] if i < len(right) else None})
+    elif left != right or type(left) is not type(right):
+        changes.append({'path': path, 'amplitude': left, 'statsig': right})
+
+def deep_diff(left, right, path='', changes=None, limit=100):
+    """Paths where two JSON trees differ, as {'path', 'amplitude', 'statsig'} records
+
+    Both trees are hashed once bottom-up (merkle_tree), then each level
+    compares the stored child hashes and only descends into children whose
+    hashes differ, so identical subtrees are neither walked nor re-hashed.
+    """
+    if changes is None:
+        changes = []
+    _diff_nodes(left, right, merkle_tree(left), merkle_tree(right), path, changes, limit)
+    return changes
+
+def structural_diff(amplitude_entity, statsig_entity, statsig_kind, mapping=None, limit=100):
+    """Deep diff of variants, payloads, segments and targeting rules of a paired entity"""
+    left = amplitude_tree(amplitude_entity, statsig_kind, mapping)
+    right = statsig_tree(statsig_entity, statsig_kind)
+    if _same(left, right):
+        return []
+    return deep_diff(left, right, limit=limit)
+
+def naive_diff(left, right, path='', changes=None):
+    """Plain recursive diff that walks every node; the baseline for the benchmark"""
+    if changes is None:
+        changes = []
+    if isinstance(left, dict) and isinstance(right, dict):
+        for key in sorted(set(left) | set(right), key=str):
+            naive_diff(left.get(key), right.get(key), _join(path, key), changes)
+    elif isinstance(left, list) and isinstance(right, list) and len(left) == len(right):
+        for i, (l, r) in enumerate(zip(left, right)):
+            naive_diff(l, r, _join(path, i), changes)
+    elif left != right or type(left) is not type(right):
+        changes.append({'path': path, 'amplitude': left, 'statsig': right})
+    return changes
+
+def run_benchmark(count, payload_kb, seed=3):
+    """Diff `count` paired experiments carrying ~payload_kb payloads, naive vs Merkle"""
+    from synthetic_data import large_payload
+
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        variants = [{'key': key, 'payload': large_payload(payload_kb, rng)} for key in ('control', 'treatment')]
+        groups = [{'name': v['key'], 'size': 50, 'parameterValues': copy.deepcopy(v['payload'])} for v in variants]
+        if i % 10 == 0:
+            groups[1]['parameterValues']['items'][-1]['weight'] += 1
+        pairs.append((amplitude_tree({'variants': variants}, 'experiment'),
+                      statsig_tree({'groups': groups}, 'experiment')))
+
+    print(f"🌳 Structural diff benchmark: {count} experiments, ~{payload_kb} KB payload per variant")
+    results = {}
+    for label, diff in (('naive', naive_diff), ('merkle', lambda l, r: [] if _same(l, r) else deep_diff(l, r))):
+        started = time.perf_counter()
+        changed = sum(1 for left, right in pairs if diff(left, right))
+        elapsed = time.perf_counter() - started
+        results[label] = elapsed
+        print(f"   ⏱️  {label}: {elapsed:.2f}s ({count / elapsed:,.0f} pairs/s, {changed} with differences)")
+    print(f"   🚀 Speedup: {results['naive'] / results['merkle']:.1f}x")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Structural diff of Amplitude and Statsig variants and targeting")
+    parser.add_argument('--benchmark', type=int, metavar='N', default=2000,
+                        help="number of synthetic experiment pairs (default: 2000)")
+    parser.add_argument('--payload-kb', type=int, default=64,
+                        help="approximate payload size per variant in KB (default: 64)")
+    args = parser.parse_args(argv)
+    run_benchmark(args.benchmark, args.payload_kb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import random
+
+from structural_diff import DEFAULT_MAPPING
+
+# Vocabulary modelled on the real inventory (boost-price-test-gb-ios-202302, mpu-heuristics-v1, ...)
+WORDS = ['mpu', 'heuristics', 'boost', 'price', 'test', 'retest', 'gender', 'filter', 'paywall', 'taps',
+         'cascade', 'distance', 'profile', 'preview', 'everest', 'pass', 'optimize', 'views', 'mutual',
+         'unified', 'server', 'driven', 'remote', 'inaccessible', 'xtra', 'day', 'approximate', 'expand']
+SUFFIXES = ['ios', 'android', 'backend', 'us', 'gb', 'br', 'fr', 'au', 'ca', 'es', 'de', 'cl',
+            'q125', 'q224', 'v1', 'v2', 'v3', '202302', '20230712', '20221019']
+VARIANT_SETS = [['on'], ['control', 'treatment'], ['control', 'a', 'b'], ['off', 'on'], ['control', 'low', 'high']]
+EVALUATION_MODES = ['remote', 'local']
+AMPLITUDE_STATES = ['running', 'draft', 'decision-made', 'archived']
+STATSIG_STATUS = {'running': 'active', 'draft': 'setup', 'decision-made': 'decision_made', 'archived': 'archived'}
+
+def synthetic_keys(count, rng):
+    """Unique experiment-style keys"""
+    keys = set()
+    while len(keys) < count:
+        parts = rng.sample(WORDS, rng.randint(2, 4)) + rng.sample(SUFFIXES, rng.randint(1, 2))
+        key = '-'.join(parts)
+        if key in keys:
+            key = f"{key}-{len(keys)}"
+        keys.add(key)
+    return sorted(keys)
+
+def large_payload(kb, rng):
+    """A JSON payload blob of roughly `kb` kilobytes"""
+    return {'version': rng.randint(1, 9), 'items': [
+        {'id': i, 'label': f"item-{rng.randint(0, 10 ** 6)}", 'weight': rng.randint(0, 100), 'enabled': rng.random() < 0.5}
+        for i in range(max(1, kb * 1024 // 64))
+    ]}
+
+def _variants(rng, payload_kb=0):
+    keys = rng.choice(VARIANT_SETS)
+    variants = []
+    for key in keys:
+        variant = {'key': key, 'name': key.title()}
+        if payload_kb:
+            variant['payload'] = large_payload(payload_kb, rng)
+        elif rng.random() < 0.3:
+            variant['payload'] = {'limit': rng.randint(1, 100), 'copy': f"{key}-copy", 'enabled': rng.random() < 0.5}
+        variants.append(variant)
+    return variants
+
+def _segments(rng):
+    segments = []
+    for name in rng.sample(['Beta testers', 'iOS users', 'Android users', 'Premium'], rng.randint(0, 2)):
+        segments.append({
+            'name': name,
+            'conditions': [{
+                'type': 'property',
+                'prop': rng.choice(['platform', 'country', 'app_version', 'user_id']),
+                'op': rng.choice(['is', 'is not', 'contains', 'version greater']),
+                'values': rng.sample(['ios', 'android', 'US', 'GB', 'BR', '7.1.0', '8.0.0'], rng.randint(1, 3))
+            }],
+            'percentage': rng.choice([0, 10, 50, 100]),
+        })
+    return segments
+
+def amplitude_entity(key, kind, rng, payload_kb=0):
+    """One Amplitude flag or experiment in the Management API shape"""
+    variants = _variants(rng, payload_kb)
+    weight = 100 // len(variants)
+    entity = {
+        'id': str(rng.randint(10 ** 5, 10 ** 6)),
+        'key': key,
+        'name': key.replace('-', ' ').title(),
+        'description': f"Synthetic {kind} {key}",
+        'evaluationMode': rng.choice(EVALUATION_MODES),
+        'bucketingKey': 'amplitude_id',
+        'bucketingSalt': f"salt-{rng.randint(0, 10 ** 6)}",
+        'rolloutPercentage': rng.choice([0, 10, 25, 50, 100]),
+        'variants': variants,
+        'rolloutWeights': {v['key']: weight for v in variants},
+        'segments': _segments(rng),
+        'deployments': [str(rng.randint(1, 5))],
+        'tags': rng.sample(['growth', 'pricing', 'discovery', 'ios', 'android'], rng.randint(0, 2)),
+        'lastModified': f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T12:00:00Z",
+    }
+    if kind == 'flag':
+        entity['enabled'] = rng.random() < 0.7
+    else:
+        entity['state'] = rng.choice(AMPLITUDE_STATES)
+        entity['startDate'] = '2025-01-01'
+    return entity
+
+def statsig_counterpart(entity, kind, rng, drift=0.1):
+    """The Statsig gate / experiment / dynamic config a migrated Amplitude entity became"""
+    drifted = rng.random() < drift
+    groups = [(v['key'], v.get('payload') or {}) for v in entity['variants']]
+    if drifted and rng.random() < 0.5:
+        groups = groups + [('extra', {})]
+    rollout = entity['rolloutPercentage']
+    if drifted:
+        rollout = rng.choice([0, 5, 20, 75])
+    base = {
+        'id': entity['key'],
+        'name': entity['key'],
+        'description': entity['description'],
+        'lastModifiedTime': 1735689600000 + rng.randint(0, 10 ** 9),
+        'tags': list(entity.get('tags', [])),
+    }
+    rules = [{
+        'name': segment['name'],
+        'passPercentage': segment['percentage'],
+        'conditions': [{
+            'type': DEFAULT_MAPPING['condition_types'][condition['type']],
+            'field': condition['prop'],
+            'operator': DEFAULT_MAPPING['operators'][condition['op']],
+            'targetValue': list(condition['values']),
+        } for condition in segment['conditions']],
+    } for segment in entity.get('segments', [])]
+    rules.append({'name': 'Everyone', 'passPercentage': rollout, 'conditions': [{'type': 'public'}]})
+    if kind == 'experiment':
+        state = STATSIG_STATUS[entity['state']]
+        if drifted and rng.random() < 0.5:
+            state = 'abandoned'
+        size = 100 / len(groups)
+        base.update({
+            'status': state,
+            'allocation': rollout,
+            'groups': [{'name': name, 'size': size, 'parameterValues': values} for name, values in groups],
+            'targetingGateID': None,
+        })
+    elif kind == 'gate':
+        base.update({'isEnabled': entity['enabled'] != (drifted and rng.random() < 0.5), 'rules': rules})
+    else:
+        payload = next((v.get('payload') for v in entity['variants'] if v.get('payload')), {})
+        base.update({
+            'isEnabled': entity['enabled'],
+            'rules': [dict(rule, returnValue=payload) for rule in rules],
+            'defaultValue': {},
+        })
+    return base
+
+def generate_inventories(total, seed=42, drift=0.1, rename=0.05, missing=0.03, payload_kb=0):
+    """Matching Amplitude and Statsig combined exports with `total` Amplitude entities
+
+    Roughly 60% flags and 40% experiments; multi-variant flags migrate to
+    dynamic configs, on/off flags to gates. A `rename` share of
+    Statsig names are altered, a `missing` share is not migrated at all and a
+    `drift` share differ in state, variants or rollout. With payload_kb every
+    variant carries a payload blob of about that size.
+    """
+    rng = random.Random(seed)
+    keys = synthetic_keys(total, rng)
+    amplitude = {'exported_at': '2025-10-01T00:00:00', 'flags': [], 'experiments': [], 'deployments': []}
+    statsig = {'exported_at': '2025-10-01T00:00:00', 'experiments': [], 'feature_gates': [], 'dynamic_configs': []}
+    for key in keys:
+        kind = 'flag' if rng.random() < 0.6 else 'experiment'
+        entity = amplitude_entity(key, kind, rng, payload_kb)
+        amplitude['flags' if kind == 'flag' else 'experiments'].append(entity)
+        if rng.random() < missing:
+            continue
+        if kind == 'experiment':
+            target = 'experiment'
+        elif not {v['key'] for v in entity['variants']} <= {'on', 'off'}:
+            target = 'dynamic_config'
+        else:
+            target = 'gate'
+        counterpart = statsig_counterpart(entity, target, rng, drift)
+        if rng.random() < rename:
+            counterpart['name'] = counterpart['name'].replace('-', '_') + rng.choice(['', '_v2', '_q125'])
+            counterpart['id'] = counterpart['name']
+        section = {'experiment': 'experiments', 'gate': 'feature_gates', 'dynamic_config': 'dynamic_configs'}[target]
+        statsig[section].append(counterpart)
+    amplitude['deployments'] = [{'id': str(i), 'label': f"deployment-{i}", 'key': f"client-{i}"} for i in range(1, 6)]
+    return amplitude, statsig
+
+def synthetic_contexts(count, seed=7):
+    """User contexts carrying the properties the synthetic segments target"""
+    rng = random.Random(seed)
+    platforms = ['ios', 'android', 'web']
+    countries = ['US', 'GB', 'BR', 'FR', 'DE', 'AU']
+    versions = ['6.9.0', '7.0.2', '7.1.0', '7.4.1', '8.0.0', '8.2.3']
+    return [{
+        'user_id': f"user-{i}",
+        'platform': rng.choice(platforms),
+        'country': rng.choice(countries),
+        'app_version': rng.choice(versions),
+    } for i in range(count)]
@@ -0,0 +1,287 @@
+import contextlib
+import cProfile
+import json
+import math
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+
+# Shared by every connector and comparator: <project root>/build/telemetry
+DEFAULT_TELEMETRY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                     "build", "telemetry")
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Individual request records kept for the run report; totals and the histogram cover every request
+MAX_REQUEST_RECORDS = 100000
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+class Telemetry:
+    """Request- and stage-level measurements for one run of a connector or comparator
+
+    Requests are recorded by the connectors with their vendor, final status,
+    latency across all attempts, response bytes and retry count. stage()
+    brackets a step of the run and records its wall and CPU time, peak
+    traced memory and the requests it made. Disabled telemetry records
+    nothing, so the hooks can stay in place unconditionally.
+    """
+
+    def __init__(self, tool='connector', enabled=False, directory=DEFAULT_TELEMETRY_DIR, profile=False):
+        self.tool = tool
+        self.enabled = enabled
+        self.directory = directory
+        self.profile = profile
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.requests = deque(maxlen=MAX_REQUEST_RECORDS)
+        self.totals = {}
+        self.statuses = Counter()
+        self.histograms = {}
+        self.stages = []
+        # Each thread nests its own stages; every open stage, whichever thread runs it, shares the memory peak
+        self._local = threading.local()
+        self._open = []
+        self._lock = threading.Lock()
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def record_request(self, vendor, description, status, seconds, size=0, attempts=1, error=None):
+        """Record one logical request; status is the last HTTP status seen, None when no response came back"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.requests.append({
+                'vendor': vendor,
+                'description': description,
+                'status': status,
+                'seconds': round(seconds, 6),
+                'bytes': size,
+                'retries': attempts - 1,
+                **({'error': str(error)} if error else {}),
+            })
+            totals = self.totals.setdefault(vendor, Counter())
+            totals['requests'] += 1
+            totals['bytes'] += size
+            totals['retries'] += attempts - 1
+            totals['seconds'] += seconds
+            if error:
+                totals['errors'] += 1
+            self.statuses[(vendor, str(status or 'error'))] += 1
+            buckets = self.histograms.setdefault(vendor, [0] * (len(LATENCY_BUCKETS) + 1))
+            buckets[next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))] += 1
+
+    def _request_totals(self):
+        with self._lock:
+            return sum(t['requests'] for t in self.totals.values()), sum(t['bytes'] for t in self.totals.values())
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Measure a step of the run
+
+        Stages may nest; a nested stage is reported as "outer/inner", and only
+        the outermost one is profiled. Stages can run on several threads at
+        once, but CPU time, peak memory and request counts are process-wide,
+        so concurrent stages each include the others' share.
+        """
+        if not self.enabled:
+            yield
+            return
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        stack = self._local.stack
+        with self._lock:
+            # reset_peak below would lose the open stages' peak, so fold it into them first
+            peak = tracemalloc.get_traced_memory()[1]
+            for frame in self._open:
+                frame['peak'] = max(frame['peak'], peak)
+            tracemalloc.reset_peak()
+            frame = {'name': name, 'peak': 0, 'traced': tracemalloc.get_traced_memory()[0]}
+            self._open.append(frame)
+        requests, size = self._request_totals()
+        path = "/".join([outer['name'] for outer in stack] + [name])
+        stack.append(frame)
+        profiler = cProfile.Profile() if self.profile and len(stack) == 1 else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            stack.pop()
+            with self._lock:
+                self._open = [other for other in self._open if other is not frame]
+                peak = tracemalloc.get_traced_memory()[1]
+                for outer in self._open:
+                    outer['peak'] = max(outer['peak'], peak)
+            end_requests, end_size = self._request_totals()
+            record = {
+                'stage': path,
+                'wall_seconds': round(wall, 4),
+                'cpu_seconds': round(cpu, 4),
+                'peak_memory_bytes': max(frame['peak'], peak) - frame['traced'],
+                'requests': end_requests - requests,
+                'bytes': end_size - size,
+            }
+            if profiler:
+                record['profile'] = self._dump_profile(profiler, path)
+            with self._lock:
+                self.stages.append(record)
+
+    def _dump_profile(self, profiler, stage):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.tool}_{_slug(stage)}_{self.started_at:%Y%m%d_%H%M%S}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def report(self, error=None):
+        """The run report as a JSON-serialisable dict"""
+        with self._lock:
+            vendors = {}
+            for vendor, totals in self.totals.items():
+                latencies = sorted(r['seconds'] for r in self.requests if r['vendor'] == vendor)
+                vendors[vendor] = {
+                    'requests': totals['requests'],
+                    'errors': totals['errors'],
+                    'retries': totals['retries'],
+                    'bytes': totals['bytes'],
+                    'seconds': round(totals['seconds'], 4),
+                    'statuses': {status: count for (v, status), count in sorted(self.statuses.items()) if v == vendor},
+                    **{f"p{int(q * 100)}_ms": round(percentile(latencies, q) * 1000, 2) for q in (0.5, 0.9, 0.99)},
+                }
+            requests = list(self.requests)
+        return {
+            'tool': self.tool,
+            'started_at': self.started_at.isoformat(),
+            'wall_seconds': round(time.perf_counter() - self._started, 4),
+            'cpu_seconds': round(time.process_time(), 4),
+            'outcome': 'failed' if error else 'succeeded',
+            **({'error': str(error)} if error else {}),
+            'stages': self.stages,
+            'vendors': vendors,
+            'requests': requests,
+        }
+
+    def prometheus(self, report):
+        """The run report in the Prometheus text exposition format"""
+        tool = self.tool
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                rendered = ",".join(f'{key}="{_label(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{rendered}}} {value}")
+
+        metric('connector_run_timestamp_seconds', 'gauge', "When the run started",
+               [({'tool': tool}, round(self.started_at.timestamp(), 3))])
+        metric('connector_run_wall_seconds', 'gauge', "Wall time of the run",
+               [({'tool': tool}, report['wall_seconds'])])
+        metric('connector_run_success', 'gauge', "1 when the run finished without an export error",
+               [({'tool': tool}, int(report['outcome'] == 'succeeded'))])
+        with self._lock:
+            statuses = sorted(self.statuses.items())
+            totals = sorted(self.totals.items())
+            histograms = sorted(self.histograms.items())
+        metric('connector_requests_total', 'counter', "Requests by vendor and final HTTP status",
+               [({'tool': tool, 'vendor': vendor, 'status': status}, count) for (vendor, status), count in statuses])
+        metric('connector_request_retries_total', 'counter', "Retried attempts by vendor",
+               [({'tool': tool, 'vendor': vendor}, t['retries']) for vendor, t in totals])
+        metric('connector_response_bytes_total', 'counter', "Response body bytes received by vendor",
+               [({'tool': tool, 'vendor': vendor}, t['bytes']) for vendor, t in totals])
+        lines.append("# HELP connector_request_duration_seconds Request latency including retries")
+        lines.append("# TYPE connector_request_duration_seconds histogram")
+        for vendor, buckets in histograms:
+            labels = f'tool="{_label(tool)}",vendor="{_label(vendor)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                cumulative += count
+                lines.append(f'connector_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"connector_request_duration_seconds_sum{{{labels}}} {round(dict(totals)[vendor]['seconds'], 6)}")
+            lines.append(f"connector_request_duration_seconds_count{{{labels}}} {cumulative}")
+        for field, name, help_text in (('wall_seconds', 'connector_stage_wall_seconds', "Wall time per stage"),
+                                       ('cpu_seconds', 'connector_stage_cpu_seconds', "CPU time per stage"),
+                                       ('peak_memory_bytes', 'connector_stage_peak_memory_bytes',
+                                        "Peak traced memory per stage")):
+            metric(name, 'gauge', help_text,
+                   [({'tool': tool, 'stage': stage['stage']}, stage[field]) for stage in report['stages']])
+        return "\n".join(lines) + "\n"
+
+    def write(self, error=None):
+        """Write the JSON run report and the Prometheus textfile; returns their paths, or None when disabled"""
+        if not self.enabled:
+            return None
+        report = self.report(error)
+        os.makedirs(self.directory, exist_ok=True)
+        report_path = os.path.join(self.directory, f"{self.tool}_{self.started_at:%Y%m%d_%H%M%S}.json")
+        _write_atomically(report_path, json.dumps(report, indent=2))
+        # A stable name, so a node_exporter textfile collector always sees the latest run
+        prom_path = os.path.join(self.directory, f"{self.tool}.prom")
+        _write_atomically(prom_path, self.prometheus(report))
+        print(f"📈 Telemetry written to {report_path} and {prom_path}")
+        return report_path, prom_path
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _write_atomically(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+_telemetry = Telemetry()
+
+def get_telemetry():
+    """Process-wide telemetry shared by every connector; disabled until configured"""
+    return _telemetry
+
+def configure_telemetry(tool, enabled=True, directory=DEFAULT_TELEMETRY_DIR, profile=False):
+    """Replace the process-wide telemetry with a fresh one for a run of `tool`"""
+    global _telemetry
+    _telemetry = Telemetry(tool, enabled or profile, directory, profile)
+    return _telemetry
+
+def stage(name):
+    """Shorthand for get_telemetry().stage(name)"""
+    return get_telemetry().stage(name)
+
+@contextlib.contextmanager
+def run_report():
+    """Write the run report when the wrapped run ends, recording the export error if it failed"""
+    try:
+        yield
+    except Exception as e:
+        get_telemetry().write(error=e)
+        raise
+    else:
+        get_telemetry().write()
+
+def add_telemetry_arguments(parser):
+    """Register the --telemetry options shared by the connectors and comparators"""
+    parser.add_argument('--telemetry', action='store_true',
+                        help="write a JSON run report and a Prometheus textfile with request and stage metrics")
+    parser.add_argument('--telemetry-dir', default=DEFAULT_TELEMETRY_DIR,
+                        help="directory for run reports and profiles (default: build/telemetry)")
+    parser.add_argument('--profile', action='store_true',
+                        help="also dump cProfile stats per stage (implies --telemetry)")
+
+def telemetry_from_args(args, tool):
+    """Configure the process-wide telemetry from the --telemetry options"""
+    return configure_telemetry(tool, args.telemetry, args.telemetry_dir, args.profile)
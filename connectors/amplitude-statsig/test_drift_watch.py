@@ -0,0 +1,30 @@
+import unittest
+
+from drift_watch import DriftWatcher
+
+def _gate(enabled, modified):
+    return {'id': 'checkout-redesign', 'name': 'checkout-redesign', 'isEnabled': enabled, 'rules': [],
+            'lastModifiedTime': int(modified * 1000)}
+
+class DriftWatcherTest(unittest.TestCase):
+
+    def test_change_stamped_just_before_the_last_poll_is_seen(self):
+        # The vendor's clock runs a few seconds behind ours, so the edit carries a time before the baseline poll
+        watcher = DriftWatcher()
+        baseline = 1_700_000_000.0
+        watcher.poll({}, {'feature_gates': [_gate(True, baseline - 3600)]}, baseline)
+        watcher.poll({}, {'feature_gates': [_gate(False, baseline - 5)]}, baseline + 30)
+        _, gate = watcher.entities[('statsig', 'feature_gates', 'checkout-redesign')]
+        self.assertFalse(gate['isEnabled'])
+
+    def test_entity_older_than_the_margin_is_not_rehashed(self):
+        watcher = DriftWatcher()
+        baseline = 1_700_000_000.0
+        watcher.poll({}, {'feature_gates': [_gate(True, baseline - 3600)]}, baseline)
+        # An unchanged lastModifiedTime well before the last poll is trusted even if the body differs
+        watcher.poll({}, {'feature_gates': [_gate(False, baseline - 3600)]}, baseline + 30)
+        _, gate = watcher.entities[('statsig', 'feature_gates', 'checkout-redesign')]
+        self.assertTrue(gate['isEnabled'])
+
+if __name__ == '__main__':
+    unittest.main()